@@ -0,0 +1,67 @@
+"""
+开奖数据离线归档命令行工具
+导出: python archive_cli.py export [ssq dlt hk6] [-o data/archive]
+导入: python archive_cli.py import data/archive/ssq.npz [data/archive/dlt.npz ...]
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from database import SessionLocal, init_db
+from services.draw_archive import export_archive, import_archive
+from services.draw_store import SPECS
+
+
+def cmd_export(args) -> None:
+    out_dir = Path(args.output)
+    db = SessionLocal()
+    try:
+        for lottery in args.lotteries or list(SPECS):
+            path = out_dir / f"{lottery}.npz"
+            meta = export_archive(db, lottery, path, compress=args.compress)
+            print(f"{lottery}: {meta['count']} 期 -> {path} ({path.stat().st_size / 1024:.1f} KiB)")
+    finally:
+        db.close()
+
+
+def cmd_import(args) -> None:
+    init_db()
+    db = SessionLocal()
+    try:
+        for path in args.files:
+            stats = import_archive(db, path, chunk_size=args.chunk_size)
+            print(
+                f"{stats['lottery']}: {path} 共 {stats['total']} 期，新增 {stats['inserted']}，"
+                f"更新 {stats['updated']}，未变 {stats['unchanged']}"
+            )
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="开奖数据离线归档（.npz）导出/导入")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="导出开奖数据")
+    export.add_argument("lotteries", nargs="*", choices=list(SPECS), help="默认导出全部彩种")
+    export.add_argument("-o", "--output", default="data/archive", help="输出目录")
+    export.add_argument("--compress", action="store_true", help="压缩（加载时不能内存映射）")
+    export.set_defaults(func=cmd_export)
+
+    imp = sub.add_parser("import", help="导入归档文件")
+    imp.add_argument("files", nargs="+")
+    imp.add_argument("--chunk-size", type=int, default=500)
+    imp.set_defaults(func=cmd_import)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        args.func(args)
+    except (ValueError, OSError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+批量写入基准测试：逐行查询写入 vs bulk_upsert
+用法: python benchmarks/bench_bulk_upsert.py [--sizes 100 1000 10000]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models.ssq import SSQResult
+from services.bulk_upsert import bulk_upsert
+
+
+def make_rows(n: int, seed: int = 0) -> list:
+    """生成 n 期模拟双色球数据"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        reds = sorted(rng.sample(range(1, 34), 6))
+        rows.append({
+            "period": 2003001 + i,
+            "date": f"2003-01-{i % 28 + 1:02d}(二)",
+            "weekday": "二",
+            **{f"red{j + 1}": reds[j] for j in range(6)},
+            "blue": rng.randint(1, 16),
+        })
+    return rows
+
+
+def legacy_save(db, rows: list) -> None:
+    """原实现：每行一次 SELECT + setattr"""
+    for item in rows:
+        existing = db.query(SSQResult).filter(SSQResult.period == item["period"]).first()
+        if existing:
+            for key, value in item.items():
+                setattr(existing, key, value)
+        else:
+            db.add(SSQResult(**item))
+    db.commit()
+
+
+def new_session(tmpdir: str, name: str):
+    engine = create_engine(f"sqlite:///{tmpdir}/{name}.db")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)(), engine
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} | {'legacy 新增':>12} | {'bulk 新增':>10} | {'legacy 重写':>12} | {'bulk 重写':>10}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in args.sizes:
+            rows = make_rows(n)
+            changed = make_rows(n, seed=1)
+
+            db, engine = new_session(tmpdir, f"legacy_{n}")
+            legacy_insert = timed(legacy_save, db, rows)
+            legacy_update = timed(legacy_save, db, changed)
+            db.close()
+            engine.dispose()
+
+            db, engine = new_session(tmpdir, f"bulk_{n}")
+            bulk_insert = timed(bulk_upsert, db, SSQResult, rows)
+            bulk_update = timed(bulk_upsert, db, SSQResult, changed)
+            db.close()
+            engine.dispose()
+
+            print(
+                f"{n:>7} | {legacy_insert:>10.1f}ms | {bulk_insert:>8.1f}ms | "
+                f"{legacy_update:>10.1f}ms | {bulk_update:>8.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+杀号方法组合搜索基准测试：逐组合扫描历史记录 vs 位集完整枚举 vs 分支定界前 20 名
+用法: python benchmarks/bench_combinations.py [--periods 500] [--candidates 12 17 23 28]
+"""
+import argparse
+import json
+import sys
+import time
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.kill_engine import numbers_mask, pack_bits, rank_method_combinations
+
+
+def make_methods(n_methods: int, periods: int, seed: int = 0):
+    """模拟各方法的历史成功情况与下期杀号（大乐透前区 1-35）"""
+    rng = np.random.default_rng(seed)
+    hits = rng.random((periods, n_methods)) < rng.uniform(0.55, 0.9, n_methods)
+    kills = {
+        m + 1: sorted(set(rng.integers(1, 36, size=rng.integers(1, 6)).tolist()))
+        for m in range(n_methods)
+    }
+    return hits, kills
+
+
+def legacy_rank(hits: np.ndarray, kills: dict, candidates: list) -> list:
+    """原实现：每个组合逐条扫描历史记录"""
+    total = len(hits)
+    records = [
+        {"kills": {m: {"success": bool(row[m - 1])} for m in candidates}}
+        for row in hits
+    ]
+    combo_results = []
+    for size in range(2, min(9, len(candidates) + 1)):
+        for combo in combinations(candidates, size):
+            count = sum(
+                1 for record in records
+                if all(record["kills"].get(m, {}).get("success", False) for m in combo)
+            )
+            combo_kills = set()
+            for m in combo:
+                combo_kills.update(kills.get(m, []))
+            rate = count / total * 100 if total > 0 else 0
+            combo_results.append({
+                "methods": list(combo),
+                "method_names": [f"方法{m}" for m in combo],
+                "success_rate": round(rate, 2),
+                "unique_kills": len(combo_kills),
+                "kill_numbers": sorted(combo_kills),
+                "efficiency": round(rate * len(combo_kills) / 100, 2),
+                "method_count": len(combo),
+            })
+    combo_results.sort(key=lambda x: (-x["efficiency"], -x["success_rate"], -x["unique_kills"]))
+    return combo_results[:20]
+
+
+def timed(fn) -> tuple:
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--periods", type=int, default=500)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[12, 17, 23, 28])
+    parser.add_argument("--legacy-max", type=int, default=12, help="原实现只跑到该候选数")
+    parser.add_argument("--full-max", type=int, default=17, help="完整枚举只跑到该候选数")
+    args = parser.parse_args()
+
+    print(f"{'候选数':>6} | {'legacy':>10} | {'位集全枚举':>10} | {'分支定界':>10}")
+    for n in args.candidates:
+        hits, kills = make_methods(n, args.periods)
+        candidates = list(range(1, n + 1))
+        success_bits = {m: pack_bits(hits[:, m - 1]) for m in candidates}
+        kill_masks = {m: numbers_mask(kills[m]) for m in candidates}
+
+        top, bnb_ms = timed(lambda: rank_method_combinations(
+            success_bits, kill_masks, candidates, args.periods, {}, top_k=20,
+        ))
+        cells = []
+        if n <= args.legacy_max:
+            legacy, legacy_ms = timed(lambda: legacy_rank(hits, kills, candidates))
+            assert json.dumps(legacy) == json.dumps(top), f"{n} 个候选结果与原实现不一致"
+            cells.append(f"{legacy_ms:>8.0f}ms")
+        else:
+            cells.append(f"{'-':>10}")
+        if n <= args.full_max:
+            full, full_ms = timed(lambda: rank_method_combinations(
+                success_bits, kill_masks, candidates, args.periods, {}, top_k=None,
+            ))
+            assert json.dumps(full[:20]) == json.dumps(top), f"{n} 个候选分支定界结果不一致"
+            cells.append(f"{full_ms:>8.0f}ms")
+        else:
+            cells.append(f"{'-':>10}")
+        print(f"{n:>6} | {cells[0]} | {cells[1]} | {bnb_ms:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+分析进程池基准：在 lottery.db 的临时副本上经 ASGI 直接调用应用，同时发出多组不同参数的杀号回测，
+期间持续请求 /api/ssq/latest 与 /health，对比在线程池中计算（COMPUTE_WORKERS=0）与在工作进程中计算时
+轻量接口的延迟；随后把排队上限调为 0 发出突发请求，校验超出容量的请求立即得到 429 与 Retry-After。
+响应缓存在测试期间关闭，保证每个请求都真正计算。
+用法: python benchmarks/bench_compute_pool.py [--workers 2] [--load 6] [--lookback 2000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+PROBES = ["/api/ssq/latest", "/health"]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def probe_during(client, load) -> dict:
+    """load 完成之前轮流请求轻量接口，返回 {路径: [延迟秒]}"""
+    latencies = {url: [] for url in PROBES}
+    while not load.done():
+        for url in PROBES:
+            start = time.perf_counter()
+            response = await client.get(url)
+            latencies[url].append(time.perf_counter() - start)
+            assert response.status_code == 200, f"{url}: {response.status_code}"
+        await asyncio.sleep(0.02)
+    return latencies
+
+
+async def kill_load(client, lookback: int, count: int) -> float:
+    """同时发出 count 个参数各不相同的杀号回测，返回总耗时"""
+    start = time.perf_counter()
+    responses = await asyncio.gather(*[
+        client.get("/api/analysis/ssq/kill", params={"lookback": lookback - i, "num_sets": 1 + i % 10})
+        for i in range(count)
+    ])
+    for response in responses:
+        assert response.status_code == 200, f"{response.status_code} {response.text[:200]}"
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=2, help="进程模式的工作进程数")
+    parser.add_argument("--load", type=int, default=6, help="同时发出的杀号回测数")
+    parser.add_argument("--lookback", type=int, default=2000, help="杀号回测的历史期数")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    target = Path(tmp.name) / "bench.db"
+    shutil.copyfile(Path(__file__).resolve().parent.parent / "lottery.db", target)
+    os.environ.update(DATABASE_URL=f"sqlite:///{target}", PRECOMPUTE_ENABLED="0", PREDICTION_WORKERS="0")
+
+    import httpx
+    from database import init_db
+    from main import app
+    from services.compute_pool import compute_pool
+    from services.http_cache import response_cache
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("services").setLevel(logging.ERROR)
+    init_db()
+    response_cache.enabled = False
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+            # 预热主进程的内存数据
+            await client.get("/api/analysis/ssq/frequency")
+            print(f"{args.load} 个并发杀号回测 (lookback≈{args.lookback}) 期间的轻量接口延迟")
+            print(f"{'模式':>10} | {'回测总耗时':>8} | {'接口':<16} | {'空闲 p50':>8} | "
+                  f"{'负载 p50':>8} | {'负载 p95':>8} | {'最大':>8}")
+            for workers in (0, args.workers):
+                compute_pool.shutdown()
+                compute_pool.workers = workers
+                await asyncio.to_thread(compute_pool.start)
+                # 工作进程首次载入数据与导入分析模块
+                await kill_load(client, 100, workers or 1)
+
+                idle = {url: [] for url in PROBES}
+                for _ in range(20):
+                    for url in PROBES:
+                        start = time.perf_counter()
+                        await client.get(url)
+                        idle[url].append(time.perf_counter() - start)
+
+                load = asyncio.ensure_future(kill_load(client, args.lookback, args.load))
+                busy = await probe_during(client, load)
+                elapsed = await load
+                mode = f"{workers} 进程" if workers else "线程"
+                for url in PROBES:
+                    print(f"{mode:>10} | {elapsed * 1000:>8.0f}ms | {url:<16} | "
+                          f"{statistics.median(idle[url]) * 1000:>6.1f}ms | "
+                          f"{statistics.median(busy[url]) * 1000:>6.1f}ms | "
+                          f"{percentile(busy[url], 0.95) * 1000:>6.1f}ms | {max(busy[url]) * 1000:>6.1f}ms")
+
+            # 准入控制：不排队时超出工作进程数的请求立即被拒绝
+            queue_size = compute_pool.queue_size
+            compute_pool.queue_size = 0
+            try:
+                burst = args.workers + 3
+                responses = await asyncio.gather(*[
+                    client.get("/api/analysis/ssq/kill", params={"lookback": 500 + i})
+                    for i in range(burst)
+                ])
+            finally:
+                compute_pool.queue_size = queue_size
+            rejected = [r for r in responses if r.status_code == 429]
+            accepted = [r for r in responses if r.status_code == 200]
+            print(f"突发 {burst} 个请求（容量 {args.workers}）: 接受 {len(accepted)}，429 {len(rejected)}")
+            assert len(accepted) == args.workers and len(rejected) == burst - args.workers, \
+                [r.status_code for r in responses]
+            assert all(r.headers.get("retry-after") for r in rejected)
+            print(compute_pool.stats())
+
+    try:
+        asyncio.run(run())
+    finally:
+        compute_pool.shutdown()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
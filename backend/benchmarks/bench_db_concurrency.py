@@ -0,0 +1,152 @@
+"""
+数据库并发基准：一个写线程按回填的提交路径（bulk_upsert，每批一个事务）持续写入，
+多个读线程同时执行开奖列表查询（SSQService.get_all + get_count），统计读延迟分布、
+database is locked 错误数与写入吞吐。
+对比原有的默认引擎（回滚日志、无 PRAGMA）与 make_engine 的读写分离引擎（WAL 等）。
+用法: python benchmarks/bench_db_concurrency.py [--readers 4] [--duration 5] [--chunk 1000]
+"""
+import argparse
+import logging
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, make_engine
+from mock_sources import synthetic_draws
+from models.ssq import SSQResult
+from services.bulk_upsert import bulk_upsert
+from services.ssq_service import SSQService
+from sources.scraper.ssq_scraper import SSQScraper
+
+
+def make_rows(n: int) -> list:
+    parse = SSQScraper()._parse_item
+    return [parse(item) for item in synthetic_draws("ssq", n)]
+
+
+def build_engines(scenario: str, url: str):
+    """返回 (写引擎, 读引擎)"""
+    if scenario == "默认":
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        return engine, engine
+    return make_engine(url), make_engine(url, readonly=True)
+
+
+def run_scenario(scenario: str, rows: list, seed_rows: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        write_engine, read_engine = build_engines(scenario, f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(write_engine, tables=[SSQResult.__table__])
+        WriteSession = sessionmaker(bind=write_engine)
+        ReadSession = sessionmaker(bind=read_engine)
+        db = WriteSession()
+        bulk_upsert(db, SSQResult, rows[:seed_rows])
+        db.close()
+
+        stop = threading.Event()
+        latencies, write_latencies, errors, commits = [], [], [0], [0]
+        lock = threading.Lock()
+
+        def writer():
+            # 轮流写入新期号并改写已有期号，保证每个事务都有实际写入
+            db = WriteSession()
+            pending = rows[seed_rows:]
+            offset = 0
+            try:
+                while not stop.is_set():
+                    if pending:
+                        chunk, pending = pending[:args.chunk], pending[args.chunk:]
+                    else:
+                        offset += 1
+                        begin = (offset * args.chunk) % len(rows)
+                        chunk = [{**r, "blue": (r["blue"] + offset) % 16 + 1} for r in rows[begin:begin + args.chunk]]
+                    start = time.perf_counter()
+                    try:
+                        bulk_upsert(db, SSQResult, chunk)
+                        write_latencies.append(time.perf_counter() - start)
+                        commits[0] += 1
+                    except OperationalError:
+                        db.rollback()
+                        with lock:
+                            errors[0] += 1
+                    if args.write_pause:
+                        time.sleep(args.write_pause)
+            finally:
+                db.close()
+
+        def reader():
+            while not stop.is_set():
+                start = time.perf_counter()
+                db = ReadSession()
+                try:
+                    service = SSQService(db)
+                    service.get_all(limit=100)
+                    service.get_count()
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        latencies.append(elapsed)
+                except OperationalError:
+                    with lock:
+                        errors[0] += 1
+                finally:
+                    db.close()
+
+        threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+        if not args.no_writer:
+            threads.append(threading.Thread(target=writer))
+        for t in threads:
+            t.start()
+        time.sleep(args.duration)
+        stop.set()
+        for t in threads:
+            t.join()
+        write_engine.dispose()
+        read_engine.dispose()
+
+    latencies.sort()
+    write_latencies.sort()
+    pct = lambda p, xs=latencies: xs[min(int(len(xs) * p), len(xs) - 1)] * 1000 if xs else 0
+    return {
+        "reads": len(latencies),
+        "p50": pct(0.5), "p95": pct(0.95), "p99": pct(0.99),
+        "max": latencies[-1] * 1000 if latencies else 0,
+        "mean": statistics.mean(latencies) * 1000 if latencies else 0,
+        "errors": errors[0],
+        "commits": commits[0],
+        "write_p95": pct(0.95, write_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=4, help="读线程数")
+    parser.add_argument("--duration", type=float, default=5.0, help="每个场景的运行时间（秒）")
+    parser.add_argument("--chunk", type=int, default=1000, help="写线程每个事务的行数")
+    parser.add_argument("--write-pause", type=float, default=0.0, help="写线程两次提交之间的间隔（秒）")
+    parser.add_argument("--seed-rows", type=int, default=3000, help="预先写入的期数")
+    parser.add_argument("--rows", type=int, default=20000, help="模拟数据总期数")
+    parser.add_argument("--no-writer", action="store_true", help="只测读（对照组）")
+    args = parser.parse_args()
+    logging.getLogger("services").setLevel(logging.ERROR)
+
+    rows = make_rows(args.rows)
+    print(f"读线程 {args.readers}, 每事务 {args.chunk} 行, 每场景 {args.duration}s"
+          f"{'（无写入）' if args.no_writer else ''}")
+    print(f"{'场景':>4} | {'读次数':>6} | {'p50':>7} | {'p95':>7} | {'p99':>7} | {'最大':>7} | "
+          f"{'写事务':>5} | {'写 p95':>7} | 锁错误")
+    for scenario in ("默认", "调优"):
+        r = run_scenario(scenario, rows, args.seed_rows, args)
+        print(f"{scenario:>6} | {r['reads']:>9} | {r['p50']:>5.1f}ms | {r['p95']:>5.1f}ms | "
+              f"{r['p99']:>5.1f}ms | {r['max']:>5.0f}ms | {r['commits']:>8} | {r['write_p95']:>6.1f}ms | {r['errors']}")
+
+
+if __name__ == "__main__":
+    main()
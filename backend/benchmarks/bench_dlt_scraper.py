@@ -0,0 +1,64 @@
+"""
+大乐透抓取基准测试：本地替身服务器（mock_sources.py）模拟体彩接口（固定延迟，HTTP/1.1 keep-alive），
+对比逐页顺序抓取与长连接池并发抓取的耗时与连接复用情况
+用法: python benchmarks/bench_dlt_scraper.py [--count 3000] [--latency 0.1]
+"""
+import argparse
+import asyncio
+import logging
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mock_sources import MockSourceServer, synthetic_draws
+from sources.http_clients import SourceClient
+from sources.scraper.dlt_scraper import DLTScraper
+
+
+async def run(url: str, count: int, concurrency: int) -> tuple:
+    client = SourceClient("bench", {"url": url, "timeout": 15.0, "max_concurrency": concurrency})
+    scraper = DLTScraper(client)
+    start = time.perf_counter()
+    results = await scraper.fetch_by_count(count)
+    elapsed = (time.perf_counter() - start) * 1000
+    by_period = await scraper.fetch_by_period(results[-1]["period"], results[0]["period"])
+    start_day, end_day = results[len(results) // 2]["sale_end_time"][:10], results[0]["sale_end_time"][:10]
+    by_date = await scraper.fetch_by_date(start_day, end_day)
+    stats = client.stats()
+    await client.aclose()
+    return results, by_period, by_date, elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.1, help="每个请求的模拟延迟（秒）")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+    logging.getLogger("sources").setLevel(logging.ERROR)
+
+    draws = synthetic_draws("dlt", args.count)
+    server = MockSourceServer({"dlt": draws}, latency=args.latency).start()
+    url = server.url("dlt")
+    expected = [d["lotteryDrawNum"] for d in draws]
+    print(f"{args.count} 期 / {math.ceil(args.count / DLTScraper.PAGE_SIZE)} 页, 延迟 {args.latency}s")
+    print(f"{'并发数':>6} | {'按期数耗时':>10} | {'加速比':>6} | {'请求数':>6} | {'新建连接':>8} | 复用率")
+    baseline = None
+    try:
+        for concurrency in args.concurrency:
+            results, by_period, by_date, elapsed, stats = asyncio.run(run(url, args.count, concurrency))
+            assert [r["period"] for r in results] == expected, "按期数结果与桩数据不一致"
+            assert by_period == results, "按期号范围结果不一致"
+            assert by_date == results[:len(by_date)] and len(by_date) == len(results) // 2 + 1, "按日期结果不一致"
+            baseline = baseline or elapsed
+            print(f"{concurrency:>8} | {elapsed:>10.0f}ms | {baseline / elapsed:>5.1f}x | {stats['requests']:>8} | "
+                  f"{stats['new_connections']:>10} | {stats['reuse_rate']:.1%}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+位置频率统计基准测试：逐行 defaultdict 累加 vs bincount 引擎 vs 累计频次索引
+用法: python benchmarks/bench_frequency.py [--sizes 500 5000 50000] [--repeat 20]
+"""
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.draw_store import draw_store, DrawHistory, SPECS
+from services.ssq_analysis import SSQAnalysisService
+from services.dlt_analysis import DLTAnalysisService
+from services.hk6_analysis import HK6AnalysisService
+
+
+def make_history(lottery: str, n: int, seed: int = 0) -> DrawHistory:
+    """生成 n 期模拟数据（主号码不重复，附加号码独立抽取）"""
+    rng = np.random.default_rng(seed)
+    if lottery == "ssq":
+        main = np.argsort(rng.random((n, 33)), axis=1)[:, :6] + 1
+        extra = rng.integers(1, 17, size=(n, 1))
+    elif lottery == "dlt":
+        main = np.argsort(rng.random((n, 35)), axis=1)[:, :5] + 1
+        extra = np.argsort(rng.random((n, 12)), axis=1)[:, :2] + 1
+    else:
+        picks = np.argsort(rng.random((n, 49)), axis=1)[:, :7] + 1
+        main, extra = picks[:, :6], picks[:, 6:]
+    numbers = np.hstack([np.sort(main, axis=1), extra]).astype(np.int8)
+    sort_keys = np.arange(n, dtype=np.int64) + 2003001
+    periods = sort_keys if lottery == "ssq" else sort_keys.astype(str)
+    return DrawHistory(
+        SPECS[lottery], periods, sort_keys,
+        np.full(n, "2003-01-01"), np.full(n, 1, dtype=np.int8), numbers,
+    )
+
+
+def legacy_ssq(history: DrawHistory) -> dict:
+    """原实现：逐行累加到 defaultdict"""
+    total = len(history)
+    red_counts = [defaultdict(int) for _ in range(6)]
+    blue_counts = defaultdict(int)
+    for row in history.numbers.tolist():
+        for i, num in enumerate(row[:6]):
+            red_counts[i][num] += 1
+        blue_counts[row[6]] += 1
+    red_positions = []
+    for i in range(6):
+        stats = [
+            {"number": num, "count": red_counts[i].get(num, 0),
+             "frequency": round(red_counts[i].get(num, 0) / total, 4)}
+            for num in range(1, 34)
+        ]
+        red_positions.append({"position": i + 1, "stats": stats})
+    blue = [
+        {"number": num, "count": blue_counts.get(num, 0),
+         "frequency": round(blue_counts.get(num, 0) / total, 4)}
+        for num in range(1, 17)
+    ]
+    return {"total": total, "red_positions": red_positions, "blue": blue}
+
+
+def timed(fn, repeat: int) -> float:
+    """返回单次调用的平均耗时 (ms)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000, 50000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    services = {
+        "ssq": SSQAnalysisService(None),
+        "dlt": DLTAnalysisService(None),
+        "hk6": HK6AnalysisService(None),
+    }
+
+    print(
+        f"{'draws':>7} | {'ssq legacy':>11} | {'ssq bincount':>12} | {'ssq index':>11} | "
+        f"{'index build':>11} | {'dlt index':>11} | {'hk6 index':>11}"
+    )
+    for n in args.sizes:
+        timings = {}
+        for lottery, service in services.items():
+            call = service.get_position_frequency if lottery != "hk6" else service.get_number_frequency
+            # 直接放入内存存储，服务读取时不访问数据库
+            history = draw_store._histories[lottery] = make_history(lottery, n)
+            timings[f"{lottery}_bincount"] = timed(call, args.repeat)
+
+            # 与 DrawStore 载入的快照一样标记为可缓存，首次调用构建索引
+            history._cacheable = True
+            start = time.perf_counter()
+            history.frequency_index()
+            timings[f"{lottery}_build"] = (time.perf_counter() - start) * 1000
+            timings[lottery] = timed(lambda: call(limit=n // 2), args.repeat)
+
+        history = draw_store._histories["ssq"]
+        expected = json.dumps(legacy_ssq(history.tail(n // 2)), sort_keys=True)
+        actual = json.dumps(services["ssq"].get_position_frequency(limit=n // 2), sort_keys=True)
+        assert expected == actual, f"{n} 期结果与原实现不一致"
+        legacy = timed(lambda: legacy_ssq(history), args.repeat)
+
+        print(
+            f"{n:>7} | {legacy:>9.2f}ms | {timings['ssq_bincount']:>10.2f}ms | {timings['ssq']:>9.2f}ms | "
+            f"{timings['ssq_build']:>9.2f}ms | {timings['dlt']:>9.2f}ms | {timings['hk6']:>9.2f}ms"
+        )
+    draw_store.invalidate()
+
+
+if __name__ == "__main__":
+    main()
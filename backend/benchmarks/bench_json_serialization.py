@@ -0,0 +1,100 @@
+"""
+JSON 序列化基准：在 lottery.db 的临时副本上先算好各分析接口的结果，
+对比 FastAPI 默认路径（jsonable_encoder + 标准库 json）与 NumpyJSONResponse 所用的 orjson 的
+序列化耗时与响应体大小（含 gzip 后大小），并校验两者解析后内容一致。
+主要对象为 lookback=2000 的杀号分析；另含六合彩频率/生肖统计、全方法预测，
+以及直接输出 NumPy 数组的走势数据（默认路径需先 tolist）。
+用法: python benchmarks/bench_json_serialization.py [--lookback 2000] [--page-size 50] [--repeat 50]
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def stdlib_render(value) -> bytes:
+    """FastAPI 默认路径：jsonable_encoder 后由 JSONResponse.render 输出"""
+    from fastapi.encoders import jsonable_encoder
+    return json.dumps(
+        jsonable_encoder(value), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def timed(fn, value, repeat: int) -> tuple:
+    """(中位耗时秒, 输出)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(value)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookback", type=int, default=2000, help="杀号回测的历史期数")
+    parser.add_argument("--page-size", type=int, default=50, help="杀号历史记录每页条数")
+    parser.add_argument("--repeat", type=int, default=50, help="每种序列化方式的重复次数")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    target = Path(tmp.name) / "bench.db"
+    shutil.copyfile(Path(__file__).resolve().parent.parent / "lottery.db", target)
+    os.environ.update(DATABASE_URL=f"sqlite:///{target}", PRECOMPUTE_ENABLED="0", PREDICTION_WORKERS="0")
+
+    from database import init_db, ReadSessionLocal
+    from services.dlt_kill_service import DLTKillService
+    from services.draw_store import draw_store
+    from services.hk6_analysis import HK6AnalysisService
+    from services.json_response import dumps
+    from services.kill_service import SSQKillService
+    from services.prediction_service import SSQPredictionService
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("services").setLevel(logging.ERROR)
+    init_db()
+    db = ReadSessionLocal()
+    try:
+        history = draw_store.get("ssq", db)
+        numpy_trend = {"periods": history.periods, **{
+            name: history.column(name) for name in ("red1", "red2", "red3", "red4", "red5", "red6", "blue")
+        }}
+        payloads = [
+            (f"ssq kill lookback={args.lookback}",
+             SSQKillService(db).get_kill_analysis(args.lookback, 5, 1, args.page_size), None),
+            (f"dlt kill lookback={args.lookback}",
+             DLTKillService(db).get_kill_analysis(args.lookback, 5, 1, args.page_size), None),
+            ("hk6 frequency", HK6AnalysisService(db).get_number_frequency(), None),
+            ("hk6 zodiac", HK6AnalysisService(db).get_zodiac_stats(), None),
+            ("ssq predict-all", SSQPredictionService(db).predict_all_methods(100), None),
+            # jsonable_encoder 不认识 NumPy 类型，默认路径需先转换
+            (f"ssq trend ({len(history)} 期 NumPy)", numpy_trend,
+             lambda v: {k: a.tolist() for k, a in v.items()}),
+        ]
+    finally:
+        db.close()
+
+    print(f"{'结果':<26} | {'大小':>9} | {'gzip':>8} | {'默认路径':>8} | {'orjson':>8} | {'加速':>6}")
+    for name, value, to_plain in payloads:
+        plain = to_plain or (lambda v: v)
+        std_time, std_body = timed(lambda v: stdlib_render(plain(v)), value, args.repeat)
+        fast_time, fast_body = timed(dumps, value, args.repeat)
+        assert json.loads(std_body) == json.loads(fast_body), f"{name}: 序列化结果不一致"
+        print(f"{name:<26} | {len(fast_body) / 1024:>7.1f}KB | {len(gzip.compress(fast_body)) / 1024:>6.1f}KB | "
+              f"{std_time * 1000:>6.2f}ms | {fast_time * 1000:>6.2f}ms | {std_time / fast_time:>5.1f}x")
+        if len(std_body) != len(fast_body):
+            print(f"{'':<26}   （默认路径 {len(std_body) / 1024:.1f}KB，差异来自浮点数的指数写法）")
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+双色球杀号回测基准测试：逐期列表判断 vs 位掩码矩阵
+用法: python benchmarks/bench_kill.py [--lookbacks 100 2000 10000] [--repeat 3]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.draw_store import draw_store, DrawHistory, SPECS
+from services.kill_engine import popcount, rows_mask
+from services.kill_service import (
+    SSQKillService, get_red_kill_numbers, get_blue_kill_numbers, red_kill_masks, blue_kill_masks,
+)
+
+
+def make_history(n: int, seed: int = 0) -> DrawHistory:
+    """生成 n 期模拟双色球数据"""
+    rng = np.random.default_rng(seed)
+    reds = np.sort(np.argsort(rng.random((n, 33)), axis=1)[:, :6] + 1, axis=1)
+    blues = rng.integers(1, 17, size=(n, 1))
+    periods = np.arange(n, dtype=np.int64) + 2003001
+    history = DrawHistory(
+        SPECS["ssq"], periods, periods.copy(),
+        np.full(n, "2003-01-01"), np.full(n, 1, dtype=np.int8),
+        np.hstack([reds, blues]).astype(np.int8),
+    )
+    history._cacheable = True
+    return history
+
+
+def legacy_backtest(results: list) -> tuple:
+    """原实现：逐期计算杀号列表并逐个判断"""
+    red_success = {m: 0 for m in range(1, 18)}
+    blue_success = {m: 0 for m in range(1, 7)}
+    red_kill_total = 0
+    for i in range(1, len(results)):
+        prev, curr = results[i - 1], results[i]
+        curr_reds = set(curr[:6])
+        for m, kills in get_red_kill_numbers(prev[:6], prev[6]).items():
+            red_kill_total += len(kills)
+            if kills and not any(k in curr_reds for k in kills):
+                red_success[m] += 1
+        blue_balls = [prev[6]] + ([results[i - 2][6]] if i >= 2 else [])
+        for m, kills in get_blue_kill_numbers(blue_balls).items():
+            if kills and curr[6] not in kills:
+                blue_success[m] += 1
+    return list(red_success.values()), list(blue_success.values()), red_kill_total
+
+
+def mask_backtest(numbers: np.ndarray) -> tuple:
+    """位掩码实现：所有期、所有方法一次计算"""
+    numbers = numbers.astype(np.int64)
+    reds, blues = numbers[:, :6], numbers[:, 6]
+    red_kills = red_kill_masks(reds[:-1], blues[:-1])
+    blue_kills = blue_kill_masks(blues[:-1], np.concatenate([[0], blues[:-2]]))
+    red_hits = (red_kills != 0) & ((red_kills & rows_mask(reds[1:], 33)[:, None]) == 0)
+    blue_hits = (blue_kills != 0) & ((blue_kills & rows_mask(blues[1:, None], 16)[:, None]) == 0)
+    return (
+        red_hits.sum(axis=0).tolist(),
+        blue_hits.sum(axis=0).tolist(),
+        int(popcount(red_kills).sum()),
+    )
+
+
+def timed(fn, repeat: int) -> float:
+    """返回单次调用的平均耗时 (ms)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookbacks", type=int, nargs="+", default=[100, 2000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    history = make_history(max(args.lookbacks) + 2)
+    # 直接放入内存存储，服务读取时不访问数据库
+    draw_store._histories["ssq"] = history
+    service = SSQKillService(None)
+
+    print(f"{'lookback':>8} | {'legacy 回测':>11} | {'掩码回测':>10} | {'接口总耗时':>10}")
+    for lookback in args.lookbacks:
+        window = history.tail(lookback + 2)
+        results = window.numbers.tolist()
+        assert legacy_backtest(results) == mask_backtest(window.numbers), f"lookback={lookback} 结果不一致"
+
+        legacy = timed(lambda: legacy_backtest(results), args.repeat)
+        masked = timed(lambda: mask_backtest(window.numbers), args.repeat)
+        endpoint = timed(lambda: service.get_kill_analysis(lookback=lookback), args.repeat)
+        print(f"{lookback:>8} | {legacy:>9.1f}ms | {masked:>8.1f}ms | {endpoint:>8.1f}ms")
+    draw_store.invalidate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+全方法预测基准测试：(方法 × 位置) 顺序拟合 vs 进程池并行拟合
+用法: python benchmarks/bench_prediction.py [--lookbacks 100 500 2000] [--workers 4]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import SessionLocal
+from services import prediction_runner
+from services.prediction_runner import PredictionRunner
+from services.prediction_service import SSQPredictionService, DLTPredictionService
+
+
+def strip_timing(results: list) -> list:
+    return [{k: v for k, v in r.items() if k != "timing"} for r in results]
+
+
+def timed(fn) -> tuple:
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookbacks", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    serial = PredictionRunner(workers=0)
+    pool = PredictionRunner(workers=args.workers)
+    db = SessionLocal()
+    try:
+        # 预热：启动工作进程并完成 sklearn/statsmodels 导入
+        prediction_runner._runner = pool
+        SSQPredictionService(db).predict_all_methods(lookback=30)
+
+        print(f"{'彩种':>4} | {'lookback':>8} | {'顺序':>10} | {f'{args.workers} 进程':>10} | 最慢方法")
+        for name, service_cls in (("ssq", SSQPredictionService), ("dlt", DLTPredictionService)):
+            service = service_cls(db)
+            for lookback in args.lookbacks:
+                prediction_runner._runner = serial
+                expected, serial_ms = timed(lambda: service.predict_all_methods(lookback=lookback))
+                prediction_runner._runner = pool
+                actual, pool_ms = timed(lambda: service.predict_all_methods(lookback=lookback))
+                assert strip_timing(expected) == strip_timing(actual), f"{name} lookback={lookback} 结果不一致"
+                slowest = max(actual, key=lambda r: r["timing"]["wall_ms"])
+                print(f"{name:>6} | {lookback:>8} | {serial_ms:>8.0f}ms | {pool_ms:>8.0f}ms | "
+                      f"{slowest['method']} {slowest['timing']['wall_ms']:.0f}ms")
+    finally:
+        db.close()
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
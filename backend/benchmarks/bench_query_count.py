@@ -0,0 +1,39 @@
+"""
+大乐透杀号分析 SQL 语句数统计：冷启动（首次载入内存数据）与热缓存
+用法: python benchmarks/bench_query_count.py [--lookbacks 50 300 2000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import SessionLocal, count_queries
+from services.draw_store import draw_store
+from services.dlt_kill_service import DLTKillService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookbacks", type=int, nargs="+", default=[50, 300, 2000])
+    args = parser.parse_args()
+
+    print(f"{'lookback':>8} | {'冷启动语句数':>10} | {'热缓存语句数':>10} | {'热缓存耗时':>10}")
+    db = SessionLocal()
+    try:
+        for lookback in args.lookbacks:
+            draw_store.invalidate()
+            with count_queries() as cold:
+                DLTKillService(db).get_kill_analysis(lookback=lookback)
+            start = time.perf_counter()
+            with count_queries() as warm:
+                DLTKillService(db).get_kill_analysis(lookback=lookback)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{lookback:>8} | {cold.count:>12} | {warm.count:>12} | {elapsed:>8.0f}ms")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
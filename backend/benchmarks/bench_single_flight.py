@@ -0,0 +1,105 @@
+"""
+相同请求合并基准：模拟新一期开奖后多个页面同时请求同一个昂贵的分析接口，
+在 lottery.db 的临时副本上经 ASGI 直接调用应用，对比关闭与开启 single-flight 时
+实际计算次数、总耗时与每个请求的延迟。杀号推荐组含随机抽样，未合并时各请求的响应体不同；
+开启合并后校验同一接口的所有请求拿到完全相同的响应体。
+用法: python benchmarks/bench_single_flight.py [--clients 20] [--lookback 2000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+async def burst(client, urls: list, clients: int) -> tuple:
+    """每个 URL 同时发出 clients 个请求，返回 (总耗时, 各请求延迟, 各 URL 的响应体集合)"""
+    latencies = []
+
+    async def one(url):
+        start = time.perf_counter()
+        # 带上不同的无关参数，验证规范化后仍合并为一次计算
+        response = await client.get(url, params={"_t": str(time.perf_counter_ns())})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, f"{url}: {response.status_code} {response.text[:200]}"
+        return url, response.content
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[one(url) for url in urls for _ in range(clients)])
+    elapsed = time.perf_counter() - start
+    bodies = {}
+    for url, body in results:
+        bodies.setdefault(url, set()).add(body)
+    return elapsed, latencies, bodies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=20, help="每个接口的并发请求数")
+    parser.add_argument("--lookback", type=int, default=2000, help="杀号回测的历史期数")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    target = Path(tmp.name) / "bench.db"
+    shutil.copyfile(Path(__file__).resolve().parent.parent / "lottery.db", target)
+    os.environ.update(DATABASE_URL=f"sqlite:///{target}", PRECOMPUTE_ENABLED="0", PREDICTION_WORKERS="0")
+
+    import httpx
+    from database import init_db
+    from main import app
+    from services.http_cache import response_cache
+    from services.prediction_cache import prediction_cache
+    from services.single_flight import single_flight
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("services").setLevel(logging.ERROR)
+    init_db()
+    urls = [
+        f"/api/analysis/ssq/kill?lookback={args.lookback}",
+        "/api/analysis/ssq/recommend?lookback=200",
+    ]
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+            # 预热：载入内存数据并触发各模块的首次导入，之后清空缓存
+            await client.get("/api/analysis/ssq/frequency")
+            print(f"每个接口 {args.clients} 个并发请求: {', '.join(urls)}")
+            print(f"{'single-flight':>13} | {'响应缓存':>6} | {'实际计算':>6} | {'被合并':>5} | {'不同响应体':>5} | "
+                  f"{'总耗时':>8} | {'p50':>8} | {'最大':>8}")
+            # 合并不依赖响应缓存：关闭缓存时同样只计算一次
+            for enabled, cache_enabled in ((False, True), (True, True), (True, False)):
+                response_cache.enabled = cache_enabled
+                response_cache.invalidate()
+                prediction_cache.invalidate()
+                single_flight.enabled = enabled
+                before = single_flight.stats()
+                elapsed, latencies, bodies = await burst(client, urls, args.clients)
+                after = single_flight.stats()
+                distinct = sum(len(v) for v in bodies.values())
+                if enabled:
+                    for url, variants in bodies.items():
+                        assert len(variants) == 1, f"{url} 返回了 {len(variants)} 种不同的响应体"
+                computed = after["flights"] - before["flights"] if enabled else len(latencies)
+                coalesced = after["coalesced"] - before["coalesced"]
+                print(f"{'开' if enabled else '关':>14} | {'开' if cache_enabled else '关':>8} | {computed:>10} | {coalesced:>8} | {distinct:>10} | "
+                      f"{elapsed * 1000:>6.0f}ms | {statistics.median(latencies) * 1000:>6.0f}ms | "
+                      f"{max(latencies) * 1000:>6.0f}ms")
+                if enabled:
+                    assert computed == len(urls), f"开启合并后应只计算 {len(urls)} 次，实际 {computed}"
+
+    try:
+        asyncio.run(run())
+    finally:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
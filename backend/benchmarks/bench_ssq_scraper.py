@@ -0,0 +1,65 @@
+"""
+双色球分页抓取基准测试：本地替身服务器（mock_sources.py）模拟官网接口（固定延迟 + 随机失败），
+对比逐页顺序抓取与并发抓取一次全量回填的耗时
+用法: python benchmarks/bench_ssq_scraper.py [--count 3000] [--latency 0.2] [--error-rate 0.05]
+"""
+import argparse
+import asyncio
+import logging
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mock_sources import MockSourceServer, synthetic_draws
+from sources.http_clients import SourceClient
+from sources.rate_limit import RateLimiter
+from sources.scraper.ssq_scraper import SSQScraper
+
+
+async def backfill(url: str, count: int, concurrency: int, rate: float) -> tuple:
+    client = SourceClient("bench", {
+        "url": url, "max_concurrency": concurrency, "max_retries": 5, "retry_backoff": 0.05,
+    })
+    client.rate_limiter = RateLimiter(rate)
+    scraper = SSQScraper(client)
+    start = time.perf_counter()
+    results = await scraper.fetch_by_count(count)
+    elapsed = (time.perf_counter() - start) * 1000
+    await client.aclose()
+    return results, elapsed, scraper.failed_pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.2, help="每个请求的模拟延迟（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="请求随机返回 503 的比例")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--rate", type=float, default=0, help="每秒请求数上限，0 为不限速")
+    args = parser.parse_args()
+    # 重试日志不影响结果，只看最终失败页
+    logging.getLogger("sources").setLevel(logging.ERROR)
+
+    draws = synthetic_draws("ssq", args.count)
+    server = MockSourceServer({"ssq": draws}, latency=args.latency, error_rate=args.error_rate).start()
+    url = server.url("ssq")
+    expected = [int(d["code"]) for d in draws]
+    print(f"{args.count} 期 / {math.ceil(args.count / 30)} 页, 延迟 {args.latency}s, 失败率 {args.error_rate:.0%}")
+    print(f"{'并发数':>6} | {'耗时':>10} | {'加速比':>6} | 失败页")
+    baseline = None
+    try:
+        for concurrency in args.concurrency:
+            results, elapsed, failed = asyncio.run(backfill(url, args.count, concurrency, args.rate))
+            if not failed:
+                assert [r["period"] for r in results] == expected, "结果顺序或内容与桩数据不一致"
+            baseline = baseline or elapsed
+            print(f"{concurrency:>8} | {elapsed:>8.0f}ms | {baseline / elapsed:>5.1f}x | {failed or '-'}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
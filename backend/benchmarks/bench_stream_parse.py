@@ -0,0 +1,139 @@
+"""
+流式解析基准测试：本地桩服务器模拟 HKJC GraphQL 接口返回 lastNDraw 期数据，
+对比整体 response.json() 解析后写库与边接收边解析、分批写库（stream_draws + bulk_upsert_stream）
+的 Python 堆内存峰值与耗时
+用法: python benchmarks/bench_stream_parse.py [--counts 5000 20000 50000]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models.hk6 import HK6Result
+from services.bulk_upsert import bulk_upsert, bulk_upsert_stream
+from sources.http_clients import SourceClient
+from sources.scraper.hk6_scraper import HK6Scraper
+
+
+def make_draws(n: int, seed: int = 0) -> list:
+    """生成 n 期模拟开奖数据（新到旧，字段与 HKJC 接口一致）"""
+    rng = random.Random(seed)
+    draws = []
+    for i in range(n):
+        year, no = 1976 + i // 150, i % 150 + 1
+        balls = rng.sample(range(1, 50), 7)
+        draws.append({
+            "id": f"{year}{no}N", "year": str(year), "no": no,
+            "openDate": f"{year}-01-01+08:00", "closeDate": f"{year}-01-01+08:00",
+            "drawDate": f"{year}-01-01+08:00", "status": "Result",
+            "snowballCode": "", "snowballName_en": "", "snowballName_ch": "",
+            "lotteryPool": {"sell": False, "status": "Closed", "totalInvestment": "0", "jackpot": "0",
+                            "unitBet": 10, "estimatedPrize": "0", "derivedFirstPrizeDiv": "0",
+                            "lotteryPrizes": [{"type": k, "winningUnit": 0, "dividend": "0"} for k in range(1, 8)]},
+            "drawResult": {"drawnNo": sorted(balls[:6]), "xDrawnNo": balls[6]},
+        })
+    return draws[::-1]
+
+
+def start_stub_server(draws: list, counts: list) -> ThreadingHTTPServer:
+    # 响应体预先序列化，避免桩服务器的分配计入测量
+    bodies = {n: json.dumps({"data": {"lotteryDraws": draws[:n]}}).encode() for n in counts}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            out = bodies[body["variables"]["lastNDraw"]]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            # 分块写出，模拟网络逐段到达
+            view = memoryview(out)
+            for i in range(0, len(out), 65536):
+                self.wfile.write(view[i:i + 65536])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def load_whole(scraper: HK6Scraper, db, count: int) -> int:
+    """整体解析：response.json() 后构建完整列表再写库"""
+    response = await scraper.client.request("POST", json={
+        "operationName": "marksixResult",
+        "variables": {"lastNDraw": count, "drawType": "All", "startDate": None, "endDate": None},
+        "query": "",
+    })
+    rows = [scraper._parse_item(d) for d in response.json()["data"]["lotteryDraws"]]
+    return bulk_upsert(db, HK6Result, [r for r in rows if r])["total"]
+
+
+async def load_streaming(scraper: HK6Scraper, db, count: int) -> int:
+    """流式解析：边接收边解析，每 500 条写一批"""
+    return (await bulk_upsert_stream(db, HK6Result, scraper.stream_draws(count)))["total"]
+
+
+def measure(loader, url: str, count: int) -> tuple:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(engine, tables=[HK6Result.__table__])
+        db = sessionmaker(bind=engine)()
+
+        async def run():
+            client = SourceClient("bench", {"url": url, "timeout": 60.0})
+            try:
+                return await loader(HK6Scraper(client), db, count)
+            finally:
+                await client.aclose()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        total = asyncio.run(run())
+        elapsed = (time.perf_counter() - start) * 1000
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        db.close()
+        engine.dispose()
+    return total, elapsed, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+", default=[5000, 20000, 50000])
+    args = parser.parse_args()
+    logging.getLogger("sources").setLevel(logging.ERROR)
+
+    server = start_stub_server(make_draws(max(args.counts)), args.counts)
+    url = f"http://127.0.0.1:{server.server_address[1]}/graphql/base/"
+    print(f"{'期数':>8} | {'方式':>6} | {'耗时':>9} | 内存峰值")
+    try:
+        for count in args.counts:
+            for name, loader in (("整体", load_whole), ("流式", load_streaming)):
+                total, elapsed, peak = measure(loader, url, count)
+                assert total == count, f"{name}写入 {total} 期，应为 {count}"
+                print(f"{count:>10} | {name:>6} | {elapsed:>7.0f}ms | {peak:>7.1f} MiB")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+数据源同步/回填吞吐基准：启动本地替身服务器（mock_sources.py，可配置延迟、失败率、分页大小），
+通过 SSQ_URL / DLT_URL / HK6_URL 环境变量替换真实数据源，在临时数据库上依次测量
+全量回填（BackfillManager）、流式全量刷新（refresh_all）与增量同步（sync_latest）的耗时与吞吐
+用法: python benchmarks/bench_sync_backfill.py [--count 3000] [--latency 0.05] [--error-rate 0.02]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mock_sources import MockSourceServer, synthetic_draws
+
+LOTTERIES = ["ssq", "dlt", "hk6"]
+
+
+def configure_env(server: MockSourceServer, args) -> None:
+    """数据源地址指向替身服务器；须在导入 config 之前设置"""
+    os.environ.update(server.env())
+    for name in LOTTERIES:
+        prefix = name.upper()
+        os.environ[f"{prefix}_RATE_LIMIT"] = str(args.rate)
+        os.environ[f"{prefix}_MAX_CONCURRENCY"] = str(args.concurrency)
+        os.environ[f"{prefix}_MAX_RETRIES"] = "5"
+        os.environ[f"{prefix}_RETRY_BACKOFF"] = "0.05"
+    os.environ["PRECOMPUTE_ENABLED"] = "0"
+
+
+async def run_backfill(manager, db, lottery: str):
+    job = await manager.create(db, lottery)
+    while manager.is_running(job.id):
+        await asyncio.sleep(0.01)
+    db.expire_all()
+    return job
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=3000, help="每种彩票的模拟期数")
+    parser.add_argument("--latency", type=float, default=0.05, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.02, help="随机附加延迟上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="请求随机返回 503 的比例")
+    parser.add_argument("--page-size", type=int, default=None, help="服务端分页大小上限")
+    parser.add_argument("--concurrency", type=int, default=4, help="每个数据源的最大并发请求数")
+    parser.add_argument("--rate", type=float, default=0, help="每秒请求数上限，0 为不限速")
+    parser.add_argument("--missing", type=int, default=5, help="增量同步前删除的最新期数")
+    parser.add_argument("--lotteries", nargs="+", default=LOTTERIES, choices=LOTTERIES)
+    args = parser.parse_args()
+
+    server = MockSourceServer(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, page_size=args.page_size,
+    ).start()
+    configure_env(server, args)
+    tmp = tempfile.TemporaryDirectory()
+
+    import config
+    config.DATABASE_URL = f"sqlite:///{tmp.name}/bench.db"
+    from database import SessionLocal, init_db
+    from services.backfill import BackfillManager
+    from services.draw_store import draw_store, SPECS
+    from services.dlt_service import DLTService
+    from services.hk6_service import HK6Service
+    from services.ssq_service import SSQService
+    from services.sync_planner import latest_head
+    from sources.http_clients import http_clients
+
+    logging.getLogger("sources").setLevel(logging.CRITICAL)
+    logging.getLogger("services").setLevel(logging.ERROR)
+    init_db()
+    service_classes = {"ssq": SSQService, "dlt": DLTService, "hk6": HK6Service}
+    for name in args.lotteries:
+        server.draws[name] = synthetic_draws(name, args.count)
+
+    print(f"每种 {args.count} 期, 延迟 {args.latency}s(+{args.jitter}s), 失败率 {args.error_rate:.0%}, "
+          f"并发 {args.concurrency}, 服务端分页上限 {args.page_size or '-'}")
+    print(f"{'彩种':>4} | {'阶段':>8} | {'期数':>6} | {'耗时':>8} | {'期/秒':>7} | {'请求':>5} | 503")
+
+    def report(lottery: str, phase: str, rows: int, elapsed: float) -> None:
+        stats = server.stats()[lottery]
+        server.reset_stats()
+        print(f"{lottery:>6} | {phase:>10} | {rows:>8} | {elapsed * 1000:>6.0f}ms | "
+              f"{rows / elapsed if elapsed else 0:>9.0f} | {stats['requests']:>7} | {stats['errors']}")
+
+    async def run():
+        manager = BackfillManager(max_attempts=3, retry_base_seconds=0.1)
+        db = SessionLocal()
+        try:
+            for lottery in args.lotteries:
+                model = SPECS[lottery].model
+                expected = len(server.draws[lottery])
+                server.reset_stats()
+
+                start = time.perf_counter()
+                job = await run_backfill(manager, db, lottery)
+                report(lottery, "backfill", job.rows, time.perf_counter() - start)
+                assert job.status == "completed" and job.rows == expected, f"{lottery} 回填: {job.to_dict()}"
+
+                db.query(model).delete()
+                db.commit()
+                draw_store.invalidate(lottery)
+                service = service_classes[lottery](db)
+                start = time.perf_counter()
+                result = await service.refresh_all(expected)
+                report(lottery, "refresh", result["refreshed"], time.perf_counter() - start)
+                assert result["refreshed"] == expected, f"{lottery} 全量刷新: {result}"
+
+                # 删除最新 missing 期后增量同步
+                for _ in range(args.missing):
+                    head = latest_head(db, lottery)
+                    db.query(model).filter(model.period == head["period"]).delete()
+                db.commit()
+                draw_store.invalidate(lottery)
+                start = time.perf_counter()
+                result = await service.sync_latest()
+                report(lottery, "sync", result["synced"], time.perf_counter() - start)
+                assert result["synced"] == args.missing, f"{lottery} 增量同步: {result}"
+        finally:
+            db.close()
+            await http_clients.aclose()
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.stop()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+分析任务接口检查：在 lottery.db 的临时副本上经 ASGI 直接调用应用，
+对比同步调用 kill?lookback=2000 占用连接的时间与提交任务的响应时间，并校验
+  - 相同输入重复提交返回同一任务，非法参数返回 422
+  - SSE 依次推送 running / done 后结束
+  - 任务结果与同步接口的响应体一致，此后同步接口 303 重定向到任务结果
+用法: python benchmarks/check_analysis_jobs.py [--lookback 2000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookback", type=int, default=2000, help="杀号回测的历史期数")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    target = Path(tmp.name) / "bench.db"
+    shutil.copyfile(Path(__file__).resolve().parent.parent / "lottery.db", target)
+    os.environ.update(DATABASE_URL=f"sqlite:///{target}", PRECOMPUTE_ENABLED="0", PREDICTION_WORKERS="0")
+
+    import httpx
+    from database import init_db
+    from main import app
+    from services.analysis_jobs import analysis_jobs
+    from services.compute_pool import compute_pool
+    from services.http_cache import response_cache
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("services").setLevel(logging.ERROR)
+    init_db()
+    # 每次同步请求都真正计算
+    response_cache.enabled = False
+    url = "/api/analysis/dlt/kill"
+    params = {"lookback": args.lookback}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://check", timeout=600) as client:
+            await asyncio.to_thread(compute_pool.start)
+            await client.get("/api/analysis/dlt/frequency")
+
+            start = time.perf_counter()
+            sync = await client.get(url, params=params)
+            sync_ms = (time.perf_counter() - start) * 1000
+            assert sync.status_code == 200, sync.text[:200]
+
+            start = time.perf_counter()
+            submitted = await client.post("/api/analysis/jobs", json={"endpoint": "dlt/kill", "params": params})
+            submit_ms = (time.perf_counter() - start) * 1000
+            assert submitted.status_code == 202, submitted.text[:200]
+            job_id = submitted.json()["id"]
+            print(f"同步请求占用连接 {sync_ms:.0f}ms，提交任务 {submit_ms:.1f}ms 返回 {job_id}")
+
+            again = await client.post("/api/analysis/jobs", json={"endpoint": "dlt/kill", "params": {
+                **params, "page": 1,
+            }})
+            assert again.status_code == 200 and again.json()["id"] == job_id, again.text[:200]
+            invalid = await client.post("/api/analysis/jobs", json={"endpoint": "dlt/kill", "params": {"lookback": 1}})
+            assert invalid.status_code == 422, invalid.status_code
+
+            events = await client.get(f"/api/analysis/jobs/{job_id}/events")
+            names = [line.split(":", 1)[1].strip() for line in events.text.splitlines() if line.startswith("event:")]
+            print(f"SSE 事件: {names}")
+            assert names[-1] == "done" and "running" in names, names
+
+            result = await client.get(f"/api/analysis/jobs/{job_id}/result")
+            assert result.status_code == 200
+            # 杀号推荐组含随机抽样，只比较确定性部分
+            body, expected = result.json(), sync.json()
+            assert {k: v for k, v in body.items() if k != "recommended_sets"} == \
+                {k: v for k, v in expected.items() if k != "recommended_sets"}
+
+            redirected = await client.get(url, params=params)
+            assert redirected.status_code == 303, redirected.status_code
+            assert redirected.headers["location"] == f"/api/analysis/jobs/{job_id}/result"
+            followed = await client.get(redirected.headers["location"])
+            assert followed.content == result.content
+            print(f"同步接口已重定向到任务结果；{analysis_jobs.stats()}")
+        compute_pool.shutdown()
+
+    try:
+        asyncio.run(run())
+    finally:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
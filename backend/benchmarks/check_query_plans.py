@@ -0,0 +1,176 @@
+"""
+热点查询的执行计划回归检查：在 lottery.db 的临时副本上执行迁移（init_db），
+捕获列表/计数/最新一期/增量载入/批量写入查重等查询实际发出的 SQL，
+逐条 EXPLAIN QUERY PLAN，检查是否使用预期的索引、没有全表扫描、排序没有落到临时 B 树。
+任一查询不符合时以退出码 1 结束。
+用法: python benchmarks/check_query_plans.py [--db lottery.db] [-v]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class Case:
+    """一条热点查询：run(db) 发出查询，index 为执行计划中必须出现的索引名"""
+
+    def __init__(self, name: str, run, index: str, allow_scan: bool = False):
+        self.name = name
+        self.run = run
+        self.index = index
+        self.allow_scan = allow_scan  # 必须读完整表的查询（无条件计数）允许全表扫描
+
+
+def build_cases():
+    from services.bulk_upsert import bulk_upsert
+    from services.dlt_service import DLTService
+    from services.draw_store import SPECS, DrawHistory
+    from services.hk6_service import HK6Service
+    from services.ssq_service import SSQService
+    from services.sync_planner import latest_head
+    from sqlalchemy import select
+
+    def store_load(lottery):
+        spec = SPECS[lottery]
+        return lambda db: db.execute(select(*spec.select_columns()).order_by(*spec.order_by())).all()
+
+    def store_after(lottery):
+        spec = SPECS[lottery]
+
+        def run(db):
+            head = DrawHistory.from_rows(spec, db.execute(
+                select(*spec.select_columns()).order_by(spec.model.draw_key.desc()).limit(1)
+            ).all())
+            return db.execute(
+                select(*spec.select_columns()).where(spec.after(head)).order_by(*spec.order_by())
+            ).all()
+        return run
+
+    def upsert_lookup(db):
+        from models.ssq import SSQResult
+        row = SSQService(db).get_latest().to_dict()
+        flat = {"period": row["period"], "date": row["date"], "weekday": row["weekday"], "blue": row["blue"]}
+        flat.update({f"red{i + 1}": v for i, v in enumerate(row["red"])})
+        bulk_upsert(db, SSQResult, [flat])
+
+    return [
+        Case("ssq 列表", lambda db: SSQService(db).get_all(limit=100), "ix_ssq_results_draw_key"),
+        Case("ssq 列表 期号范围",
+             lambda db: SSQService(db).get_all(start_period=2024001, end_period=2024150), "ix_ssq_results_draw_key"),
+        Case("ssq 列表 日期范围",
+             lambda db: SSQService(db).get_all(start_date="2025-01-01", end_date="2025-03-01", limit=50),
+             "ix_ssq_results_draw_date_key"),
+        Case("ssq 列表 星期", lambda db: SSQService(db).get_all(weekday="二"), "ix_ssq_results_weekday_key"),
+        Case("ssq 计数", lambda db: SSQService(db).get_count(), "", allow_scan=True),
+        Case("ssq 计数 日期范围",
+             lambda db: SSQService(db).get_count(start_date="2025-01-01", end_date="2025-03-01"),
+             "ix_ssq_results_draw_date_key"),
+        Case("ssq 计数 星期", lambda db: SSQService(db).get_count(weekday="二"), "ix_ssq_results_weekday_key"),
+        Case("ssq 最新一期", lambda db: SSQService(db).get_latest(), "ix_ssq_results_draw_key"),
+        Case("dlt 列表 期号范围",
+             lambda db: DLTService(db).get_all(start_period="24001", end_period="24150"), "ix_dlt_results_draw_key"),
+        Case("dlt 最新一期", lambda db: DLTService(db).get_latest(), "ix_dlt_results_draw_key"),
+        Case("hk6 列表 年份", lambda db: HK6Service(db).get_all(start_period="2025", limit=10),
+             "ix_hk6_results_draw_key"),
+        Case("hk6 最新一期", lambda db: HK6Service(db).get_latest(), "ix_hk6_results_draw_key"),
+        Case("ssq 同步起点", lambda db: latest_head(db, "ssq"), "ix_ssq_results_draw_key"),
+        Case("dlt 同步起点", lambda db: latest_head(db, "dlt"), "ix_dlt_results_draw_key"),
+        Case("hk6 同步起点", lambda db: latest_head(db, "hk6"), "ix_hk6_results_draw_key"),
+        Case("ssq 全量载入", store_load("ssq"), "ix_ssq_results_draw_key"),
+        Case("hk6 全量载入", store_load("hk6"), "ix_hk6_results_draw_key"),
+        Case("ssq 增量载入", store_after("ssq"), "ix_ssq_results_draw_key"),
+        Case("dlt 增量载入", store_after("dlt"), "ix_dlt_results_draw_key"),
+        Case("hk6 增量载入", store_after("hk6"), "ix_hk6_results_draw_key"),
+        Case("ssq 写入查重", upsert_lookup, "ix_ssq_results_period"),
+    ]
+
+
+def check_plan(case: Case, plans) -> list:
+    """返回问题列表；plans 为该查询每条 SELECT 语句的计划明细"""
+    problems = []
+    details = [d for plan in plans for d in plan]
+    if case.index and not any(case.index in d for d in details):
+        problems.append(f"未使用 {case.index}")
+    for d in details:
+        if "TEMP B-TREE" in d:
+            problems.append(f"临时排序: {d}")
+        # 沿索引顺序读取（配合 LIMIT）是预期的；不带索引的 SCAN 即全表扫描
+        if d.startswith("SCAN") and not case.allow_scan and "INDEX" not in d:
+            problems.append(f"全表扫描: {d}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", default=str(Path(__file__).resolve().parent.parent / "lottery.db"),
+                        help="作为样本的数据库（只读，检查在临时副本上进行）")
+    parser.add_argument("-v", "--verbose", action="store_true", help="打印每条查询的 SQL 与执行计划")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    target = Path(tmp.name) / "plans.db"
+    shutil.copyfile(args.db, target)
+    os.environ["DATABASE_URL"] = f"sqlite:///{target}"
+    os.environ["PRECOMPUTE_ENABLED"] = "0"
+
+    from sqlalchemy import event, text
+    from database import SessionLocal, engine, init_db
+    from services.draw_store import SPECS
+
+    init_db()
+    with engine.connect() as conn:
+        for spec in SPECS.values():
+            missing = conn.execute(
+                text(f"SELECT count(*) FROM {spec.model.__tablename__} WHERE draw_key IS NULL")
+            ).scalar()
+            assert missing == 0, f"{spec.name} 迁移后仍有 {missing} 行未回填"
+
+    captured = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    cases = build_cases()
+    failed = 0
+    db = SessionLocal()
+    try:
+        for case in cases:
+            captured.clear()
+            case.run(db)
+            statements = list(captured)
+            plans = []
+            raw = engine.raw_connection()
+            try:
+                cursor = raw.cursor()
+                for statement, parameters in statements:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                    plans.append([row[3] for row in cursor.fetchall()])
+            finally:
+                raw.close()
+            problems = check_plan(case, plans) if statements else ["未捕获到查询"]
+            failed += bool(problems)
+            print(f"{'FAIL' if problems else 'ok':>4}  {case.name}")
+            for p in problems:
+                print(f"      {p}")
+            if args.verbose or problems:
+                for (statement, _), plan in zip(statements, plans):
+                    print("      " + " ".join(statement.split())[:160])
+                    for d in plan:
+                        print(f"        -> {d}")
+    finally:
+        db.close()
+        engine.dispose()
+        tmp.cleanup()
+
+    print(f"{len(cases) - failed} 通过, {failed} 失败")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,12 +7,38 @@ from pathlib import Path
 # 项目根目录
 PROJECT_ROOT = Path(__file__).parent.resolve()
 
-# 数据库配置
-DATABASE_URL = f"sqlite:///{PROJECT_ROOT}/lottery.db"
+
+def _env_mapping(name: str, default: str, cast=float) -> dict:
+    """解析 "kill=120,recommend=90" 形式的环境变量"""
+    return {
+        key.strip(): cast(value)
+        for key, value in (item.split("=", 1) for item in os.getenv(name, default).split(",") if "=" in item)
+    }
+
+
+# 数据库配置（DATABASE_URL 环境变量可指向其他数据库文件或数据库）
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{PROJECT_ROOT}/lottery.db")
+# SQLite 连接参数（每个新连接建立时设置）
+# 日志模式：WAL 下读不阻塞写、写不阻塞读
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+# WAL 模式下 NORMAL 仍可保证数据库一致，只在断电时可能丢失最后提交的事务
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+# 内存映射 I/O 大小（字节）与每个连接的页缓存大小（KiB）
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+# 遇到锁时的等待时间（毫秒），超时后才报 database is locked
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# 是否在响应头 X-Query-Count 中返回每个请求执行的 SQL 语句数（调试用，默认关闭）
+QUERY_COUNT_HEADER = os.getenv("QUERY_COUNT_HEADER", "0") == "1"
+# 连接池：写连接数较少（SQLite 同一时刻只有一个写事务），只读连接按并发请求数配置
+DB_WRITE_POOL_SIZE = int(os.getenv("DB_WRITE_POOL_SIZE", "4"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "16"))
 
 # 双色球 (SSQ) API 配置 - 中国福利彩票
 SSQ_CONFIG = {
-    "url": "https://www.cwl.gov.cn/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice",
+    # 接口地址可用环境变量替换（如指向 mock_sources.py 启动的本地替身服务器）
+    "url": os.getenv("SSQ_URL", "https://www.cwl.gov.cn/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice"),
     "headers": {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36",
         "Cookie": os.getenv("SSQ_COOKIE", ""),
@@ -22,12 +48,20 @@ SSQ_CONFIG = {
         "pageNo": "1",
         "pageSize": "30",
         "systemType": "PC",
-    }
+    },
+    # 请求超时（秒）；忽略 SSL 验证问题
+    "timeout": float(os.getenv("SSQ_TIMEOUT", "30")),
+    "verify": False,
+    # 分页并发抓取：最大并发页数（同时也是连接数上限）、每秒请求数上限（按主机）、单页重试次数与退避基数（秒）
+    "max_concurrency": int(os.getenv("SSQ_MAX_CONCURRENCY", "4")),
+    "rate_limit": float(os.getenv("SSQ_RATE_LIMIT", "5")),
+    "max_retries": int(os.getenv("SSQ_MAX_RETRIES", "3")),
+    "retry_backoff": float(os.getenv("SSQ_RETRY_BACKOFF", "0.5")),
 }
 
 # 大乐透 (DLT) API 配置 - 体育彩票
 DLT_CONFIG = {
-    "url": "https://webapi.sporttery.cn/gateway/lottery/getHistoryPageListV1.qry",
+    "url": os.getenv("DLT_URL", "https://webapi.sporttery.cn/gateway/lottery/getHistoryPageListV1.qry"),
     "headers": {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36",
     },
@@ -37,9 +71,112 @@ DLT_CONFIG = {
         "pageNo": "1",
         "pageSize": "30",
         "isVerify": "1",
-    }
+    },
+    # 请求超时（秒）
+    "timeout": float(os.getenv("DLT_TIMEOUT", "15")),
+    # 长连接池：最大并发请求（同时也是连接数上限）、空闲连接保持时间（秒）、是否使用 HTTP/2（h2 随 httpx[http2] 安装）
+    "max_concurrency": int(os.getenv("DLT_MAX_CONCURRENCY", "4")),
+    "keepalive_expiry": float(os.getenv("DLT_KEEPALIVE_EXPIRY", "30")),
+    "http2": os.getenv("DLT_HTTP2", "1") == "1",
+    # 每秒请求数上限（按主机）、单页重试次数与退避基数（秒）
+    "rate_limit": float(os.getenv("DLT_RATE_LIMIT", "5")),
+    "max_retries": int(os.getenv("DLT_MAX_RETRIES", "3")),
+    "retry_backoff": float(os.getenv("DLT_RETRY_BACKOFF", "0.5")),
+}
+
+# 香港六合彩 (HK6) API 配置 - HKJC GraphQL
+HK6_CONFIG = {
+    "url": os.getenv("HK6_URL", "https://info.cld.hkjc.com/graphql/base/"),
+    "timeout": float(os.getenv("HK6_TIMEOUT", "30")),
+    "max_concurrency": int(os.getenv("HK6_MAX_CONCURRENCY", "2")),
+    "rate_limit": float(os.getenv("HK6_RATE_LIMIT", "2")),
+    "max_retries": int(os.getenv("HK6_MAX_RETRIES", "3")),
+    "retry_backoff": float(os.getenv("HK6_RETRY_BACKOFF", "0.5")),
 }
 
+# 预测任务进程池配置
+# 工作进程数，0 表示在当前进程内顺序执行
+PREDICTION_WORKERS = int(os.getenv("PREDICTION_WORKERS", min(4, os.cpu_count() or 1)))
+# 单个 (方法 × 位置) 拟合任务的超时时间（秒），超时后使用移动平均回退
+PREDICTION_TASK_TIMEOUT = float(os.getenv("PREDICTION_TASK_TIMEOUT", "10"))
+# 进程启动方式：spawn 不继承父进程的线程与连接，更安全
+PREDICTION_START_METHOD = os.getenv("PREDICTION_START_METHOD", "spawn")
+
+# 预测结果缓存配置
+# 内存 LRU 最多保存的 (彩种, 最新期号, 方法, 参数, lookback) 结果数
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "512"))
+# 磁盘缓存目录，为空时不启用磁盘层
+PREDICTION_CACHE_DIR = os.getenv("PREDICTION_CACHE_DIR", "")
+
+# 开奖后预计算调度配置
+# 是否在应用启动时启动调度器（测试/脚本环境可设为 0）
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "1") == "1"
+# 开奖后等待多久再同步（官方结果发布有延迟）
+PRECOMPUTE_DELAY_MINUTES = float(os.getenv("PRECOMPUTE_DELAY_MINUTES", "30"))
+# 随机抖动上限，避免多个实例同时请求数据源
+PRECOMPUTE_JITTER_SECONDS = float(os.getenv("PRECOMPUTE_JITTER_SECONDS", "120"))
+# 同步失败或尚无新一期时的重试次数与退避基数
+PRECOMPUTE_MAX_RETRIES = int(os.getenv("PRECOMPUTE_MAX_RETRIES", "6"))
+PRECOMPUTE_RETRY_BASE_SECONDS = float(os.getenv("PRECOMPUTE_RETRY_BASE_SECONDS", "60"))
+
+# 增量同步规划配置
+# 库中无数据时首次同步获取的期数
+SYNC_BOOTSTRAP_COUNT = int(os.getenv("SYNC_BOOTSTRAP_COUNT", "100"))
+# 按开奖日历推算的期号上界再多取的期数（范围多取无害，结果按最新期号过滤）
+SYNC_PERIOD_SLACK = int(os.getenv("SYNC_PERIOD_SLACK", "2"))
+
+# 历史回填任务配置
+# 每次提交（并写入检查点）的页数
+BACKFILL_CHUNK_PAGES = int(os.getenv("BACKFILL_CHUNK_PAGES", "10"))
+# 单个任务失败后从检查点自动重试的次数与退避基数（秒）
+BACKFILL_MAX_ATTEMPTS = int(os.getenv("BACKFILL_MAX_ATTEMPTS", "5"))
+BACKFILL_RETRY_BASE_SECONDS = float(os.getenv("BACKFILL_RETRY_BASE_SECONDS", "30"))
+# 应用启动时是否自动续传未完成的任务
+BACKFILL_RESUME_ON_START = os.getenv("BACKFILL_RESUME_ON_START", "1") == "1"
+
+# HTTP 响应缓存配置（ETag / Last-Modified）
+# 是否对开奖数据与分析 GET 接口启用条件请求与响应缓存
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "1") == "1"
+# 内存中最多保存的响应数
+HTTP_CACHE_SIZE = int(os.getenv("HTTP_CACHE_SIZE", "256"))
+# 超过此大小（字节）的响应只发 ETag，不保存响应体
+HTTP_CACHE_MAX_BODY = int(os.getenv("HTTP_CACHE_MAX_BODY", str(2 * 1024 * 1024)))
+# 数据版本（最新期号等）的最长复用时间（秒）；多进程部署时其他进程写入的数据最迟在此时间后生效
+HTTP_CACHE_VERSION_TTL = float(os.getenv("HTTP_CACHE_VERSION_TTL", "60"))
+
+# 相同请求合并（single-flight）配置
+# 并发的相同请求（接口 + 参数 + 数据版本一致）是否只计算一次
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "1") == "1"
+# 等待同一计算结果的默认超时（秒），超时的请求返回 504，计算继续进行
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "30"))
+# 按接口（路径最后一段）覆盖超时，格式 "kill=120,recommend=90"
+SINGLE_FLIGHT_TIMEOUTS = _env_mapping("SINGLE_FLIGHT_TIMEOUTS", "kill=120,recommend=90,predict-all=90")
+
+# CPU 密集型分析接口的进程池配置（杀号回测等；预测接口只经此排队与限流，拟合由上面的预测进程池执行）
+# 工作进程数，0 表示在线程池中执行（仍受下面的并发与排队限制）
+COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", min(4, os.cpu_count() or 1)))
+# 工作进程全部占用后最多排队的请求数，超出时返回 429
+COMPUTE_QUEUE_SIZE = int(os.getenv("COMPUTE_QUEUE_SIZE", "16"))
+# 每个接口（路径最后一段）同时执行的上限，格式 "kill=2,predict-all=1"；未列出的接口使用默认值
+COMPUTE_DEFAULT_LIMIT = int(os.getenv("COMPUTE_DEFAULT_LIMIT", "2"))
+COMPUTE_LIMITS = _env_mapping("COMPUTE_LIMITS", "kill=2,predict-all=1,recommend=2,precompute=1", int)
+# 429 响应建议的重试间隔（秒）
+COMPUTE_RETRY_AFTER = int(os.getenv("COMPUTE_RETRY_AFTER", "5"))
+# 进程启动方式
+COMPUTE_START_METHOD = os.getenv("COMPUTE_START_METHOD", "spawn")
+
+# 分析任务（异步作业）配置
+# 完成的任务结果保留时间（秒）
+ANALYSIS_JOB_TTL = float(os.getenv("ANALYSIS_JOB_TTL", "3600"))
+# 内存中最多保留的任务数，超出时先清除最早完成的任务
+ANALYSIS_JOB_MAX = int(os.getenv("ANALYSIS_JOB_MAX", "200"))
+# 分析进程池繁忙（429）时任务的最多尝试次数，每次间隔 COMPUTE_RETRY_AFTER 秒
+ANALYSIS_JOB_MAX_ATTEMPTS = int(os.getenv("ANALYSIS_JOB_MAX_ATTEMPTS", "20"))
+# SSE 在状态无变化时推送进度（兼作保活）的间隔（秒）
+ANALYSIS_JOB_SSE_INTERVAL = float(os.getenv("ANALYSIS_JOB_SSE_INTERVAL", "5"))
+# 同步接口的输入已有完成的任务时，是否 303 重定向到该任务的结果
+ANALYSIS_JOB_REDIRECT = os.getenv("ANALYSIS_JOB_REDIRECT", "1") == "1"
+
 # CORS 配置
 CORS_ORIGINS = [
     "http://localhost:3000",
@@ -1,19 +1,110 @@
 """
 SQLite 数据库配置
+make_engine 为每个新连接设置 PRAGMA（WAL、synchronous、mmap、页缓存、busy_timeout），
+并提供写引擎 engine / SessionLocal 与只读引擎 read_engine / ReadSessionLocal：
+只读连接设置 query_only，供 GET 接口与预计算等只读路径使用，WAL 下不会被写事务阻塞。
 """
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from config import (
+    DATABASE_URL,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_BUSY_TIMEOUT_MS,
+    DB_WRITE_POOL_SIZE,
+    DB_READ_POOL_SIZE,
+    DB_POOL_MAX_OVERFLOW,
+)
+
+
+def sqlite_pragmas(readonly: bool = False) -> Dict[str, Any]:
+    """按配置生成的连接级 PRAGMA（journal_mode 持久保存在库文件中，只由写连接设置）"""
+    pragmas = {
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        "synchronous": SQLITE_SYNCHRONOUS,
+        "mmap_size": SQLITE_MMAP_SIZE,
+        "cache_size": -SQLITE_CACHE_SIZE_KB,  # 负数表示以 KiB 为单位
+        "temp_store": "MEMORY",
+    }
+    if readonly:
+        pragmas["query_only"] = "ON"
+    else:
+        pragmas = {"journal_mode": SQLITE_JOURNAL_MODE, **pragmas}
+    return pragmas
+
+
+def make_engine(
+    url: str = DATABASE_URL,
+    readonly: bool = False,
+    pool_size: Optional[int] = None,
+    max_overflow: int = DB_POOL_MAX_OVERFLOW,
+    pragmas: Optional[Dict[str, Any]] = None,
+) -> Engine:
+    """创建数据库引擎
+
+    SQLite 文件库使用 QueuePool：连接在线程间复用，PRAGMA 只在建立连接时执行一次；
+    内存库只能共享同一个连接，使用 StaticPool。非 SQLite 数据库按 SQLAlchemy 默认处理。
+
+    Args:
+        url: 数据库地址
+        readonly: 是否为只读引擎（连接设置 query_only，写入会报错）
+        pool_size: 连接池大小，默认按读/写取 DB_READ_POOL_SIZE / DB_WRITE_POOL_SIZE
+        max_overflow: 连接池满时允许临时新建的连接数
+        pragmas: 覆盖默认 PRAGMA（基准测试对比用）
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return create_engine(url, pool_pre_ping=True)
 
-from config import DATABASE_URL
+    if _is_memory(url):
+        engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=QueuePool,
+            pool_size=pool_size or (DB_READ_POOL_SIZE if readonly else DB_WRITE_POOL_SIZE),
+            max_overflow=max_overflow,
+        )
+    pragmas = sqlite_pragmas(readonly) if pragmas is None else pragmas
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+    return engine
+
+
+def _is_memory(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+engine = make_engine(DATABASE_URL)
+# 内存库无法跨连接共享，读写共用同一引擎
+read_engine = engine if _is_memory(DATABASE_URL) else make_engine(DATABASE_URL, readonly=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 
 def get_db():
-    """获取数据库会话"""
+    """获取数据库会话（可写）"""
     db = SessionLocal()
     try:
         yield db
@@ -21,6 +112,50 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """获取只读数据库会话"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def init_db():
-    """初始化数据库表"""
+    """初始化数据库表（已有表上执行迁移并补建新增的索引）"""
+    import models  # noqa: F401  确保全部模型已注册到 Base.metadata
+    from migrations import run_migrations
+
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+class QueryCounter:
+    """SQL 语句计数"""
+
+    def __init__(self):
+        self.count = 0
+
+
+_query_counter: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.count += 1
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """统计上下文内执行的 SQL 语句数（含同一上下文派生的线程池任务）"""
+    counter = QueryCounter()
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
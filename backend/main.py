@@ -2,16 +2,28 @@
 彩票数据分析 API 服务
 FastAPI 入口
 """
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from config import CORS_ORIGINS
-from database import init_db
+from config import CORS_ORIGINS, BACKFILL_RESUME_ON_START, QUERY_COUNT_HEADER
+from database import init_db, count_queries
+from services.prediction_runner import shutdown_prediction_runner
+from services.precompute import start_precompute_scheduler, stop_precompute_scheduler
+from services.backfill import backfill_manager
+from services.http_cache import response_cache
+from services.single_flight import single_flight
+from services.compute_pool import compute_pool
+from services.analysis_jobs import analysis_jobs
+from sources.http_clients import http_clients
 from routers import ssq_router, dlt_router
 from routers.hk6 import router as hk6_router
 from routers.analysis import router as analysis_router
+from routers.analysis_jobs import router as analysis_jobs_router
+from routers.backfill import router as backfill_router
+from routers.archive import router as archive_router
 
 # 配置日志
 logging.basicConfig(
@@ -28,8 +40,20 @@ async def lifespan(app: FastAPI):
     logger.info("初始化数据库...")
     init_db()
     logger.info("数据库初始化完成")
+    await http_clients.start()
+    # 分析进程池先于预计算启动（预计算也在工作进程中执行）
+    await asyncio.to_thread(compute_pool.start)
+    await start_precompute_scheduler()
+    if BACKFILL_RESUME_ON_START:
+        await backfill_manager.resume_pending()
     yield
     # 关闭时清理资源
+    await backfill_manager.stop()
+    await analysis_jobs.stop()
+    await stop_precompute_scheduler()
+    await http_clients.aclose()
+    compute_pool.shutdown()
+    shutdown_prediction_runner()
     logger.info("应用关闭")
 
 
@@ -40,6 +64,16 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# 同步分析接口的输入已有完成的分析任务时重定向到任务结果（位于响应缓存内层，重定向不被缓存）
+app.middleware("http")(analysis_jobs.middleware)
+
+# 并发的相同分析请求合并为一次计算（位于响应缓存内层，与缓存是否启用无关）
+app.middleware("http")(single_flight.middleware)
+
+# 开奖数据与分析 GET 接口的 ETag / 304 响应缓存
+# 先于 CORS 注册（位于其内层），304 与缓存命中的响应同样带有 CORS 头
+app.middleware("http")(response_cache.middleware)
+
 # 配置 CORS - 更宽松的设置以解决预检请求问题
 app.add_middleware(
     CORSMiddleware,
@@ -51,11 +85,28 @@ app.add_middleware(
     max_age=3600,  # 缓存预检请求1小时
 )
 
+
+async def query_count_header(request: Request, call_next):
+    """在响应头 X-Query-Count 中返回本次请求执行的 SQL 语句数"""
+    with count_queries() as counter:
+        response = await call_next(request)
+    response.headers["X-Query-Count"] = str(counter.count)
+    return response
+
+
+# 调试用，默认不注册（每个请求多一层中间件）
+if QUERY_COUNT_HEADER:
+    app.middleware("http")(query_count_header)
+
+
 # 注册路由
 app.include_router(ssq_router, prefix="/api/ssq")
 app.include_router(dlt_router, prefix="/api/dlt")
 app.include_router(hk6_router, prefix="/api/hk6")
+app.include_router(analysis_jobs_router, prefix="/api")
 app.include_router(analysis_router, prefix="/api")
+app.include_router(backfill_router, prefix="/api")
+app.include_router(archive_router, prefix="/api")
 
 # 投注路由
 from routers.betting import router as betting_router
@@ -75,6 +126,30 @@ def root():
     }
 
 
+@app.get("/api/sources/stats")
+def source_stats():
+    """各数据源 HTTP 客户端统计（在途请求、池中连接、重试、连接复用）"""
+    return http_clients.stats()
+
+
+@app.get("/api/http-cache/stats")
+def http_cache_stats():
+    """HTTP 响应缓存统计（304 次数、命中率、各彩种数据版本）"""
+    return response_cache.stats()
+
+
+@app.get("/api/single-flight/stats")
+def single_flight_stats():
+    """相同请求合并统计（计算次数、被合并的请求数、超时）"""
+    return single_flight.stats()
+
+
+@app.get("/api/compute-pool/stats")
+def compute_pool_stats():
+    """分析进程池统计（在途、排队、各接口并发与耗时、429 次数）"""
+    return compute_pool.stats()
+
+
 @app.get("/health")
 def health_check():
     """健康检查"""
@@ -0,0 +1,73 @@
+"""
+数据库结构迁移
+create_all 不会修改已存在的表，新增列在这里以 ALTER TABLE 补上，并回填已有数据。
+每一步都可重复执行：列已存在则跳过，只回填派生列为空的行。
+"""
+import logging
+from typing import List
+
+from sqlalchemy import inspect, text, select, bindparam
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# 回填时每批更新的行数
+_BACKFILL_CHUNK = 2000
+
+
+def _add_missing_columns(engine: Engine, model) -> List[str]:
+    """为已存在的表补上模型中新增的列"""
+    table = model.__table__
+    existing = {col["name"] for col in inspect(engine).get_columns(table.name)}
+    added = []
+    with engine.begin() as conn:
+        for col in table.columns:
+            if col.name in existing:
+                continue
+            col_type = col.type.compile(dialect=engine.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{col.name}" {col_type}'))
+            added.append(col.name)
+    if added:
+        logger.info(f"{table.name} 新增列: {', '.join(added)}")
+    return added
+
+
+def _backfill_derived_columns(engine: Engine, model) -> int:
+    """按原始字段计算 draw_key / draw_date / weekday_code，只处理尚未回填的行"""
+    table = model.__table__
+    source_cols = [c for c in table.columns if c.name not in ("draw_key", "draw_date", "weekday_code")]
+    with engine.connect() as conn:
+        rows = conn.execute(select(*source_cols).where(table.c.draw_key.is_(None))).mappings().all()
+    if not rows:
+        return 0
+
+    stmt = (
+        table.update()
+        .where(table.c.id == bindparam("_id"))
+        .values(
+            draw_key=bindparam("draw_key"),
+            draw_date=bindparam("draw_date"),
+            weekday_code=bindparam("weekday_code"),
+            # 回填不是数据变更，保留原修改时间（否则 onupdate 会改写为当前时间）
+            updated_at=table.c.updated_at,
+        )
+    )
+    with engine.begin() as conn:
+        for start in range(0, len(rows), _BACKFILL_CHUNK):
+            conn.execute(stmt, [
+                {"_id": row["id"], **model.derived_columns(row)}
+                for row in rows[start:start + _BACKFILL_CHUNK]
+            ])
+    logger.info(f"{table.name} 回填派生列 {len(rows)} 行")
+    return len(rows)
+
+
+def run_migrations(engine: Engine) -> None:
+    """在 create_all 之后、补建索引之前执行"""
+    from models.ssq import SSQResult
+    from models.dlt import DLTResult
+    from models.hk6 import HK6Result
+
+    for model in (SSQResult, DLTResult, HK6Result):
+        _add_missing_columns(engine, model)
+        _backfill_derived_columns(engine, model)
@@ -0,0 +1,399 @@
+"""
+数据源替身服务器
+在本地按官方接口的路径与响应结构回放开奖数据（双色球 cwl.gov.cn、大乐透 sporttery.cn、
+六合彩 HKJC GraphQL），可配置延迟、失败率与分页大小，供基准测试与 CI 在无外网时使用。
+数据可以是按开奖日历生成的模拟数据，也可以是录制的原始条目（JSON）或离线归档（.npz）。
+
+启动后将 SSQ_URL / DLT_URL / HK6_URL 指向本服务即可替换真实数据源:
+    python mock_sources.py --port 8900 --latency 0.05 --error-rate 0.02
+只依赖标准库（读取 .npz 归档时除外），可在设置上述环境变量、导入 config 之前启动。
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit, parse_qs
+
+# 与真实接口相同的路径，替换时只需改主机与端口
+PATHS = {
+    "ssq": "/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice",
+    "dlt": "/gateway/lottery/getHistoryPageListV1.qry",
+    "hk6": "/graphql/base/",
+}
+URL_ENV = {"ssq": "SSQ_URL", "dlt": "DLT_URL", "hk6": "HK6_URL"}
+
+# 开奖星期（周一为 0）与号码范围，与 MetaphysicalService.DRAW_TIMES 一致
+_CALENDAR = {"ssq": [1, 3, 6], "dlt": [0, 2, 5], "hk6": [1, 3, 5, 6]}
+_WEEKDAY_NAMES = "一二三四五六日"
+
+
+def _draw_days(lottery: str, count: int, end: datetime) -> List[datetime]:
+    """end 当天及之前按开奖日历的最近 count 个开奖日（旧到新）"""
+    days = []
+    day = end.replace(hour=0, minute=0, second=0, microsecond=0)
+    while len(days) < count:
+        if day.weekday() in _CALENDAR[lottery]:
+            days.append(day)
+        day -= timedelta(days=1)
+    return days[::-1]
+
+
+def synthetic_draws(lottery: str, count: int, seed: int = 0, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """按开奖日历生成最近 count 期模拟数据（新到旧，条目结构与官方接口一致）
+
+    开奖日期截止到 end（默认昨天），期号按年份从 1 编号，因此增量同步规划可以直接使用。
+    """
+    rng = random.Random(f"{lottery}:{seed}")
+    end = end or datetime.now() - timedelta(days=1)
+    items = []
+    year, no = None, 0
+    previous = None
+    for day in _draw_days(lottery, count, end):
+        if day.year != year:
+            year, no = day.year, 0
+        no += 1
+        if lottery == "ssq":
+            reds = sorted(rng.sample(range(1, 34), 6))
+            items.append(ssq_item(year * 1000 + no, f"{day:%Y-%m-%d}", reds, rng.randint(1, 16)))
+        elif lottery == "dlt":
+            front = sorted(rng.sample(range(1, 36), 5))
+            back = sorted(rng.sample(range(1, 13), 2))
+            begin = f"{previous or day - timedelta(days=2):%Y-%m-%d} 21:10:00"
+            items.append(dlt_item(f"{year % 100:02d}{no:03d}", front + back, begin, f"{day:%Y-%m-%d} 20:00:00"))
+        else:
+            balls = rng.sample(range(1, 50), 7)
+            items.append(hk6_item(f"{year}{no}N", year, no, f"{day:%Y-%m-%d}", sorted(balls[:6]), balls[6]))
+        previous = day
+    return items[::-1]
+
+
+def ssq_item(period: int, date: str, reds: List[int], blue: int, week: Optional[str] = None) -> Dict[str, Any]:
+    """双色球 findDrawNotice 的 result 条目；date 不含星期时按日期补上"""
+    if "(" not in date:
+        week = week or _WEEKDAY_NAMES[datetime.strptime(date, "%Y-%m-%d").weekday()]
+        date = f"{date}({week})"
+    return {
+        "name": "双色球",
+        "code": str(period),
+        "date": date,
+        "week": week or date[11:12],
+        "red": ",".join(f"{r:02d}" for r in reds),
+        "blue": f"{blue:02d}",
+        "sales": "0",
+        "poolmoney": "0",
+    }
+
+
+def dlt_item(period: str, balls: List[int], sale_begin: str, sale_end: str) -> Dict[str, Any]:
+    """大乐透 getHistoryPageListV1 的 value.list 条目"""
+    return {
+        "lotteryGameName": "超级大乐透",
+        "lotteryDrawNum": period,
+        "lotteryDrawResult": " ".join(f"{b:02d}" for b in balls),
+        "lotteryDrawTime": sale_end[:10],
+        "lotterySaleBeginTime": sale_begin,
+        "lotterySaleEndtime": sale_end,
+        "poolBalanceAfterdraw": "0",
+    }
+
+
+def hk6_item(
+    period: str, year: int, no: int, date: str, numbers: List[int], special: int,
+    snowball_code: Optional[str] = None, snowball_name: Optional[str] = None,
+) -> Dict[str, Any]:
+    """HKJC marksixResult 的 lotteryDraws 条目"""
+    stamp = f"{date}+08:00"
+    return {
+        "id": period, "year": str(year), "no": no,
+        "openDate": stamp, "closeDate": stamp, "drawDate": stamp, "status": "Result",
+        "snowballCode": snowball_code or "", "snowballName_en": "", "snowballName_ch": snowball_name or "",
+        "lotteryPool": {
+            "sell": False, "status": "Closed", "totalInvestment": "0", "jackpot": "0", "unitBet": 10,
+            "estimatedPrize": "0", "derivedFirstPrizeDiv": "0",
+            "lotteryPrizes": [{"type": k, "winningUnit": 0, "dividend": "0"} for k in range(1, 8)],
+        },
+        "drawResult": {"drawnNo": numbers, "xDrawnNo": special},
+    }
+
+
+def items_from_rows(lottery: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """由数据库/归档行（字段名同模型列名）还原为官方接口条目（新到旧）"""
+    items = []
+    for r in rows:
+        if lottery == "ssq":
+            reds = [r[f"red{i}"] for i in range(1, 7)]
+            items.append((int(r["period"]), ssq_item(r["period"], r["date"], reds, r["blue"], r.get("weekday"))))
+        elif lottery == "dlt":
+            balls = [r[f"front{i}"] for i in range(1, 6)] + [r["back1"], r["back2"]]
+            items.append((int(r["period"]), dlt_item(r["period"], balls, r["sale_begin_time"], r["sale_end_time"])))
+        else:
+            numbers = [r[f"num{i}"] for i in range(1, 7)]
+            items.append((r["year"] * 1000 + r["no"], hk6_item(
+                r["period"], r["year"], r["no"], r["date"], numbers, r["special"],
+                r.get("snowball_code"), r.get("snowball_name"),
+            )))
+    items.sort(key=lambda pair: pair[0], reverse=True)
+    return [item for _, item in items]
+
+
+def save_fixture(path: Path, items: List[Dict[str, Any]]) -> None:
+    Path(path).write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+
+
+def load_fixture(path: Path) -> List[Dict[str, Any]]:
+    """读取录制的原始条目（新到旧，结构同官方接口）"""
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def _item_day(lottery: str, item: Dict[str, Any]) -> str:
+    if lottery == "ssq":
+        return item["date"][:10]
+    if lottery == "dlt":
+        return item["lotterySaleEndtime"][:10]
+    return item["drawDate"][:10]
+
+
+class MockSourceServer:
+    """本地替身服务器（后台线程，HTTP/1.1 长连接）
+
+    Args:
+        draws: 各彩种条目（新到旧），可在启动后通过 draws 属性替换
+        latency: 每个请求的固定延迟（秒）
+        jitter: 在固定延迟上叠加的随机延迟上限（秒）
+        error_rate: 请求随机返回 503 的比例
+        page_size: 服务端分页大小上限（模拟接口对 pageSize 的限制），None 表示按请求参数
+        chunk_size: 响应体分块写出的字节数，模拟网络逐段到达
+    """
+
+    def __init__(
+        self,
+        draws: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        page_size: Optional[int] = None,
+        chunk_size: int = 65536,
+        seed: int = 0,
+    ):
+        self.draws = {name: [] for name in PATHS}
+        self.draws.update(draws or {})
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.chunk_size = chunk_size
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {name: {"requests": 0, "errors": 0, "items": 0, "bytes": 0} for name in PATHS}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, lottery: str) -> str:
+        return self.base_url + PATHS[lottery]
+
+    def env(self) -> Dict[str, str]:
+        """替换真实数据源所需的环境变量"""
+        return {URL_ENV[name]: self.url(name) for name in PATHS}
+
+    def start(self) -> "MockSourceServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="mock-source")
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "MockSourceServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(s) for name, s in self._stats.items()}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for s in self._stats.values():
+                s.update(requests=0, errors=0, items=0, bytes=0)
+
+    # ---------- 各接口的查询语义 ----------
+
+    def _paginate(self, rows: List[Dict[str, Any]], page: int, size: int):
+        if self.page_size:
+            size = min(size, self.page_size)
+        size = max(size, 1)
+        return rows[(page - 1) * size: page * size], max(math.ceil(len(rows) / size), 1), size
+
+    def _ssq(self, query: Dict[str, str]) -> Dict[str, Any]:
+        rows = self.draws["ssq"]
+        if query.get("issueCount"):
+            rows = rows[:int(query["issueCount"])]
+        if query.get("issueStart") and query.get("issueEnd"):
+            lo, hi = int(query["issueStart"]), int(query["issueEnd"])
+            rows = [r for r in rows if lo <= int(r["code"]) <= hi]
+        if query.get("dayStart") and query.get("dayEnd"):
+            rows = [r for r in rows if query["dayStart"] <= r["date"][:10] <= query["dayEnd"]]
+        page = int(query.get("pageNo", 1))
+        result, pages, size = self._paginate(rows, page, int(query.get("pageSize", 30)))
+        return {
+            "state": 0, "message": "查询成功", "total": len(rows), "pageNum": pages,
+            "pageNo": page, "pageSize": size, "Tflag": 0, "result": result,
+        }
+
+    def _dlt(self, query: Dict[str, str]) -> Dict[str, Any]:
+        rows = self.draws["dlt"]
+        if query.get("startTerm") and query.get("endTerm"):
+            rows = [r for r in rows if query["startTerm"] <= r["lotteryDrawNum"] <= query["endTerm"]]
+        page = int(query.get("pageNo", 1))
+        result, pages, size = self._paginate(rows, page, int(query.get("pageSize", 30)))
+        return {
+            "dataFrom": "", "emptyFlag": not result, "errorCode": "0", "errorMessage": "处理成功",
+            "success": True,
+            "value": {"list": result, "pageNo": page, "pageSize": size, "pages": pages, "total": len(rows)},
+        }
+
+    def _hk6(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        variables = body.get("variables") or {}
+        rows = self.draws["hk6"]
+        start, end = variables.get("startDate"), variables.get("endDate")
+        if start and end:
+            rows = [r for r in rows if start <= r["drawDate"][:10].replace("-", "") <= end]
+        if variables.get("lastNDraw"):
+            rows = rows[:int(variables["lastNDraw"])]
+        return {"data": {"lotteryDraws": rows}}
+
+    def _handler_class(self):
+        mock = self
+        routes = {path: name for name, path in PATHS.items()}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self, body_factory) -> None:
+                name = routes.get(urlsplit(self.path).path)
+                if name is None:
+                    self._reply(404, b'{"message": "not found"}')
+                    return
+                delay = mock.latency + (mock._rng.uniform(0, mock.jitter) if mock.jitter else 0)
+                if delay:
+                    time.sleep(delay)
+                with mock._lock:
+                    stats = mock._stats[name]
+                    stats["requests"] += 1
+                    failed = mock.error_rate and mock._rng.random() < mock.error_rate
+                    if failed:
+                        stats["errors"] += 1
+                if failed:
+                    self._reply(503, b'{"message": "service unavailable"}')
+                    return
+                payload = body_factory(name)
+                out = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                items = payload.get("result") or (payload.get("value") or {}).get("list") \
+                    or (payload.get("data") or {}).get("lotteryDraws") or []
+                with mock._lock:
+                    stats["items"] += len(items)
+                    stats["bytes"] += len(out)
+                self._reply(200, out)
+
+            def _reply(self, status: int, out: bytes) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json;charset=UTF-8")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                view = memoryview(out)
+                for i in range(0, len(out), mock.chunk_size):
+                    self.wfile.write(view[i:i + mock.chunk_size])
+
+            def do_GET(self):
+                query = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+                self._serve(lambda name: mock._ssq(query) if name == "ssq" else mock._dlt(query))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                self._serve(lambda name: mock._hk6(body))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def _load_archives(directory: Path) -> Dict[str, List[Dict[str, Any]]]:
+    from services.draw_archive import open_archive
+
+    draws = {}
+    for name in PATHS:
+        path = directory / f"{name}.npz"
+        if path.exists():
+            draws[name] = items_from_rows(name, list(open_archive(path).iter_rows()))
+    return draws
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地数据源替身服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="随机附加延迟上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回 503 的比例")
+    parser.add_argument("--page-size", type=int, default=None, help="服务端分页大小上限")
+    parser.add_argument("--count", type=int, nargs=3, default=[3000, 3000, 2000],
+                        metavar=("SSQ", "DLT", "HK6"), help="模拟数据期数")
+    parser.add_argument("--fixtures", type=Path, help="录制条目目录（{ssq,dlt,hk6}.json），优先于模拟数据")
+    parser.add_argument("--archives", type=Path, help="离线归档目录（{ssq,dlt,hk6}.npz），优先于模拟数据")
+    parser.add_argument("--save-fixtures", type=Path, help="将当前数据写为录制条目后继续运行")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    draws = {name: synthetic_draws(name, n, args.seed) for name, n in zip(PATHS, args.count)}
+    if args.archives:
+        draws.update(_load_archives(args.archives))
+    if args.fixtures:
+        for name in PATHS:
+            path = args.fixtures / f"{name}.json"
+            if path.exists():
+                draws[name] = load_fixture(path)
+    if args.save_fixtures:
+        args.save_fixtures.mkdir(parents=True, exist_ok=True)
+        for name, items in draws.items():
+            save_fixture(args.save_fixtures / f"{name}.json", items)
+
+    server = MockSourceServer(
+        draws, args.host, args.port, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, page_size=args.page_size, seed=args.seed,
+    )
+    for name, items in draws.items():
+        print(f"{name}: {len(items)} 期")
+    for key, value in server.env().items():
+        print(f"export {key}={value}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
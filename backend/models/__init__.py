@@ -3,6 +3,7 @@ from models.dlt import DLTResult
 from models.hk6 import HK6Result
 from models.user import User
 from models.bet import Bet, Watchlist
+from models.backfill import BackfillJob
 
-__all__ = ["SSQResult", "DLTResult", "HK6Result", "User", "Bet", "Watchlist"]
+__all__ = ["SSQResult", "DLTResult", "HK6Result", "User", "Bet", "Watchlist", "BackfillJob"]
 
@@ -0,0 +1,66 @@
+"""
+历史回填任务模型
+"""
+import enum
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, DateTime
+
+from database import Base
+
+
+class BackfillStatus(str, enum.Enum):
+    """回填任务状态"""
+    PENDING = "pending"       # 待执行
+    RUNNING = "running"       # 执行中（进程退出时保持此状态，重启后自动续传）
+    PAUSED = "paused"         # 已手动暂停
+    FAILED = "failed"         # 重试用尽后失败
+    COMPLETED = "completed"   # 已完成
+
+
+class BackfillJob(Base):
+    """历史回填任务：按页分块提交，检查点为最后提交的页码与期号"""
+    __tablename__ = "backfill_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    lottery = Column(String(10), nullable=False, index=True)  # ssq / dlt / hk6
+    status = Column(String(20), nullable=False, default=BackfillStatus.PENDING.value)
+    count = Column(Integer, nullable=True)  # 目标期数，为空表示全部历史
+    chunk_pages = Column(Integer, nullable=False, default=10)  # 每次提交的页数
+
+    # 检查点
+    total_pages = Column(Integer, nullable=True)
+    last_page = Column(Integer, nullable=False, default=0)
+    last_period = Column(String(20), nullable=True)  # 已提交的最早一期
+
+    # 进度
+    rows = Column(Integer, nullable=False, default=0)
+    inserted = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    finished_at = Column(DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "lottery": self.lottery,
+            "status": self.status,
+            "count": self.count,
+            "chunk_pages": self.chunk_pages,
+            "total_pages": self.total_pages,
+            "last_page": self.last_page,
+            "last_period": self.last_period,
+            "progress": round(self.last_page / self.total_pages, 4) if self.total_pages else 0.0,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "attempts": self.attempts,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(timespec="seconds") if self.created_at else None,
+            "updated_at": self.updated_at.isoformat(timespec="seconds") if self.updated_at else None,
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+        }
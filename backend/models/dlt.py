@@ -5,11 +5,13 @@ from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.sql import func
 
 from database import Base
+from models.draw_columns import DrawColumnsMixin
 
 
-class DLTResult(Base):
+class DLTResult(DrawColumnsMixin, Base):
     """大乐透开奖结果"""
     __tablename__ = "dlt_results"
+    DATE_FIELD = "sale_end_time"
 
     id = Column(Integer, primary_key=True, index=True)
     period = Column(String(20), unique=True, index=True, comment="期号")
@@ -25,6 +27,10 @@ class DLTResult(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    @classmethod
+    def sort_key_of(cls, row):
+        return int(row["period"])
+
     def to_dict(self):
         return {
             "period": self.period,
@@ -0,0 +1,104 @@
+"""
+开奖结果的派生列
+由期号与日期字符串推导的整数排序键、开奖日期 (DATE) 与星期编码。
+原始的日期字符串（如 "2026-01-11(日)"）与字符串期号（六合彩 "20265N" / "2024084N"）
+无法正确做范围比较和排序，列表、最新一期与增量载入等查询改用这些列上的复合索引。
+写入时由 bulk_upsert 调用 derived_columns 计算，已有数据由 migrations 回填。
+"""
+import re
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Tuple, Union
+
+from sqlalchemy import Column, Date, Index, Integer, SmallInteger
+from sqlalchemy.orm import declared_attr
+
+# 星期汉字 -> 星期编码 (周一为 0，与 datetime.weekday() 一致)
+WEEKDAY_CODES = {"一": 0, "二": 1, "三": 2, "四": 3, "五": 4, "六": 5, "日": 6, "天": 6}
+
+# 派生列名（导出归档时不保存，导入时重新计算）
+DERIVED_COLUMNS = ("draw_key", "draw_date", "weekday_code")
+
+# 六合彩期号参数：年份 + 可选的当年期数 + 可选的 N
+_HK6_PERIOD_RE = re.compile(r"^(\d{4})(\d{0,3})N?$")
+
+
+def parse_day(value: Union[str, date, None]) -> Optional[date]:
+    """"2026-01-11(日)" / "2026-01-11 20:00:00" / date -> date，无法解析时为 None"""
+    if value is None or isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(value[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def weekday_code(date_str: Optional[str], weekday: Optional[str] = None) -> int:
+    """解析星期编码（优先使用星期字段中的汉字），无法解析时为 -1"""
+    if weekday:
+        for ch in weekday:
+            if ch in WEEKDAY_CODES:
+                return WEEKDAY_CODES[ch]
+    day = parse_day(date_str or "")
+    return day.weekday() if day else -1
+
+
+def hk6_period_bounds(period: str) -> Optional[Tuple[int, int]]:
+    """六合彩期号参数 -> draw_key 闭区间；"2025" -> 整年，"20265N" / "2024084N" -> 单期，无法解析时为 None"""
+    match = _HK6_PERIOD_RE.match(str(period).strip().upper())
+    if not match:
+        return None
+    year, no = int(match.group(1)), match.group(2)
+    if not no:
+        return year * 1000, year * 1000 + 999
+    key = year * 1000 + int(no)
+    return key, key
+
+
+class DrawColumnsMixin:
+    """开奖结果表的派生列与索引
+
+    子类设置 DATE_FIELD（开奖日期所在的字符串列）、可选的 WEEKDAY_FIELD，
+    并实现 sort_key_of()。
+    """
+
+    DATE_FIELD = "date"
+    WEEKDAY_FIELD: Optional[str] = None
+
+    draw_key = Column(Integer, comment="排序键（期号整数 / 年份*1000+当年期数）")
+    draw_date = Column(Date, comment="开奖日期")
+    weekday_code = Column(SmallInteger, comment="星期编码，周一为 0")
+
+    @declared_attr
+    def __table_args__(cls):
+        name = cls.__tablename__
+        return (
+            # 最新一期、期号范围、增量载入
+            Index(f"ix_{name}_draw_key", "draw_key"),
+            # 日期范围筛选 + 按开奖先后排序
+            Index(f"ix_{name}_draw_date_key", "draw_date", "draw_key"),
+            # 按星期筛选 + 按开奖先后排序
+            Index(f"ix_{name}_weekday_key", "weekday_code", "draw_key"),
+        )
+
+    @classmethod
+    def sort_key_of(cls, row: Dict[str, Any]) -> int:
+        raise NotImplementedError
+
+    @classmethod
+    def period_bounds(cls, period: Union[str, int]) -> Optional[Tuple[int, int]]:
+        """期号参数 -> draw_key 闭区间（默认 draw_key 即期号整数），无法解析时为 None"""
+        text = str(period).strip()
+        if not text.isdigit():
+            return None
+        return int(text), int(text)
+
+    @classmethod
+    def derived_columns(cls, row: Dict[str, Any]) -> Dict[str, Any]:
+        """由一行原始字段计算派生列"""
+        date_str = row.get(cls.DATE_FIELD)
+        hint = row.get(cls.WEEKDAY_FIELD) if cls.WEEKDAY_FIELD else None
+        return {
+            "draw_key": cls.sort_key_of(row),
+            "draw_date": parse_day(date_str),
+            "weekday_code": weekday_code(date_str, hint),
+        }
@@ -5,10 +5,11 @@ from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.sql import func
 
 from database import Base
+from models.draw_columns import DrawColumnsMixin, hk6_period_bounds
 
 
-class HK6Result(Base):
-    """香港六合彩开奖结果"""
+class HK6Result(DrawColumnsMixin, Base):
+    """香港六合彩开奖结果（按 draw_key = 年份*1000+当年期数 排序与取最新一期）"""
     __tablename__ = "hk6_results"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -28,6 +29,14 @@ class HK6Result(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    @classmethod
+    def sort_key_of(cls, row):
+        return int(row["year"]) * 1000 + int(row["no"])
+
+    @classmethod
+    def period_bounds(cls, period):
+        return hk6_period_bounds(period)
+
     def to_dict(self):
         return {
             "period": self.period,
@@ -5,11 +5,13 @@ from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.sql import func
 
 from database import Base
+from models.draw_columns import DrawColumnsMixin
 
 
-class SSQResult(Base):
+class SSQResult(DrawColumnsMixin, Base):
     """双色球开奖结果"""
     __tablename__ = "ssq_results"
+    WEEKDAY_FIELD = "weekday"
 
     id = Column(Integer, primary_key=True, index=True)
     period = Column(Integer, unique=True, index=True, comment="期数")
@@ -25,6 +27,10 @@ class SSQResult(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    @classmethod
+    def sort_key_of(cls, row):
+        return int(row["period"])
+
     def to_dict(self):
         return {
             "period": self.period,
@@ -2,18 +2,66 @@
 统计分析 API 路由
 """
 from typing import Optional, List
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from starlette.concurrency import run_in_threadpool
 
-from database import get_db
+from config import COMPUTE_RETRY_AFTER
+from database import get_read_db
 from services.ssq_analysis import SSQAnalysisService
 from services.dlt_analysis import DLTAnalysisService
 from services.hk6_analysis import HK6AnalysisService
-from models.ssq import SSQResult
-from models.dlt import DLTResult
+from services.draw_store import draw_store
+from services.precompute import precomputed, precompute_scheduler, KILL_DEFAULTS, PRECOMPUTE_TASKS
+from services.compute_pool import (
+    compute_pool, call_service_json, run_in_session, ComputeRejected, ComputeUnavailable,
+)
+from services.http_cache import response_cache, DataVersion
+from services.prediction_cache import has_predictions
+from services.json_response import NumpyJSONResponse
+
+# 结果多为大的嵌套对象：数据类接口直接返回 NumpyJSONResponse（跳过 jsonable_encoder），
+# 计算类接口的结果在执行处序列化为字节
+router = APIRouter(prefix="/analysis", tags=["统计分析"], default_response_class=NumpyJSONResponse)
+
+
+async def _offload(endpoint: str, version: DataVersion, fn, *args,
+                   cached: bool = False, local: bool = False, **kwargs):
+    """在分析进程池中执行 fn(db, *args, **kwargs)
+
+    cached 为 True 时结果可直接由本进程的缓存组装，不受排队限制，在线程池中执行。
+    local 为 True 时（预测接口）仍受排队与并发限制，但在本进程执行：拟合任务分发到共享的预测进程池，
+    结果写入本进程的预测缓存，后续相同请求直接命中。
+    进程池饱和时返回 429（带 Retry-After），工作进程异常退出时返回 503。
+    """
+    if cached:
+        return await run_in_threadpool(run_in_session, fn, args, kwargs)
+    try:
+        return await compute_pool.run(endpoint, fn, *args, lottery=version.lottery, version=version.token,
+                                      local=local, **kwargs)
+    except ComputeRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(COMPUTE_RETRY_AFTER)})
+    except ComputeUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+async def _offload_json(endpoint: str, version: DataVersion, service_cls, method: str, *args,
+                        cached: bool = False, local: bool = False, **kwargs) -> Response:
+    """service_cls(db).method(*args, **kwargs)，结果在执行处直接序列化，事件循环只转发字节"""
+    body = await _offload(endpoint, version, call_service_json, service_cls, method, *args,
+                          cached=cached, local=local, **kwargs)
+    return Response(content=body, media_type=NumpyJSONResponse.media_type)
+
 
-router = APIRouter(prefix="/analysis", tags=["统计分析"])
+async def _version(lottery: str) -> DataVersion:
+    return await run_in_threadpool(response_cache.version, lottery)
+
+
+async def _all_methods_cached(version: DataVersion, service_cls, lookback: int) -> bool:
+    """默认参数下各预测方法的结果是否都已在本进程缓存中（开奖后预计算或此前的请求写入）"""
+    return await run_in_threadpool(
+        has_predictions, version.lottery, version.period, lookback, {m: {} for m in service_cls.METHODS},
+    )
 
 
 @router.get("/ssq/frequency")
@@ -22,44 +70,45 @@ def get_ssq_frequency(
     start_period: Optional[int] = Query(None, description="起始期号"),
     end_period: Optional[int] = Query(None, description="结束期号"),
     limit: Optional[int] = Query(None, description="限制期数"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """获取双色球位置频率统计"""
+    if weekday is None and start_period is None and end_period is None and limit is None:
+        return NumpyJSONResponse(precomputed.serve("ssq", "frequency", db))
     service = SSQAnalysisService(db)
-    return service.get_position_frequency(
+    return NumpyJSONResponse(service.get_position_frequency(
         weekday=weekday,
         start_period=start_period,
         end_period=end_period,
         limit=limit,
-    )
+    ))
 
 
 @router.get("/ssq/trend")
 def get_ssq_trend(
     limit: int = Query(50, description="期数限制", ge=10, le=200),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """获取双色球走势数据"""
-    results = db.query(SSQResult).order_by(desc(SSQResult.period)).limit(limit).all()
-    results = list(reversed(results))  # 按时间正序
+    history = draw_store.get("ssq", db).tail(limit)  # 按时间正序
     
-    return {
-        "periods": [r.period for r in results],
-        "red1": [r.red1 for r in results],
-        "red2": [r.red2 for r in results],
-        "red3": [r.red3 for r in results],
-        "red4": [r.red4 for r in results],
-        "red5": [r.red5 for r in results],
-        "red6": [r.red6 for r in results],
-        "blue": [r.blue for r in results],
-    }
+    return NumpyJSONResponse({
+        "periods": history.periods,
+        "red1": history.column("red1"),
+        "red2": history.column("red2"),
+        "red3": history.column("red3"),
+        "red4": history.column("red4"),
+        "red5": history.column("red5"),
+        "red6": history.column("red6"),
+        "blue": history.column("blue"),
+    })
 
 
 @router.get("/ssq/weekday-options")
-def get_ssq_weekday_options(db: Session = Depends(get_db)):
+def get_ssq_weekday_options(db: Session = Depends(get_read_db)):
     """获取双色球星期选项"""
     service = SSQAnalysisService(db)
-    return service.get_weekday_options()
+    return NumpyJSONResponse(service.get_weekday_options())
 
 
 @router.get("/dlt/frequency")
@@ -67,36 +116,37 @@ def get_dlt_frequency(
     start_period: Optional[str] = Query(None, description="起始期号"),
     end_period: Optional[str] = Query(None, description="结束期号"),
     limit: Optional[int] = Query(None, description="限制期数"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """获取大乐透位置频率统计"""
+    if start_period is None and end_period is None and limit is None:
+        return NumpyJSONResponse(precomputed.serve("dlt", "frequency", db))
     service = DLTAnalysisService(db)
-    return service.get_position_frequency(
+    return NumpyJSONResponse(service.get_position_frequency(
         start_period=start_period,
         end_period=end_period,
         limit=limit,
-    )
+    ))
 
 
 @router.get("/dlt/trend")
 def get_dlt_trend(
     limit: int = Query(50, description="期数限制", ge=10, le=200),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """获取大乐透走势数据"""
-    results = db.query(DLTResult).order_by(desc(DLTResult.period)).limit(limit).all()
-    results = list(reversed(results))  # 按时间正序
+    history = draw_store.get("dlt", db).tail(limit)  # 按时间正序
     
-    return {
-        "periods": [r.period for r in results],
-        "front1": [r.front1 for r in results],
-        "front2": [r.front2 for r in results],
-        "front3": [r.front3 for r in results],
-        "front4": [r.front4 for r in results],
-        "front5": [r.front5 for r in results],
-        "back1": [r.back1 for r in results],
-        "back2": [r.back2 for r in results],
-    }
+    return NumpyJSONResponse({
+        "periods": history.periods,
+        "front1": history.column("front1"),
+        "front2": history.column("front2"),
+        "front3": history.column("front3"),
+        "front4": history.column("front4"),
+        "front5": history.column("front5"),
+        "back1": history.column("back1"),
+        "back2": history.column("back2"),
+    })
 
 
 # ==================== 预测 API ==================== #
@@ -108,8 +158,21 @@ def get_ssq_method_params():
     return SSQPredictionService.METHOD_PARAMS
 
 
+@router.get("/prediction-cache")
+def get_prediction_cache_stats():
+    """预测结果缓存命中统计"""
+    from services.prediction_cache import prediction_cache
+    return prediction_cache.stats()
+
+
+@router.get("/precompute/status")
+def get_precompute_status():
+    """开奖后预计算调度状态"""
+    return precompute_scheduler.status()
+
+
 @router.get("/ssq/predict")
-def predict_ssq(
+async def predict_ssq(
     method: str = Query("ma", description="预测方法: ma, es, rf, svr, arima"),
     lookback: int = Query(100, description="历史数据量", ge=20, le=500),
     # 方法参数
@@ -120,38 +183,41 @@ def predict_ssq(
     p: int = Query(1, description="ARIMA p"),
     d: int = Query(0, description="ARIMA d"),
     q: int = Query(1, description="ARIMA q"),
-    db: Session = Depends(get_db),
 ):
     """双色球时间序列预测"""
     from services.prediction_service import SSQPredictionService
     params = {"window": window, "alpha": alpha, "n_lags": n_lags, 
               "n_estimators": n_estimators, "p": p, "d": d, "q": q}
-    service = SSQPredictionService(db)
-    return service.predict(method, lookback, params)
+    version = await _version("ssq")
+    cached = await run_in_threadpool(has_predictions, "ssq", version.period, lookback, {method: params})
+    return await _offload_json("ssq/predict", version, SSQPredictionService, "predict", method, lookback, params,
+                               cached=cached, local=True)
 
 
 @router.get("/ssq/predict-all")
-def predict_ssq_all(
+async def predict_ssq_all(
     lookback: int = Query(100, description="历史数据量", ge=20, le=500),
-    db: Session = Depends(get_db),
 ):
     """双色球全部方法预测"""
     from services.prediction_service import SSQPredictionService
-    service = SSQPredictionService(db)
-    return service.predict_all_methods(lookback)
+    version = await _version("ssq")
+    cached = await _all_methods_cached(version, SSQPredictionService, lookback)
+    return await _offload_json("ssq/predict-all", version, SSQPredictionService, "predict_all_methods", lookback,
+                               cached=cached, local=True)
 
 
 @router.get("/ssq/recommend")
-def recommend_ssq(
+async def recommend_ssq(
     lookback: int = Query(100, description="历史数据量", ge=20, le=500),
     num_sets: int = Query(5, description="推荐组数", ge=1, le=20),
     aggregation: str = Query("all", description="聚合方法: vote, average, weighted, all"),
-    db: Session = Depends(get_db),
 ):
     """双色球综合推荐（多组号码）"""
     from services.prediction_service import SSQPredictionService
-    service = SSQPredictionService(db)
-    return service.generate_recommendations(lookback, num_sets, aggregation=aggregation)
+    version = await _version("ssq")
+    cached = await _all_methods_cached(version, SSQPredictionService, lookback)
+    return await _offload_json("ssq/recommend", version, SSQPredictionService, "generate_recommendations",
+                               lookback, num_sets, aggregation=aggregation, cached=cached, local=True)
 
 
 @router.get("/dlt/method-params")
@@ -162,7 +228,7 @@ def get_dlt_method_params():
 
 
 @router.get("/dlt/predict")
-def predict_dlt(
+async def predict_dlt(
     method: str = Query("ma", description="预测方法: ma, es, rf, svr, arima"),
     lookback: int = Query(100, description="历史数据量", ge=20, le=500),
     window: int = Query(5, description="MA窗口大小"),
@@ -172,83 +238,97 @@ def predict_dlt(
     p: int = Query(1, description="ARIMA p"),
     d: int = Query(0, description="ARIMA d"),
     q: int = Query(1, description="ARIMA q"),
-    db: Session = Depends(get_db),
 ):
     """大乐透时间序列预测"""
     from services.prediction_service import DLTPredictionService
     params = {"window": window, "alpha": alpha, "n_lags": n_lags,
               "n_estimators": n_estimators, "p": p, "d": d, "q": q}
-    service = DLTPredictionService(db)
-    return service.predict(method, lookback, params)
+    version = await _version("dlt")
+    cached = await run_in_threadpool(has_predictions, "dlt", version.period, lookback, {method: params})
+    return await _offload_json("dlt/predict", version, DLTPredictionService, "predict", method, lookback, params,
+                               cached=cached, local=True)
 
 
 @router.get("/dlt/predict-all")
-def predict_dlt_all(
+async def predict_dlt_all(
     lookback: int = Query(100, description="历史数据量", ge=20, le=500),
-    db: Session = Depends(get_db),
 ):
     """大乐透全部方法预测"""
     from services.prediction_service import DLTPredictionService
-    service = DLTPredictionService(db)
-    return service.predict_all_methods(lookback)
+    version = await _version("dlt")
+    cached = await _all_methods_cached(version, DLTPredictionService, lookback)
+    return await _offload_json("dlt/predict-all", version, DLTPredictionService, "predict_all_methods", lookback,
+                               cached=cached, local=True)
 
 
 @router.get("/dlt/recommend")
-def recommend_dlt(
+async def recommend_dlt(
     lookback: int = Query(100, description="历史数据量", ge=20, le=500),
     num_sets: int = Query(5, description="推荐组数", ge=1, le=20),
     aggregation: str = Query("all", description="聚合方法: vote, average, weighted, all"),
-    db: Session = Depends(get_db),
 ):
     """大乐透综合推荐（多组号码）"""
     from services.prediction_service import DLTPredictionService
-    service = DLTPredictionService(db)
-    return service.generate_recommendations(lookback, num_sets, aggregation=aggregation)
+    version = await _version("dlt")
+    cached = await _all_methods_cached(version, DLTPredictionService, lookback)
+    return await _offload_json("dlt/recommend", version, DLTPredictionService, "generate_recommendations",
+                               lookback, num_sets, aggregation=aggregation, cached=cached, local=True)
 
 
 # ==================== 六合彩时间序列预测 API ==================== #
 
 @router.get("/hk6/recommend")
-def recommend_hk6(
+async def recommend_hk6(
     lookback: int = Query(100, description="历史数据量", ge=20, le=500),
     num_sets: int = Query(5, description="推荐组数", ge=1, le=20),
     aggregation: str = Query("all", description="聚合方法: vote, average, weighted, all"),
-    db: Session = Depends(get_db),
 ):
     """六合彩综合推荐（含号码、波色、生肖预测）"""
     from services.prediction_service import HK6PredictionService
-    service = HK6PredictionService(db)
-    return service.generate_recommendations(lookback, num_sets, aggregation=aggregation)
+    version = await _version("hk6")
+    cached = await _all_methods_cached(version, HK6PredictionService, lookback)
+    return await _offload_json("hk6/recommend", version, HK6PredictionService, "generate_recommendations",
+                               lookback, num_sets, aggregation=aggregation, cached=cached, local=True)
 
 
 # ==================== 杀号 API ==================== #
 
 @router.get("/ssq/kill")
-def get_ssq_kill_analysis(
+async def get_ssq_kill_analysis(
     lookback: int = Query(100, description="历史数据量", ge=20, le=2000),
     num_sets: int = Query(5, description="每策略推荐组数", ge=1, le=10),
     page: int = Query(1, description="历史记录页码", ge=1),
     page_size: int = Query(20, description="每页记录数", ge=10, le=50),
-    db: Session = Depends(get_db),
 ):
     """双色球杀号分析（17种红球+6种蓝球方法，含效率指标和多策略推荐）"""
     from services.kill_service import SSQKillService
-    service = SSQKillService(db)
-    return service.get_kill_analysis(lookback, num_sets, page, page_size)
+    version = await _version("ssq")
+    if dict(lookback=lookback, num_sets=num_sets, page=page, page_size=page_size) == KILL_DEFAULTS:
+        value = precomputed.get("ssq", "kill", version.period)
+        if value is None:
+            value = await _offload("ssq/kill", version, PRECOMPUTE_TASKS["ssq"]["kill"])
+            precomputed.put("ssq", "kill", version.period, value)
+        return NumpyJSONResponse(value)
+    return await _offload_json("ssq/kill", version, SSQKillService, "get_kill_analysis", lookback, num_sets, page, page_size)
 
 
 @router.get("/dlt/kill")
-def get_dlt_kill_analysis(
+async def get_dlt_kill_analysis(
     lookback: int = Query(100, description="历史数据量", ge=20, le=2000),
     num_sets: int = Query(5, description="每策略推荐组数", ge=1, le=10),
     page: int = Query(1, description="历史记录页码", ge=1),
     page_size: int = Query(20, description="每页记录数", ge=10, le=50),
-    db: Session = Depends(get_db),
 ):
     """大乐透杀号分析（6种前区+3种后区方法，含效率指标和多策略推荐）"""
     from services.dlt_kill_service import DLTKillService
-    service = DLTKillService(db)
-    return service.get_kill_analysis(lookback, num_sets, page, page_size)
+    version = await _version("dlt")
+    if dict(lookback=lookback, num_sets=num_sets, page=page, page_size=page_size) == KILL_DEFAULTS:
+        value = precomputed.get("dlt", "kill", version.period)
+        if value is None:
+            value = await _offload("dlt/kill", version, PRECOMPUTE_TASKS["dlt"]["kill"])
+            precomputed.put("dlt", "kill", version.period, value)
+        return NumpyJSONResponse(value)
+    return await _offload_json("dlt/kill", version, DLTKillService, "get_kill_analysis", lookback, num_sets, page, page_size)
 
 
 
@@ -376,15 +456,17 @@ def get_hk6_frequency(
     start_period: Optional[str] = Query(None, description="起始期号"),
     end_period: Optional[str] = Query(None, description="结束期号"),
     limit: Optional[int] = Query(None, description="限制期数"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """获取六合彩号码频率统计"""
+    if start_period is None and end_period is None and limit is None:
+        return NumpyJSONResponse(precomputed.serve("hk6", "frequency", db))
     service = HK6AnalysisService(db)
-    return service.get_number_frequency(
+    return NumpyJSONResponse(service.get_number_frequency(
         start_period=start_period,
         end_period=end_period,
         limit=limit,
-    )
+    ))
 
 
 @router.get("/hk6/wave")
@@ -392,15 +474,15 @@ def get_hk6_wave_stats(
     start_period: Optional[str] = Query(None, description="起始期号"),
     end_period: Optional[str] = Query(None, description="结束期号"),
     limit: Optional[int] = Query(None, description="限制期数"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """获取六合彩波色统计"""
     service = HK6AnalysisService(db)
-    return service.get_wave_color_stats(
+    return NumpyJSONResponse(service.get_wave_color_stats(
         start_period=start_period,
         end_period=end_period,
         limit=limit,
-    )
+    ))
 
 
 @router.get("/hk6/zodiac")
@@ -408,15 +490,15 @@ def get_hk6_zodiac_stats(
     start_period: Optional[str] = Query(None, description="起始期号"),
     end_period: Optional[str] = Query(None, description="结束期号"),
     limit: Optional[int] = Query(None, description="限制期数"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """获取六合彩生肖统计"""
     service = HK6AnalysisService(db)
-    return service.get_zodiac_stats(
+    return NumpyJSONResponse(service.get_zodiac_stats(
         start_period=start_period,
         end_period=end_period,
         limit=limit,
-    )
+    ))
 
 
 @router.get("/hk6/metaphysical")
@@ -0,0 +1,105 @@
+"""
+分析任务（异步作业）API 路由
+"""
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from config import ANALYSIS_JOB_SSE_INTERVAL, COMPUTE_RETRY_AFTER
+from services.analysis_jobs import analysis_jobs, format_event, AnalysisJob, AnalysisJobsFull, JOB_ENDPOINTS
+
+router = APIRouter(prefix="/analysis/jobs", tags=["分析任务"])
+
+
+class AnalysisJobRequest(BaseModel):
+    endpoint: str  # 如 ssq/kill，见 JOB_ENDPOINTS
+    params: Dict[str, Any] = {}  # 与同步接口的查询参数相同，缺省取默认值
+
+
+def _get_job(job_id: str) -> AnalysisJob:
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="分析任务不存在或已过期")
+    return job
+
+
+@router.post("")
+async def submit_analysis_job(request: AnalysisJobRequest, http_request: Request):
+    """提交分析任务，立即返回任务 ID；相同输入与数据版本的任务已存在时返回该任务"""
+    try:
+        job, created = await analysis_jobs.submit(http_request.app, request.endpoint, request.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AnalysisJobsFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(COMPUTE_RETRY_AFTER)})
+    return JSONResponse(
+        status_code=202 if created else 200,
+        content=job.describe(analysis_jobs.ttl),
+        headers={"Location": f"/api/analysis/jobs/{job.id}"},
+    )
+
+
+@router.get("")
+def list_analysis_jobs(limit: int = 50):
+    """分析任务列表（新到旧）"""
+    return analysis_jobs.list_jobs(limit)
+
+
+@router.get("/endpoints")
+def list_job_endpoints():
+    """可作为任务提交的分析接口"""
+    return list(JOB_ENDPOINTS)
+
+
+@router.get("/stats")
+def analysis_job_stats():
+    """任务数、去重与重定向次数"""
+    return analysis_jobs.stats()
+
+
+@router.get("/{job_id}")
+def get_analysis_job(job_id: str):
+    """任务状态：queued / running / done / failed"""
+    return _get_job(job_id).describe(analysis_jobs.ttl)
+
+
+@router.get("/{job_id}/result")
+def get_analysis_job_result(job_id: str):
+    """任务结果，与同步接口的响应体相同；未完成时返回 202 与当前状态"""
+    job = _get_job(job_id)
+    if job.state == "failed":
+        return JSONResponse(status_code=job.status_code or 500, content={"detail": job.error})
+    if job.state != "done":
+        return JSONResponse(
+            status_code=202,
+            content=job.describe(analysis_jobs.ttl),
+            headers={"Retry-After": str(max(1, int(ANALYSIS_JOB_SSE_INTERVAL)))},
+        )
+    return Response(content=job.body, status_code=job.status_code, media_type="application/json")
+
+
+@router.get("/{job_id}/events")
+async def stream_analysis_job(job_id: str):
+    """以 SSE 推送任务状态：每次状态变化推送一条（事件名为状态），
+    无变化时每 ANALYSIS_JOB_SSE_INTERVAL 秒推送一次 progress；完成或失败后结束"""
+    job = _get_job(job_id)
+
+    async def events():
+        seq = None
+        while True:
+            if job.seq != seq:
+                seq = job.seq
+                yield format_event(job.state, job.describe(analysis_jobs.ttl))
+                if job.finished:
+                    return
+            elif not await job.wait_changed(ANALYSIS_JOB_SSE_INTERVAL):
+                yield format_event("progress", job.describe(analysis_jobs.ttl))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # 关闭 nginx 的响应缓冲，事件逐条送达
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,51 @@
+"""
+开奖数据离线归档 API 路由
+"""
+import io
+import zipfile
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database import get_db, get_read_db
+from services.draw_archive import export_bytes, import_archive
+from services.draw_store import SPECS
+
+router = APIRouter(prefix="/archive", tags=["离线归档"])
+
+
+def _check_lottery(lottery: str) -> None:
+    if lottery not in SPECS:
+        raise HTTPException(status_code=404, detail=f"不支持的彩种: {lottery}")
+
+
+@router.get("/{lottery}")
+def export_lottery_archive(lottery: str, db: Session = Depends(get_read_db)):
+    """下载某一彩票全部历史的 .npz 归档"""
+    _check_lottery(lottery)
+    return Response(
+        content=export_bytes(db, lottery),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{lottery}.npz"'},
+    )
+
+
+@router.post("/{lottery}")
+async def import_lottery_archive(lottery: str, request: Request, db: Session = Depends(get_db)):
+    """导入 .npz 归档（请求体为文件原始字节，application/octet-stream）"""
+    _check_lottery(lottery)
+    body = await request.body()
+    if not body:
+        raise HTTPException(status_code=400, detail="请求体为空")
+    try:
+        # 解析与批量写入是同步阻塞操作，放到线程池执行
+        return await run_in_threadpool(import_archive, db, io.BytesIO(body), lottery)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except zipfile.BadZipFile as e:
+        raise HTTPException(status_code=400, detail=f"归档文件已损坏: {e}")
+    except KeyError as e:
+        # 归档中缺少某个数组
+        raise HTTPException(status_code=400, detail=f"归档缺少数据项: {e}")
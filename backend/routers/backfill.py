@@ -0,0 +1,69 @@
+"""
+历史回填任务 API 路由
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+
+from config import BACKFILL_CHUNK_PAGES
+from database import get_db, get_read_db
+from models.backfill import BackfillJob
+from services.backfill import backfill_manager
+
+router = APIRouter(prefix="/backfill", tags=["历史回填"])
+
+
+class BackfillRequest(BaseModel):
+    count: Optional[int] = None  # 为空时回填全部历史
+    chunk_pages: int = BACKFILL_CHUNK_PAGES
+
+
+def _get_job(db: Session, job_id: int) -> BackfillJob:
+    job = db.get(BackfillJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="回填任务不存在")
+    return job
+
+
+@router.get("/jobs")
+def list_backfill_jobs(limit: int = 50, db: Session = Depends(get_read_db)):
+    """回填任务列表（新到旧）"""
+    return backfill_manager.list_jobs(db, limit)
+
+
+@router.get("/jobs/{job_id}")
+def get_backfill_job(job_id: int, db: Session = Depends(get_read_db)):
+    """回填任务进度：检查点页码/期号、已写入期数、状态"""
+    return backfill_manager.describe(_get_job(db, job_id))
+
+
+@router.post("/jobs/{job_id}/pause")
+async def pause_backfill_job(job_id: int, db: Session = Depends(get_db)):
+    """暂停任务，保留检查点"""
+    _get_job(db, job_id)
+    if not await backfill_manager.pause(job_id):
+        raise HTTPException(status_code=400, detail="任务未在执行")
+    db.expire_all()
+    return backfill_manager.describe(_get_job(db, job_id))
+
+
+@router.post("/jobs/{job_id}/resume")
+async def resume_backfill_job(job_id: int, db: Session = Depends(get_db)):
+    """从检查点继续已暂停或失败的任务"""
+    _get_job(db, job_id)
+    try:
+        job = await backfill_manager.resume(db, job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return backfill_manager.describe(job)
+
+
+@router.post("/{lottery}")
+async def create_backfill_job(lottery: str, request: BackfillRequest, db: Session = Depends(get_db)):
+    """创建回填任务（ssq / dlt / hk6），后台逐页写入并记录检查点"""
+    try:
+        job = await backfill_manager.create(db, lottery, request.count, request.chunk_pages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return backfill_manager.describe(job)
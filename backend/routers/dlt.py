@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from database import get_db
+from database import get_db, get_read_db
 from services.dlt_service import DLTService
 from schemas.dlt import DLTResultSchema, DLTFetchRequest, DLTListResponse
 
@@ -15,7 +15,10 @@ router = APIRouter(tags=["大乐透"])
 
 class SyncResponse(BaseModel):
     synced: int
+    inserted: int = 0
+    updated: int = 0
     message: str
+    plan: Optional[dict] = None
 
 
 class RefreshRequest(BaseModel):
@@ -24,6 +27,9 @@ class RefreshRequest(BaseModel):
 
 class RefreshResponse(BaseModel):
     refreshed: int
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
     message: str
 
 
@@ -33,7 +39,7 @@ def get_dlt_list(
     offset: int = Query(0, ge=0, description="偏移量"),
     start_period: Optional[str] = Query(None, description="起始期号 yyxxx"),
     end_period: Optional[str] = Query(None, description="结束期号 yyxxx"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """获取大乐透开奖数据列表（支持筛选）"""
     service = DLTService(db)
@@ -63,7 +69,7 @@ def get_dlt_list(
 
 
 @router.get("/latest", response_model=Optional[DLTResultSchema])
-def get_latest_dlt(db: Session = Depends(get_db)):
+def get_latest_dlt(db: Session = Depends(get_read_db)):
     """获取最新一期大乐透数据"""
     service = DLTService(db)
     item = service.get_latest()
@@ -109,6 +115,8 @@ async def fetch_dlt_data(
         count=request.count,
         start_period=request.start_period,
         end_period=request.end_period,
+        start_date=request.start_date,
+        end_date=request.end_date,
     )
     return DLTListResponse(
         total=len(items),
@@ -125,8 +133,15 @@ async def fetch_dlt_data(
     )
 
 
+@router.get("/scraper-stats")
+def get_dlt_scraper_stats():
+    """大乐透数据源连接池统计（请求数、新建/复用连接数、HTTP 版本）"""
+    from sources.scraper.dlt_scraper import DLTScraper
+    return DLTScraper.connection_stats()
+
+
 @router.get("/{period}", response_model=Optional[DLTResultSchema])
-def get_dlt_by_period(period: str, db: Session = Depends(get_db)):
+def get_dlt_by_period(period: str, db: Session = Depends(get_read_db)):
     """根据期号获取大乐透数据"""
     service = DLTService(db)
     item = service.get_by_period(period)
@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from database import get_db
+from database import get_db, get_read_db
 from services.hk6_service import HK6Service
 from schemas.hk6 import HK6ResultSchema, HK6ListResponse
 
@@ -15,7 +15,10 @@ router = APIRouter(tags=["香港六合彩"])
 
 class SyncResponse(BaseModel):
     synced: int
+    inserted: int = 0
+    updated: int = 0
     message: str
+    plan: Optional[dict] = None
 
 
 class RefreshRequest(BaseModel):
@@ -24,6 +27,9 @@ class RefreshRequest(BaseModel):
 
 class RefreshResponse(BaseModel):
     refreshed: int
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
     message: str
 
 
@@ -33,7 +39,7 @@ def get_hk6_list(
     offset: int = Query(0, ge=0, description="偏移量"),
     start_period: Optional[str] = Query(None, description="起始期号"),
     end_period: Optional[str] = Query(None, description="结束期号"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """获取六合彩开奖数据列表"""
     service = HK6Service(db)
@@ -68,7 +74,7 @@ def get_hk6_list(
 @router.get("/{period}")
 def get_hk6_by_period(
     period: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """获取指定期号的开奖数据"""
     service = HK6Service(db)
@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from database import get_db
+from database import get_db, get_read_db
 from services.ssq_service import SSQService
 from schemas.ssq import SSQResultSchema, SSQFetchRequest, SSQListResponse
 
@@ -15,7 +15,10 @@ router = APIRouter(tags=["双色球"])
 
 class SyncResponse(BaseModel):
     synced: int
+    inserted: int = 0
+    updated: int = 0
     message: str
+    plan: Optional[dict] = None
 
 
 class RefreshRequest(BaseModel):
@@ -24,6 +27,9 @@ class RefreshRequest(BaseModel):
 
 class RefreshResponse(BaseModel):
     refreshed: int
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
     message: str
 
 
@@ -35,7 +41,8 @@ def get_ssq_list(
     end_period: Optional[int] = Query(None, description="结束期号"),
     start_date: Optional[str] = Query(None, description="起始日期 YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
-    db: Session = Depends(get_db),
+    weekday: Optional[str] = Query(None, description="开奖星期，如 二 / 二四日"),
+    db: Session = Depends(get_read_db),
 ):
     """获取双色球开奖数据列表（支持筛选）"""
     service = SSQService(db)
@@ -46,12 +53,14 @@ def get_ssq_list(
         end_period=end_period,
         start_date=start_date,
         end_date=end_date,
+        weekday=weekday,
     )
     total = service.get_count(
         start_period=start_period,
         end_period=end_period,
         start_date=start_date,
         end_date=end_date,
+        weekday=weekday,
     )
     return SSQListResponse(
         total=total,
@@ -69,7 +78,7 @@ def get_ssq_list(
 
 
 @router.get("/latest", response_model=Optional[SSQResultSchema])
-def get_latest_ssq(db: Session = Depends(get_db)):
+def get_latest_ssq(db: Session = Depends(get_read_db)):
     """获取最新一期双色球数据"""
     service = SSQService(db)
     item = service.get_latest()
@@ -134,7 +143,7 @@ async def fetch_ssq_data(
 
 
 @router.get("/{period}", response_model=Optional[SSQResultSchema])
-def get_ssq_by_period(period: int, db: Session = Depends(get_db)):
+def get_ssq_by_period(period: int, db: Session = Depends(get_read_db)):
     """根据期号获取双色球数据"""
     service = SSQService(db)
     item = service.get_by_period(period)
@@ -33,10 +33,12 @@ class DLTResultCreate(BaseModel):
 
 class DLTFetchRequest(BaseModel):
     """大乐透数据获取请求"""
-    mode: str = Field("count", description="查询模式: count/period")
+    mode: str = Field("count", description="查询模式: count/period/date")
     count: Optional[int] = Field(None, description="期数数量 (1-100)")
     start_period: Optional[str] = Field(None, description="起始期号 yyxxx")
     end_period: Optional[str] = Field(None, description="结束期号 yyxxx")
+    start_date: Optional[str] = Field(None, description="起始日期 YYYY-MM-DD")
+    end_date: Optional[str] = Field(None, description="结束日期 YYYY-MM-DD")
 
 
 class DLTListResponse(BaseModel):
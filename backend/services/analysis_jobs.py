@@ -0,0 +1,321 @@
+"""
+分析任务（异步作业）
+lookback=2000 的杀号回测、全方法预测与综合推荐可能耗时数秒，期间一直占住经 nginx 转发的 HTTP 连接。
+POST /api/analysis/jobs 提交后立即返回任务 ID，计算在后台进行，客户端轮询 /jobs/{id}
+或订阅 /jobs/{id}/events（SSE）获取状态，完成后从 /jobs/{id}/result 取结果：
+  - 参数按对应 GET 接口声明的查询参数校验并补默认值，再直接调用该接口的处理函数，
+    结果与同步接口逐字节一致，同样经 compute_pool 在工作进程中执行；进程池繁忙时稍后重试
+  - 以 (接口, 参数, 数据版本) 去重：相同输入的任务进行中或已完成时直接返回该任务
+  - 完成的结果保留 ANALYSIS_JOB_TTL 秒
+  - 同步接口收到的输入已有完成的任务时，303 重定向到该任务的结果
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from fastapi.dependencies.utils import get_flat_dependant, request_params_to_args
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import RedirectResponse
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from config import (
+    ANALYSIS_JOB_TTL, ANALYSIS_JOB_MAX, ANALYSIS_JOB_MAX_ATTEMPTS, ANALYSIS_JOB_REDIRECT, COMPUTE_RETRY_AFTER,
+)
+from services.compute_pool import render_json
+from services.http_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+# 可作为任务提交的分析接口（/api/analysis/ 之后的路径）
+JOB_ENDPOINTS = (
+    "ssq/kill", "dlt/kill",
+    "ssq/predict-all", "dlt/predict-all",
+    "ssq/recommend", "dlt/recommend", "hk6/recommend",
+)
+_PREFIX = "/api/analysis/"
+
+# 进程池繁忙或工作进程异常退出时重试
+_RETRY_STATUS = {429, 503}
+
+
+class AnalysisJobsFull(Exception):
+    """未完成的任务数已达上限"""
+
+
+class AnalysisJob:
+    """一次分析任务：状态、重试次数与结果（JSON 字节）"""
+
+    def __init__(self, endpoint: str, lottery: str, params: Dict[str, Any], key: str):
+        self.id = uuid.uuid4().hex
+        self.endpoint = endpoint
+        self.lottery = lottery
+        self.params = params
+        self.key = key
+        self.state = "queued"
+        self.attempts = 0
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.status_code: Optional[int] = None
+        self.body: Optional[bytes] = None
+        self.error: Optional[str] = None
+        # 每次状态变化递增；SSE 据此判断是否需要推送
+        self.seq = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed")
+
+    def expires_at(self, ttl: float) -> Optional[datetime]:
+        return self.finished_at + timedelta(seconds=ttl) if self.finished_at else None
+
+    def update(self, state: str, **fields) -> None:
+        self.state = state
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.seq += 1
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait_changed(self, timeout: float) -> bool:
+        """等待下一次状态变化，超时返回 False"""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def describe(self, ttl: float = ANALYSIS_JOB_TTL) -> Dict[str, Any]:
+        end = self.finished_at or datetime.now()
+        expires_at = self.expires_at(ttl)
+        return {
+            "id": self.id,
+            "endpoint": self.endpoint,
+            "lottery": self.lottery,
+            "params": self.params,
+            "state": self.state,
+            "attempts": self.attempts,
+            "created_at": self.created_at.isoformat(timespec="seconds"),
+            "started_at": self.started_at.isoformat(timespec="seconds") if self.started_at else None,
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+            "elapsed_ms": round((end - (self.started_at or end)).total_seconds() * 1000, 1),
+            "expires_at": expires_at.isoformat(timespec="seconds") if expires_at else None,
+            "result_url": f"{_PREFIX}jobs/{self.id}/result" if self.state == "done" else None,
+            "error": self.error,
+        }
+
+
+def format_event(event: str, data: Dict[str, Any]) -> str:
+    """SSE 消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class AnalysisJobManager:
+    """内存中的分析任务表（事件循环内使用）"""
+
+    def __init__(
+        self,
+        ttl: float = ANALYSIS_JOB_TTL,
+        max_jobs: int = ANALYSIS_JOB_MAX,
+        max_attempts: int = ANALYSIS_JOB_MAX_ATTEMPTS,
+        retry_delay: float = COMPUTE_RETRY_AFTER,
+        redirect: bool = ANALYSIS_JOB_REDIRECT,
+    ):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.redirect = redirect
+        self._jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self._by_key: Dict[str, str] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._routes: Dict[str, APIRoute] = {}
+        self.submitted = 0
+        self.deduplicated = 0
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.redirects = 0
+        self.expired = 0
+
+    # ---------- 输入 ----------
+
+    def _route(self, app, endpoint: str) -> APIRoute:
+        route = self._routes.get(endpoint)
+        if route is None:
+            path = _PREFIX + endpoint
+            for candidate in app.router.routes:
+                if isinstance(candidate, APIRoute) and candidate.path == path and "GET" in candidate.methods:
+                    route = self._routes[endpoint] = candidate
+                    break
+            else:
+                raise ValueError(f"找不到分析接口: {endpoint}")
+        return route
+
+    def resolve(self, app, endpoint: str, params) -> Tuple[APIRoute, Dict[str, Any]]:
+        """按 GET 接口声明的查询参数校验 params 并补默认值
+
+        Raises:
+            ValueError: 不支持的接口
+            RequestValidationError: 参数不合法（与同步接口相同的 422 错误）
+        """
+        if endpoint not in JOB_ENDPOINTS:
+            raise ValueError(f"不支持的分析接口: {endpoint}，可选: {', '.join(JOB_ENDPOINTS)}")
+        route = self._route(app, endpoint)
+        values, errors = request_params_to_args(get_flat_dependant(route.dependant).query_params, params)
+        if errors:
+            raise RequestValidationError(errors)
+        return route, values
+
+    @staticmethod
+    async def key_for(endpoint: str, values: Dict[str, Any]) -> Tuple[str, str]:
+        """(去重键, 彩种)；键包含数据版本，新一期开奖后相同参数得到新键"""
+        lottery = endpoint.split("/", 1)[0]
+        version = await run_in_threadpool(response_cache.version, lottery)
+        raw = json.dumps([endpoint, sorted(values.items()), version.token], ensure_ascii=False, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest(), lottery
+
+    # ---------- 任务表 ----------
+
+    def _purge(self) -> None:
+        """清除过期任务；超过 max_jobs 时从最早完成的任务开始清除"""
+        now = datetime.now()
+        finished = [job for job in self._jobs.values() if job.finished]
+        stale = [job for job in finished if job.expires_at(self.ttl) <= now]
+        overflow = len(self._jobs) - len(stale) - self.max_jobs
+        if overflow > 0:
+            stale += sorted((j for j in finished if j not in stale), key=lambda j: j.finished_at)[:overflow]
+        for job in stale:
+            del self._jobs[job.id]
+            if self._by_key.get(job.key) == job.id:
+                del self._by_key[job.key]
+            self.expired += 1
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        self._purge()
+        return self._jobs.get(job_id)
+
+    def list_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """任务列表（新到旧）"""
+        self._purge()
+        return [job.describe(self.ttl) for job in reversed(list(self._jobs.values()))][:limit]
+
+    def _existing(self, key: str, done_only: bool = False) -> Optional[AnalysisJob]:
+        job = self._jobs.get(self._by_key.get(key, ""))
+        if job is None or job.state == "failed" or (done_only and job.state != "done"):
+            return None
+        return job
+
+    async def submit(self, app, endpoint: str, params: Dict[str, Any]) -> Tuple[AnalysisJob, bool]:
+        """提交任务，返回 (任务, 是否新建)；相同输入的任务进行中或已完成时返回该任务
+
+        Raises:
+            ValueError / RequestValidationError: 见 resolve
+            AnalysisJobsFull: 未完成的任务已达上限
+        """
+        route, values = self.resolve(app, endpoint, params)
+        key, lottery = await self.key_for(endpoint, values)
+        self._purge()
+        job = self._existing(key)
+        if job is not None:
+            self.deduplicated += 1
+            return job, False
+        if sum(not j.finished for j in self._jobs.values()) >= self.max_jobs:
+            raise AnalysisJobsFull(f"未完成的分析任务已达上限 {self.max_jobs}，请稍后重试")
+
+        job = AnalysisJob(endpoint, lottery, dict(values), key)
+        self._jobs[job.id] = job
+        self._by_key[key] = job.id
+        self._purge()
+        self._tasks[job.id] = asyncio.create_task(self._run(job, route, values), name=f"analysis-job-{job.id}")
+        self.submitted += 1
+        logger.info(f"分析任务已提交 {job.id}: {endpoint} {values}")
+        return job, True
+
+    async def _run(self, job: AnalysisJob, route: APIRoute, values: Dict[str, Any]) -> None:
+        try:
+            while True:
+                job.update("running", attempts=job.attempts + 1, started_at=job.started_at or datetime.now())
+                try:
+                    response = await route.endpoint(**values)
+                except HTTPException as e:
+                    if e.status_code in _RETRY_STATUS and job.attempts < self.max_attempts:
+                        self.retries += 1
+                        job.update("queued", error=str(e.detail))
+                        await asyncio.sleep(self.retry_delay)
+                        continue
+                    self.failed += 1
+                    job.update("failed", status_code=e.status_code, error=str(e.detail), finished_at=datetime.now())
+                    return
+                if isinstance(response, Response):
+                    body, status_code = bytes(response.body), response.status_code
+                else:
+                    body, status_code = await run_in_threadpool(render_json, response), 200
+                self.completed += 1
+                job.update("done", body=body, status_code=status_code, error=None, finished_at=datetime.now())
+                return
+        except asyncio.CancelledError:
+            job.update("failed", status_code=503, error="服务关闭，任务已取消", finished_at=datetime.now())
+            raise
+        except Exception as e:
+            logger.error(f"分析任务 {job.id} 失败: {e}")
+            self.failed += 1
+            job.update("failed", status_code=500, error=str(e), finished_at=datetime.now())
+        finally:
+            self._tasks.pop(job.id, None)
+
+    async def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    # ---------- 同步接口重定向 ----------
+
+    async def middleware(self, request: Request, call_next):
+        """同步分析接口的输入已有完成的任务时，303 重定向到任务结果"""
+        endpoint = request.url.path[len(_PREFIX):] if request.url.path.startswith(_PREFIX) else None
+        if not self.redirect or request.method != "GET" or endpoint not in JOB_ENDPOINTS:
+            return await call_next(request)
+        try:
+            _, values = self.resolve(request.app, endpoint, request.query_params)
+        except (ValueError, RequestValidationError):
+            # 由接口本身返回错误
+            return await call_next(request)
+        key, _ = await self.key_for(endpoint, values)
+        self._purge()
+        job = self._existing(key, done_only=True)
+        if job is None:
+            return await call_next(request)
+        self.redirects += 1
+        return RedirectResponse(url=f"{_PREFIX}jobs/{job.id}/result", status_code=303)
+
+    def stats(self) -> Dict[str, Any]:
+        self._purge()
+        states: Dict[str, int] = {}
+        for job in self._jobs.values():
+            states[job.state] = states.get(job.state, 0) + 1
+        return {
+            "jobs": len(self._jobs),
+            "states": states,
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "redirects": self.redirects,
+            "expired": self.expired,
+            "ttl": self.ttl,
+            "redirect_enabled": self.redirect,
+        }
+
+
+analysis_jobs = AnalysisJobManager()
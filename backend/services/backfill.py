@@ -0,0 +1,268 @@
+"""
+可断点续传的历史回填任务
+从数据源逐页（新到旧）获取，每 chunk_pages 页写入一次；检查点（最后提交的页码与期号）
+与该批数据在同一事务内提交，进程崩溃或重启后从检查点的下一页继续。
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from config import (
+    BACKFILL_CHUNK_PAGES,
+    BACKFILL_MAX_ATTEMPTS,
+    BACKFILL_RETRY_BASE_SECONDS,
+)
+from database import SessionLocal
+from models.backfill import BackfillJob, BackfillStatus
+from services.bulk_upsert import bulk_upsert
+from services.draw_store import draw_store, SPECS
+from sources.scraper import SSQScraper, DLTScraper, HK6Scraper
+
+logger = logging.getLogger(__name__)
+
+SCRAPERS = {"ssq": SSQScraper, "dlt": DLTScraper, "hk6": HK6Scraper}
+
+# 仍需执行的状态（重启后自动续传）
+ACTIVE_STATUSES = (BackfillStatus.PENDING.value, BackfillStatus.RUNNING.value)
+
+
+async def _in_thread(fn, *args):
+    """在线程中执行阻塞的数据库操作
+
+    所在任务被取消时仍等该操作结束再抛出 CancelledError，同一会话不会被两个线程同时使用。
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
+
+
+class BackfillManager:
+    """回填任务的创建、执行、暂停与续传（每个任务一个 asyncio 任务）"""
+
+    def __init__(
+        self,
+        max_attempts: int = BACKFILL_MAX_ATTEMPTS,
+        retry_base_seconds: float = BACKFILL_RETRY_BASE_SECONDS,
+    ):
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._stopping = False
+        # 测试或基准中可替换为注入本地客户端的数据源
+        self.scraper_factory = lambda lottery: SCRAPERS[lottery]()
+
+    async def create(
+        self,
+        db: Session,
+        lottery: str,
+        count: Optional[int] = None,
+        chunk_pages: int = BACKFILL_CHUNK_PAGES,
+    ) -> BackfillJob:
+        """创建并启动回填任务；同一彩种同时只允许一个未完成的任务"""
+        if lottery not in SCRAPERS:
+            raise ValueError(f"不支持的彩种: {lottery}")
+        job = await _in_thread(self._insert_job, db, lottery, count, chunk_pages)
+        self._start(job.id)
+        return job
+
+    @staticmethod
+    def _insert_job(db: Session, lottery: str, count: Optional[int], chunk_pages: int) -> BackfillJob:
+        active = (
+            db.query(BackfillJob)
+            .filter(BackfillJob.lottery == lottery, BackfillJob.status.in_(ACTIVE_STATUSES))
+            .first()
+        )
+        if active:
+            raise ValueError(f"{lottery} 已有未完成的回填任务 #{active.id}")
+        job = BackfillJob(lottery=lottery, count=count, chunk_pages=max(1, chunk_pages))
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    async def resume(self, db: Session, job_id: int) -> BackfillJob:
+        """从检查点继续已暂停或失败的任务"""
+        restart = job_id not in self._tasks
+        job = await _in_thread(self._reset_job, db, job_id, restart)
+        if restart:
+            self._start(job_id)
+        return job
+
+    @staticmethod
+    def _reset_job(db: Session, job_id: int, restart: bool) -> BackfillJob:
+        job = db.get(BackfillJob, job_id)
+        if job is None:
+            raise LookupError(f"回填任务 #{job_id} 不存在")
+        if job.status == BackfillStatus.COMPLETED.value:
+            raise ValueError(f"回填任务 #{job_id} 已完成")
+        if restart:
+            job.status = BackfillStatus.PENDING.value
+            job.attempts = 0
+            db.commit()
+            db.refresh(job)
+        return job
+
+    async def pause(self, job_id: int) -> bool:
+        """暂停正在执行的任务（已提交的检查点保留）"""
+        task = self._tasks.get(job_id)
+        if task is None:
+            return False
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return True
+
+    async def resume_pending(self) -> List[int]:
+        """启动时续传上次进程退出时未完成的任务"""
+        job_ids = await _in_thread(self._active_job_ids)
+        for job_id in job_ids:
+            logger.info(f"续传回填任务 #{job_id}")
+            self._start(job_id)
+        return job_ids
+
+    @staticmethod
+    def _active_job_ids() -> List[int]:
+        db = SessionLocal()
+        try:
+            return [
+                job_id for (job_id,) in
+                db.query(BackfillJob.id).filter(BackfillJob.status.in_(ACTIVE_STATUSES)).all()
+            ]
+        finally:
+            db.close()
+
+    async def stop(self) -> None:
+        """应用关闭：取消执行中的任务，状态保持为 running 以便重启后续传"""
+        self._stopping = True
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+        self._stopping = False
+
+    def is_running(self, job_id: int) -> bool:
+        return job_id in self._tasks
+
+    def _start(self, job_id: int) -> None:
+        if job_id in self._tasks:
+            return
+        task = asyncio.create_task(self._run(job_id), name=f"backfill-{job_id}")
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def _run(self, job_id: int) -> None:
+        """执行任务，失败后按指数退避从检查点重试
+
+        数据库读写（批次写入、检查点与状态提交）都在线程中执行：SQLite 写锁被其他写入方占用时
+        最多等待 SQLITE_BUSY_TIMEOUT_MS，不能阻塞事件循环。
+        提交后不过期对象，事件循环中读取任务字段不会再触发查询。
+        """
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            job = await _in_thread(db.get, BackfillJob, job_id)
+            while True:
+                await _in_thread(self._mark_running, db, job)
+                try:
+                    await self._run_pages(db, job)
+                    await _in_thread(self._mark_completed, db, job)
+                    logger.info(f"回填任务 #{job.id} ({job.lottery}) 完成: {job.rows} 期")
+                    return
+                except Exception as e:
+                    if await _in_thread(self._record_failure, db, job, str(e)):
+                        return
+                backoff = self.retry_base_seconds * 2 ** (job.attempts - 1)
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+        except asyncio.CancelledError:
+            # 手动暂停记为 paused；应用关闭时保持 running，重启后续传
+            await _in_thread(self._record_cancel, db, job_id, not self._stopping)
+            raise
+        finally:
+            await _in_thread(db.close)
+
+    @staticmethod
+    def _mark_running(db: Session, job: BackfillJob) -> None:
+        job.status = BackfillStatus.RUNNING.value
+        job.attempts += 1
+        job.error = None
+        db.commit()
+
+    @staticmethod
+    def _mark_completed(db: Session, job: BackfillJob) -> None:
+        job.status = BackfillStatus.COMPLETED.value
+        job.finished_at = datetime.now()
+        db.commit()
+
+    def _record_failure(self, db: Session, job: BackfillJob, error: str) -> bool:
+        """回滚未提交的批次并记录错误；达到最多尝试次数时标记为 failed，返回是否放弃"""
+        db.rollback()
+        job.error = error
+        logger.warning(
+            f"回填任务 #{job.id} 第 {job.attempts} 次执行失败（检查点第 {job.last_page} 页）: {error}"
+        )
+        failed = job.attempts >= self.max_attempts
+        if failed:
+            job.status = BackfillStatus.FAILED.value
+        db.commit()
+        return failed
+
+    @staticmethod
+    def _record_cancel(db: Session, job_id: int, paused: bool) -> None:
+        db.rollback()
+        if paused:
+            job = db.get(BackfillJob, job_id)
+            if job is not None:
+                job.status = BackfillStatus.PAUSED.value
+                db.commit()
+
+    async def _run_pages(self, db: Session, job: BackfillJob) -> None:
+        scraper = self.scraper_factory(job.lottery)
+        buffer: List[Dict[str, Any]] = []
+        pending_pages = 0
+        last_page = job.last_page
+        async for page_no, total_pages, rows in scraper.iter_pages(job.count, job.last_page + 1):
+            job.total_pages = total_pages
+            buffer.extend(rows)
+            pending_pages += 1
+            last_page = page_no
+            if job.count and job.rows + len(buffer) >= job.count:
+                buffer = buffer[:job.count - job.rows]
+                break
+            if pending_pages >= job.chunk_pages:
+                await _in_thread(self._commit_chunk, db, job, last_page, buffer)
+                buffer, pending_pages = [], 0
+        if pending_pages:
+            await _in_thread(self._commit_chunk, db, job, last_page, buffer)
+
+    def _commit_chunk(self, db: Session, job: BackfillJob, last_page: int, rows: List[Dict[str, Any]]) -> None:
+        """写入一批数据，检查点随同一事务提交（在线程中执行）"""
+        spec = SPECS[job.lottery]
+        job.last_page = last_page
+        if rows:
+            job.last_period = str(min(rows, key=spec.sort_key)["period"])
+        stats = bulk_upsert(db, spec.model, rows, commit=False)
+        job.rows += stats["total"]
+        job.inserted += stats["inserted"]
+        job.updated += stats["updated"]
+        # 数据、检查点与累计计数一次提交
+        db.commit()
+        draw_store.on_saved(job.lottery, rows, stats)
+        logger.info(
+            f"回填任务 #{job.id} ({job.lottery}) 已提交至第 {last_page}/{job.total_pages} 页，"
+            f"累计 {job.rows} 期"
+        )
+
+    def list_jobs(self, db: Session, limit: int = 50) -> List[Dict[str, Any]]:
+        jobs = db.query(BackfillJob).order_by(BackfillJob.id.desc()).limit(limit).all()
+        return [self.describe(job) for job in jobs]
+
+    def describe(self, job: BackfillJob) -> Dict[str, Any]:
+        return {**job.to_dict(), "active": self.is_running(job.id)}
+
+
+backfill_manager = BackfillManager()
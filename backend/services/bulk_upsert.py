@@ -0,0 +1,200 @@
+"""
+开奖结果批量写入引擎
+使用 INSERT ... ON CONFLICT(period) DO UPDATE 分批写入，整个批次在一个事务内提交；
+bulk_upsert_stream 边从数据源获取边写入，每批单独提交
+"""
+import logging
+from typing import List, Dict, Any, Iterable, AsyncIterable, Callable, Optional, Tuple
+
+from sqlalchemy import select, or_, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# 每批写入行数（SQLite 单条语句变量数上限为 32766，按 14 列计算留足余量）
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _normalize_rows(
+    rows: Iterable[Dict[str, Any]],
+    key: str,
+    derive: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """按主键去重（同一期号以后出现的为准）并补上派生列"""
+    deduped: Dict[Any, Dict[str, Any]] = {}
+    for row in rows:
+        if derive is not None:
+            row = {**row, **derive(row)}
+        deduped[row[key]] = row
+    return list(deduped.values())
+
+
+def _group_by_columns(items: List[Dict[str, Any]]) -> Dict[Tuple[str, ...], List[Dict[str, Any]]]:
+    """按字段集合分组（保持输入顺序）；每组只写入自身带有的列，缺少的列保留库中原值而不是写成 NULL"""
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for item in items:
+        groups.setdefault(tuple(sorted(item)), []).append(item)
+    return groups
+
+
+def bulk_upsert(
+    db: Session,
+    model,
+    rows: Iterable[Dict[str, Any]],
+    key: str = "period",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    commit: bool = True,
+) -> Dict[str, Any]:
+    """批量写入开奖结果
+
+    每批先用一次 IN 查询取出已存在的记录用于统计，再以 executemany 方式执行
+    INSERT ... ON CONFLICT DO UPDATE；内容未变化的记录不会被更新。
+    字段集合不同的行分组写入，行中没有的列不会覆盖已有记录的值。
+    模型定义了 derived_columns（见 models.draw_columns）时，排序键、开奖日期等派生列随行一并写入。
+
+    Args:
+        db: 数据库会话
+        model: 结果模型 (SSQResult/DLTResult/HK6Result)
+        rows: 待写入的数据（字段名与模型列名一致）
+        key: 冲突判定列（需有唯一索引）
+        chunk_size: 每批行数
+        commit: 为 False 时不提交，由调用方与其他改动（如回填检查点）在同一事务内提交；出错时仍会回滚
+
+    Returns:
+        inserted/updated/unchanged/total 计数，以及按输入顺序排列的 periods
+    """
+    items = _normalize_rows(rows, key, getattr(model, "derived_columns", None))
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0, "total": len(items), "periods": []}
+    if not items:
+        return stats
+
+    table = model.__table__
+    key_col = table.c[key]
+
+    try:
+        for columns, group in _group_by_columns(items).items():
+            value_cols = [col for col in columns if col != key]
+            for start in range(0, len(group), chunk_size):
+                chunk = group[start:start + chunk_size]
+                keys = [item[key] for item in chunk]
+
+                # 统计新增/更新/未变化
+                existing = {
+                    row[0]: tuple(row[1:])
+                    for row in db.execute(
+                        select(key_col, *[table.c[col] for col in value_cols])
+                        .where(key_col.in_(keys))
+                    )
+                }
+                for item in chunk:
+                    old = existing.get(item[key])
+                    if old is None:
+                        stats["inserted"] += 1
+                    elif old != tuple(item[col] for col in value_cols):
+                        stats["updated"] += 1
+                    else:
+                        stats["unchanged"] += 1
+
+                stmt = sqlite_insert(table)
+                if value_cols:
+                    excluded = stmt.excluded
+                    set_ = {col: excluded[col] for col in value_cols}
+                    if "updated_at" in table.c and "updated_at" not in set_:
+                        set_["updated_at"] = func.now()
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[key],
+                        set_=set_,
+                        where=or_(*[table.c[col].is_distinct_from(excluded[col]) for col in value_cols]),
+                    )
+                else:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=[key])
+                db.execute(stmt, chunk)
+
+        if commit:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    stats["periods"] = [item[key] for item in items]
+    logger.debug(
+        f"{table.name} 批量写入 {stats['total']} 条: 新增 {stats['inserted']}, "
+        f"更新 {stats['updated']}, 未变 {stats['unchanged']}"
+    )
+    return stats
+
+
+async def bulk_upsert_stream(
+    db: Session,
+    model,
+    rows: AsyncIterable[Dict[str, Any]],
+    key: str = "period",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_chunk: Optional[Callable[[List[Dict[str, Any]], Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """边获取边写入：每满 chunk_size 条调用一次 bulk_upsert 并提交，内存中只保留一批
+
+    数据源中途失败时已提交的批次保留，返回的计数附带 error。
+    不返回 periods（全量回填时期号列表本身会随期数增长）。
+
+    Args:
+        rows: 数据源的异步迭代器（如 DataSource.stream_draws()）
+        on_chunk: 每批提交后的回调 (该批数据, 该批计数)，用于通知 draw_store
+    """
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0, "total": 0}
+    chunk: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        if not chunk:
+            return
+        stats = bulk_upsert(db, model, chunk, key=key, chunk_size=chunk_size)
+        for name in ("inserted", "updated", "unchanged", "total"):
+            totals[name] += stats[name]
+        if on_chunk is not None:
+            on_chunk(list(chunk), stats)
+        chunk.clear()
+
+    iterator = rows.__aiter__()
+    while True:
+        try:
+            row = await iterator.__anext__()
+        except StopAsyncIteration:
+            break
+        except Exception as e:
+            logger.error(f"{model.__table__.name} 流式写入中断（已提交 {totals['total']} 条）: {e}")
+            totals["error"] = str(e)
+            break
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+    return totals
+
+
+def load_by_keys(
+    db: Session,
+    model,
+    keys: List[Any],
+    key: str = "period",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> List[Any]:
+    """按主键列表分批加载 ORM 对象，保持输入顺序"""
+    key_attr = getattr(model, key)
+    found = {}
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        for obj in db.query(model).filter(key_attr.in_(chunk)).all():
+            found[getattr(obj, key)] = obj
+    return [found[k] for k in keys if k in found]
+
+
+def format_upsert_message(prefix: str, stats: Dict[str, Any]) -> str:
+    """生成同步/刷新接口的提示信息"""
+    message = (
+        f"{prefix} {stats['total']} 期数据"
+        f"（新增 {stats['inserted']}，更新 {stats['updated']}，未变 {stats['unchanged']}）"
+    )
+    if stats.get("error"):
+        message += f"，数据源中断: {stats['error']}"
+    return message
@@ -0,0 +1,271 @@
+"""
+CPU 密集型分析的进程池执行层
+杀号回测与 sklearn/statsmodels 拟合在线程池中执行时长时间占用 GIL，
+会拖慢同一进程内 /latest、/health 等轻量接口。这些调用改为提交到独立的工作进程：
+  - 排队深度有上限：在途（执行中 + 排队）请求数超过 工作进程数 + COMPUTE_QUEUE_SIZE 时拒绝（429）
+  - 每个接口有并发上限（COMPUTE_LIMITS），避免一种慢接口占满全部工作进程
+  - 工作进程各自打开只读会话与内存开奖数据；每次调用附带主进程看到的数据版本，
+    版本变化时工作进程丢弃自己的内存数据与派生缓存
+结果在工作进程中直接序列化为 JSON 字节，主进程的事件循环只转发，不再逐层编码大对象。
+预测接口以 local=True 提交：同样受排队与并发限制，但在本进程的线程池中执行，
+拟合任务再分发到进程内共享的 PredictionRunner 进程池（各任务由进程池限时），结果写入本进程的预测缓存。
+本模块顶层不导入 database，工作进程启动时可先设置数据库地址再导入。
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+import config
+from config import (
+    COMPUTE_WORKERS, COMPUTE_QUEUE_SIZE, COMPUTE_DEFAULT_LIMIT, COMPUTE_LIMITS, COMPUTE_START_METHOD,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ComputeRejected(Exception):
+    """进程池已饱和，请求未被接纳"""
+
+
+class ComputeUnavailable(Exception):
+    """工作进程异常退出，进程池将在下次调用时重建"""
+
+
+# ---------- 工作进程 ----------
+
+# 工作进程已同步到的数据版本：{彩种: 版本}
+_worker_versions: Dict[str, Hashable] = {}
+
+
+def _init_worker(database_url: str) -> None:
+    """工作进程初始化：沿用主进程的数据库地址"""
+    config.DATABASE_URL = database_url
+
+
+def _ready() -> None:
+    """预热用的空任务"""
+
+
+def _sync_version(lottery: str, version: Hashable) -> None:
+    from services.draw_store import draw_store
+
+    previous = _worker_versions.get(lottery)
+    _worker_versions[lottery] = version
+    if previous is not None and previous != version:
+        draw_store.invalidate(lottery, notify=True)
+
+
+def run_in_session(fn: Callable, args: tuple, kwargs: dict,
+                   lottery: Optional[str] = None, version: Hashable = None) -> Any:
+    """打开只读会话执行 fn(db, *args, **kwargs)；lottery 给定时先按 version 同步内存数据"""
+    from database import ReadSessionLocal
+
+    if lottery is not None:
+        _sync_version(lottery, version)
+    db = ReadSessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+def render_json(value: Any) -> bytes:
+    """与 NumpyJSONResponse 相同的序列化；较大的结果在工作进程或线程池中调用，不阻塞事件循环"""
+    from services.json_response import dumps
+    return dumps(value)
+
+
+def call_service_json(db, service_cls, method: str, *args, **kwargs) -> bytes:
+    """service_cls(db).method(*args, **kwargs) 的结果序列化为 JSON 字节，主进程只需转发"""
+    return render_json(getattr(service_cls(db), method)(*args, **kwargs))
+
+
+# ---------- 主进程 ----------
+
+class ComputePool:
+    """带准入控制的进程池
+
+    workers 为 0 时在线程池中执行（不换进程，但排队与并发限制照常生效）。
+    """
+
+    def __init__(
+        self,
+        workers: int = COMPUTE_WORKERS,
+        queue_size: int = COMPUTE_QUEUE_SIZE,
+        default_limit: int = COMPUTE_DEFAULT_LIMIT,
+        limits: Optional[Dict[str, int]] = None,
+        start_method: str = COMPUTE_START_METHOD,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.default_limit = default_limit
+        self.limits = dict(COMPUTE_LIMITS if limits is None else limits)
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending = 0
+        self._running = 0
+        self._by_endpoint: Dict[str, Dict[str, Any]] = {}
+        self.rejected = 0
+        self.failures = 0
+        self.restarts = 0
+
+    @property
+    def capacity(self) -> int:
+        """同时在途（执行中 + 排队）的请求上限"""
+        return max(self.workers, 1) + self.queue_size
+
+    def limit_for(self, endpoint: str) -> int:
+        return self.limits.get(endpoint.rsplit("/", 1)[-1], self.default_limit)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_worker,
+                    initargs=(config.DATABASE_URL,),
+                )
+            return self._pool
+
+    def start(self) -> None:
+        """启动并预热工作进程（阻塞，应用启动时在线程中调用）"""
+        if self.workers <= 0:
+            return
+        pool = self._get_pool()
+        wait([pool.submit(_ready) for _ in range(self.workers)])
+        logger.info(f"分析进程池已启动: {self.workers} 个工作进程 ({self.start_method})")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _discard(self, pool: ProcessPoolExecutor) -> None:
+        """丢弃已损坏的进程池，下次提交时重建
+
+        仅当它仍是当前进程池时生效：旧进程池上较晚失败的请求不会关掉已重建的新进程池。"""
+        with self._lock:
+            if pool is not self._pool:
+                return
+            self._pool = None
+            self.restarts += 1
+        logger.error("分析进程池工作进程异常退出，将重建")
+        pool.shutdown(wait=False)
+
+    def _endpoint_stats(self, endpoint: str) -> Dict[str, Any]:
+        stats = self._by_endpoint.get(endpoint)
+        if stats is None:
+            stats = self._by_endpoint[endpoint] = {
+                "limit": self.limit_for(endpoint), "running": 0, "waiting": 0,
+                "completed": 0, "rejected": 0, "failed": 0, "total_ms": 0.0,
+            }
+        return stats
+
+    async def run(self, endpoint: str, fn: Callable, *args,
+                  lottery: Optional[str] = None, version: Hashable = None, local: bool = False, **kwargs) -> Any:
+        """在工作进程中执行 fn(db, *args, **kwargs)（fn 须为模块级函数，参数与结果可序列化）
+
+        Args:
+            endpoint: 接口名（如 ssq/kill），用于并发上限与统计
+            lottery: 所用数据的彩种；与 version 一起使工作进程的内存数据与主进程一致
+            version: 主进程当前的数据版本
+            local: 为 True 时在本进程的线程池中执行（预测类调用，拟合自行分发到预测进程池）
+
+        Raises:
+            ComputeRejected: 在途请求已达上限
+            ComputeUnavailable: 工作进程异常退出
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop is not self._loop:
+                # 信号量绑定事件循环；换了循环（如测试客户端重建）时重新创建
+                self._loop = loop
+                self._semaphores = {}
+            stats = self._endpoint_stats(endpoint)
+            if self._pending >= self.capacity:
+                self.rejected += 1
+                stats["rejected"] += 1
+                raise ComputeRejected(f"分析任务繁忙（在途 {self._pending}），请稍后重试")
+            self._pending += 1
+            stats["waiting"] += 1
+            semaphore = self._semaphores.get(endpoint)
+            if semaphore is None:
+                semaphore = self._semaphores[endpoint] = asyncio.Semaphore(self.limit_for(endpoint))
+
+        start = time.perf_counter()
+        acquired = False
+        try:
+            async with semaphore:
+                acquired = True
+                with self._lock:
+                    stats["waiting"] -= 1
+                    stats["running"] += 1
+                    self._running += 1
+                try:
+                    result = await self._submit(fn, args, kwargs, lottery, version, local)
+                finally:
+                    with self._lock:
+                        stats["running"] -= 1
+                        self._running -= 1
+            with self._lock:
+                stats["completed"] += 1
+                stats["total_ms"] += (time.perf_counter() - start) * 1000
+            return result
+        except Exception:
+            with self._lock:
+                stats["failed"] += 1
+                self.failures += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+                if not acquired:
+                    stats["waiting"] -= 1
+
+    async def _submit(self, fn: Callable, args: tuple, kwargs: dict,
+                      lottery: Optional[str], version: Hashable, local: bool) -> Any:
+        if local or self.workers <= 0:
+            return await run_in_threadpool(run_in_session, fn, args, kwargs)
+        pool = self._get_pool()
+        try:
+            future = pool.submit(run_in_session, fn, args, kwargs, lottery, version)
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool as e:
+            logger.warning(f"分析任务因工作进程异常退出而失败: {e}")
+            self._discard(pool)
+            raise ComputeUnavailable("分析工作进程异常退出，请重试") from e
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "mode": "process" if self.workers > 0 else "thread",
+                "capacity": self.capacity,
+                "pending": self._pending,
+                "running": self._running,
+                "rejected": self.rejected,
+                "failures": self.failures,
+                "restarts": self.restarts,
+                "endpoints": {
+                    name: {
+                        **{k: v for k, v in s.items() if k != "total_ms"},
+                        "avg_ms": round(s["total_ms"] / s["completed"], 1) if s["completed"] else 0.0,
+                    }
+                    for name, s in self._by_endpoint.items()
+                },
+            }
+
+
+compute_pool = ComputePool()
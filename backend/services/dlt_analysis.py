@@ -3,9 +3,9 @@
 """
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from collections import defaultdict
 
-from models.dlt import DLTResult
+from services.draw_store import draw_store
+from services.frequency_engine import position_stats
 
 
 class DLTAnalysisService:
@@ -21,68 +21,23 @@ class DLTAnalysisService:
         limit: Optional[int] = None,
     ) -> Dict:
         """获取每个位置每个数字的出现频率"""
-        query = self.db.query(DLTResult)
-        
-        if start_period:
-            query = query.filter(DLTResult.period >= start_period)
-        if end_period:
-            query = query.filter(DLTResult.period <= end_period)
-        
-        query = query.order_by(DLTResult.period.desc())
-        
-        if limit:
-            query = query.limit(limit)
-        
-        results = query.all()
-        total = len(results)
+        history = draw_store.get("dlt", self.db).select(
+            start_period=start_period,
+            end_period=end_period,
+            limit=limit,
+        )
+        total = len(history)
         
         if total == 0:
             return {"total": 0, "front_positions": [], "back_positions": []}
         
-        # 统计前区每个位置
-        front_counts = [defaultdict(int) for _ in range(5)]
-        back_counts = [defaultdict(int) for _ in range(2)]
-        
-        for r in results:
-            fronts = [r.front1, r.front2, r.front3, r.front4, r.front5]
-            backs = [r.back1, r.back2]
-            
-            for i, num in enumerate(fronts):
-                front_counts[i][num] += 1
-            for i, num in enumerate(backs):
-                back_counts[i][num] += 1
-        
-        # 转换为频率 - 前区
-        front_positions = []
-        for i in range(5):
-            position_data = []
-            for num in range(1, 36):  # 前区 1-35
-                count = front_counts[i].get(num, 0)
-                position_data.append({
-                    "number": num,
-                    "count": count,
-                    "frequency": round(count / total, 4) if total > 0 else 0,
-                })
-            front_positions.append({
-                "position": i + 1,
-                "stats": position_data,
-            })
+        # 由累计频次索引得到前区、后区每个位置的计数
+        counts = history.counts()
+        front_counts = counts[:5]
+        back_counts = counts[5:]
         
-        # 转换为频率 - 后区
-        back_positions = []
-        for i in range(2):
-            position_data = []
-            for num in range(1, 13):  # 后区 1-12
-                count = back_counts[i].get(num, 0)
-                position_data.append({
-                    "number": num,
-                    "count": count,
-                    "frequency": round(count / total, 4) if total > 0 else 0,
-                })
-            back_positions.append({
-                "position": i + 1,
-                "stats": position_data,
-            })
+        front_positions = position_stats(front_counts, total, 35)  # 前区 1-35
+        back_positions = position_stats(back_counts, total, 12)  # 后区 1-12
         
         return {
             "total": total,
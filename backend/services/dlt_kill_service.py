@@ -5,9 +5,9 @@ import logging
 from typing import List, Dict, Set, Tuple, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
 
-from models.dlt import DLTResult
+from services.draw_store import draw_store
+from services.kill_engine import numbers_mask, pack_bits, rank_method_combinations
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +60,19 @@ BACK_KILL_METHOD_NAMES = {
 }
 
 
+def last_year_period(period: str) -> Optional[str]:
+    """去年同一序号的期号 (期号格式: yyxxx，如 25005 = 2025年第5期)
+
+    期号格式不符或已是最早年份时返回 None
+    """
+    if len(period) != 5 or not period.isdigit():
+        return None
+    year = int(period[:2])
+    if year == 0:
+        return None
+    return f"{year - 1:02d}{period[2:]}"
+
+
 def get_zone(num: int) -> int:
     """获取号码所属分区 (1-5)"""
     if 1 <= num <= 7:
@@ -328,6 +341,10 @@ def get_back_kill_numbers(
 class DLTKillService:
     """大乐透杀号服务"""
     
+    # 方法组合分析的候选方法上限（全部 28 种前区方法）与搜索时间上限（秒）
+    MAX_COMBO_CANDIDATES = 28
+    COMBO_TIME_BUDGET = 2.0
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -345,25 +362,31 @@ class DLTKillService:
         page/page_size: 历史记录分页
         """
         # 获取历史数据
-        results = self.db.query(DLTResult).order_by(desc(DLTResult.period)).limit(lookback + 2).all()
+        history_data = draw_store.get("dlt", self.db).tail(lookback + 2)
         
-        if len(results) < 3:
+        if len(history_data) < 3:
             return {"error": "历史数据不足"}
         
-        # 转换数据格式
+        # 转换数据格式（最新在前）
         history = []
-        for r in results:
+        for period, row in zip(history_data.periods.tolist(), history_data.numbers.tolist()):
             history.append({
-                "period": r.period,
-                "front": [r.front1, r.front2, r.front3, r.front4, r.front5],
-                "back": [r.back1, r.back2],
+                "period": period,
+                "front": row[:5],
+                "back": row[5:],
             })
+        history.reverse()
         
         latest = history[0]
         prev = history[1]
         
+        # 一次性解析所有需要的去年同期数据（最新一期 + 回测各期的上一期）
+        last_years = self._get_last_year_same_periods(
+            [record["period"] for record in history[:lookback + 1]]
+        )
+        
         # 获取去年同期数据
-        last_year_data = self._get_last_year_same_period(latest["period"])
+        last_year_data = last_years.get(latest["period"])
         last_year_front = last_year_data["front"] if last_year_data else None
         
         # 计算下期杀号
@@ -392,7 +415,7 @@ class DLTKillService:
             prev_prev = history[i + 2]
             
             # 获取去年同期
-            last_year = self._get_last_year_same_period(prev_data["period"])
+            last_year = last_years.get(prev_data["period"])
             last_year_f = last_year["front"] if last_year else None
             
             # 计算杀号
@@ -554,28 +577,27 @@ class DLTKillService:
             }
         }
     
-    def _get_last_year_same_period(self, current_period: str) -> Optional[Dict]:
-        """获取去年同一期的数据"""
-        try:
-            # 期号格式: yyxxx (如 25005 = 2025年第5期)
-            year = int(current_period[:2])
-            seq = current_period[2:]
-            last_year_period = f"{year - 1:02d}{seq}"
-            
-            result = self.db.query(DLTResult).filter(
-                DLTResult.period == last_year_period
-            ).first()
-            
-            if result:
-                return {
-                    "period": result.period,
-                    "front": [result.front1, result.front2, result.front3, result.front4, result.front5],
-                    "back": [result.back1, result.back2]
-                }
-        except Exception as e:
-            logger.warning(f"获取去年同期数据失败: {e}")
-        
-        return None
+    def _get_last_year_same_periods(self, periods: List[str]) -> Dict[str, Optional[Dict]]:
+        """批量获取去年同一期的数据
+
+        由内存数据存储的期号索引一次解析，不逐期查询数据库。去年缺失该序号
+        （年份无数据或去年开奖期数较少）时对应值为 None。
+        """
+        full = draw_store.get("dlt", self.db)
+        lookup = full.period_lookup()
+        result = {}
+        for period in periods:
+            idx = lookup.get(last_year_period(period))
+            if idx is None:
+                result[period] = None
+                continue
+            row = full.numbers[idx].tolist()
+            result[period] = {
+                "period": full.periods[idx].item(),
+                "front": row[:5],
+                "back": row[5:],
+            }
+        return result
     
     def _analyze_method_combinations(
         self,
@@ -588,8 +610,6 @@ class DLTKillService:
         分析方法组合的效果
         找出成功率高且杀号多的最佳组合
         """
-        from itertools import combinations
-        
         # 获取成功率≥60%的方法作为候选
         candidate_methods = [m for m, s in front_stats.items() if s["success_rate"] >= 60]
         
@@ -597,59 +617,27 @@ class DLTKillService:
             candidate_methods = list(front_stats.keys())
         
         # 限制候选方法数量以控制计算量
-        if len(candidate_methods) > 15:
-            # 按效率排序，取前15个
+        if len(candidate_methods) > self.MAX_COMBO_CANDIDATES:
+            # 按效率排序，取前 MAX_COMBO_CANDIDATES 个
             sorted_methods = sorted(
                 candidate_methods, 
                 key=lambda m: front_stats[m]["efficiency"], 
                 reverse=True
-            )[:15]
+            )[:self.MAX_COMBO_CANDIDATES]
             candidate_methods = sorted_methods
         
-        combo_results = []
+        # 每种方法的历史成功期数位集、下期杀号掩码
+        success_bits = {
+            m: pack_bits([record["front_kills"][m]["success"] for record in history_records])
+            for m in candidate_methods
+        }
+        kill_masks = {m: numbers_mask(next_front_kills.get(m, [])) for m in candidate_methods}
         
-        # 评估不同大小的组合 (2-8个方法的组合)
-        for combo_size in range(2, min(9, len(candidate_methods) + 1)):
-            for combo in combinations(candidate_methods, combo_size):
-                # 计算这个组合在历史上的表现
-                combo_success_count = 0
-                
-                for record in history_records:
-                    # 检查组合中的所有方法是否都成功
-                    all_success = all(
-                        record["front_kills"].get(m, {}).get("success", False)
-                        for m in combo
-                    )
-                    if all_success:
-                        combo_success_count += 1
-                
-                # 计算组合的杀号数（去重）
-                combo_kills = set()
-                for m in combo:
-                    combo_kills.update(next_front_kills.get(m, []))
-                unique_kills = len(combo_kills)
-                
-                # 计算组合成功率
-                combo_success_rate = (combo_success_count / total_periods * 100) if total_periods > 0 else 0
-                
-                # 计算组合效率 = 成功率 × 杀号数 / 100
-                # 这样高成功率且杀号多的组合会排在前面
-                efficiency = combo_success_rate * unique_kills / 100
-                
-                combo_results.append({
-                    "methods": list(combo),
-                    "method_names": [FRONT_KILL_METHOD_NAMES.get(m, f"方法{m}") for m in combo],
-                    "success_rate": round(combo_success_rate, 2),
-                    "unique_kills": unique_kills,
-                    "kill_numbers": sorted(combo_kills),
-                    "efficiency": round(efficiency, 2),
-                    "method_count": len(combo),
-                })
-        
-        # 按效率排序，取前20个最佳组合
-        combo_results.sort(key=lambda x: (-x["efficiency"], -x["success_rate"], -x["unique_kills"]))
-        
-        return combo_results[:20]
+        # 评估不同大小的组合 (2-8个方法的组合)，分支定界取效率前20个最佳组合
+        return rank_method_combinations(
+            success_bits, kill_masks, candidate_methods, total_periods, FRONT_KILL_METHOD_NAMES,
+            top_k=20, min_size=2, max_size=8, time_budget=self.COMBO_TIME_BUDGET,
+        )
     
     def _generate_recommendations(
         self,
@@ -7,6 +7,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from models.dlt import DLTResult
+from services.draw_store import draw_store
+from services.sync_planner import sync_with_plan
+from services.bulk_upsert import bulk_upsert, bulk_upsert_stream, load_by_keys, format_upsert_message
 from sources.scraper.dlt_scraper import DLTScraper
 
 logger = logging.getLogger(__name__)
@@ -20,38 +23,8 @@ class DLTService:
         self.scraper = DLTScraper()
     
     async def sync_latest(self) -> dict:
-        """增量同步：只获取数据库中缺失的最新数据"""
-        latest_db = self.get_latest()
-        latest_period = latest_db.period if latest_db else "00000"
-        
-        # 先获取少量数据判断是否有新期
-        data = await self.scraper.fetch_by_count(10)
-        if not data:
-            return {"synced": 0, "message": "无法获取数据"}
-        
-        # 找出需要同步的期数
-        new_data = [d for d in data if d["period"] > latest_period]
-        
-        if not new_data:
-            return {"synced": 0, "message": "已是最新数据"}
-        
-        # 如果差距较大，获取更多数据
-        newest_period = max(d["period"] for d in data)
-        # 计算期号差距（大乐透期号格式: yyxxx）
-        try:
-            gap = int(newest_period[-3:]) - int(latest_period[-3:])
-            if newest_period[:2] != latest_period[:2]:
-                gap = 100  # 跨年
-        except:
-            gap = 10
-        
-        if gap > 10:
-            data = await self.scraper.fetch_by_count(min(gap + 5, 100))
-            new_data = [d for d in data if d["period"] > latest_period]
-        
-        # 保存新数据
-        saved = self._save_data(new_data)
-        return {"synced": len(saved), "message": f"已同步 {len(saved)} 期新数据"}
+        """增量同步：按开奖日历只获取库中最新一期之后应已开出的期号"""
+        return await sync_with_plan(self, "dlt")
     
     async def fetch_and_save(
         self,
@@ -59,44 +32,57 @@ class DLTService:
         count: Optional[int] = None,
         start_period: Optional[str] = None,
         end_period: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
     ) -> List[DLTResult]:
         """根据模式获取并保存大乐透数据"""
         if mode == "count" and count:
             data = await self.scraper.fetch_by_count(count)
         elif mode == "period" and start_period and end_period:
             data = await self.scraper.fetch_by_period(start_period, end_period)
+        elif mode == "date" and start_date and end_date:
+            data = await self.scraper.fetch_by_date(start_date, end_date)
         else:
             data = await self.scraper.fetch_by_count(30)
         
-        return self._save_data(data)
+        stats = self._save_data(data)
+        return load_by_keys(self.db, DLTResult, stats["periods"])
     
     async def refresh_all(self, count: int = 100) -> dict:
-        """全量刷新：获取指定期数的所有数据并更新数据库"""
-        data = await self.scraper.fetch_by_count(count)
-        saved = self._save_data(data)
-        return {"refreshed": len(saved), "message": f"已刷新 {len(saved)} 期数据"}
+        """全量刷新：边获取边分批写入数据库，内存占用与期数无关"""
+        stats = await bulk_upsert_stream(
+            self.db, DLTResult, self.scraper.stream_draws(count),
+            on_chunk=lambda rows, chunk_stats: draw_store.on_saved("dlt", rows, chunk_stats),
+        )
+        logger.info(f"已刷新 {stats['total']} 条大乐透数据")
+        return {
+            "refreshed": stats["total"],
+            "inserted": stats["inserted"],
+            "updated": stats["updated"],
+            "unchanged": stats["unchanged"],
+            "message": format_upsert_message("已刷新", stats),
+        }
     
-    def _save_data(self, data: List[dict]) -> List[DLTResult]:
-        """保存数据到数据库"""
-        saved_results = []
-        for item in data:
-            existing = self.db.query(DLTResult).filter(
-                DLTResult.period == item["period"]
-            ).first()
-            
-            if existing:
-                for key, value in item.items():
-                    setattr(existing, key, value)
-                saved_results.append(existing)
-            else:
-                result = DLTResult(**item)
-                self.db.add(result)
-                saved_results.append(result)
-        
-        self.db.commit()
-        logger.info(f"已保存 {len(saved_results)} 条大乐透数据")
-        return saved_results
+    def _save_data(self, data: List[dict]) -> dict:
+        """批量保存数据到数据库，返回新增/更新/未变计数"""
+        stats = bulk_upsert(self.db, DLTResult, data)
+        draw_store.on_saved("dlt", data, stats)
+        logger.info(f"已保存 {stats['total']} 条大乐透数据")
+        return stats
     
+    @staticmethod
+    def _filter(query, start_period: Optional[str] = None, end_period: Optional[str] = None):
+        """期号范围按整数排序键 draw_key 筛选；非数字期号仍按字符串比较"""
+        if start_period:
+            query = query.filter(
+                DLTResult.draw_key >= int(start_period) if start_period.isdigit() else DLTResult.period >= start_period
+            )
+        if end_period:
+            query = query.filter(
+                DLTResult.draw_key <= int(end_period) if end_period.isdigit() else DLTResult.period <= end_period
+            )
+        return query
+
     def get_all(
         self,
         limit: int = 100,
@@ -105,15 +91,9 @@ class DLTService:
         end_period: Optional[str] = None,
     ) -> List[DLTResult]:
         """获取大乐透数据（支持筛选）"""
-        query = self.db.query(DLTResult)
-        
-        if start_period:
-            query = query.filter(DLTResult.period >= start_period)
-        if end_period:
-            query = query.filter(DLTResult.period <= end_period)
-        
+        query = self._filter(self.db.query(DLTResult), start_period, end_period)
         return (
-            query.order_by(DLTResult.period.desc())
+            query.order_by(DLTResult.draw_key.desc())
             .offset(offset)
             .limit(limit)
             .all()
@@ -129,15 +109,8 @@ class DLTService:
         end_period: Optional[str] = None,
     ) -> int:
         """获取数据总数（支持筛选）"""
-        query = self.db.query(func.count(DLTResult.id))
-        
-        if start_period:
-            query = query.filter(DLTResult.period >= start_period)
-        if end_period:
-            query = query.filter(DLTResult.period <= end_period)
-        
-        return query.scalar()
+        return self._filter(self.db.query(func.count(DLTResult.id)), start_period, end_period).scalar()
     
     def get_latest(self) -> Optional[DLTResult]:
         """获取最新一期数据"""
-        return self.db.query(DLTResult).order_by(DLTResult.period.desc()).first()
+        return self.db.query(DLTResult).order_by(DLTResult.draw_key.desc()).first()
@@ -0,0 +1,273 @@
+"""
+开奖数据离线归档（.npz）
+每种彩票的全部历史导出为一个未压缩的 NumPy .npz 文件：号码矩阵每个号码占一个 uint8，
+期号、排序键、日期、星期编码按 DrawHistory 的列类型保存，其余数据库列按列单独保存。
+导入经 bulk_upsert 写库；未压缩的归档可直接内存映射为 DrawHistory 供分析使用，无需逐行解析。
+"""
+import io
+import json
+import logging
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.draw_columns import DERIVED_COLUMNS, weekday_code
+from services.bulk_upsert import bulk_upsert, DEFAULT_CHUNK_SIZE
+from services.draw_store import draw_store, DrawHistory, SPECS
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = "lottery-draws"
+ARCHIVE_VERSION = 1
+
+# 不导出的列：自增主键与时间戳由导入端的数据库生成
+_SKIP_COLUMNS = {"id", "created_at", "updated_at"}
+
+ArchiveSource = Union[str, Path, BinaryIO]
+
+
+def _extra_columns(spec) -> List[Any]:
+    """号码、期号、日期以外需要单独保存的列（六合彩的年份/期数由排序键还原，派生列导入时重新计算）"""
+    derived = {"period", spec.date_column, *spec.ball_columns, *DERIVED_COLUMNS}
+    if spec.name == "hk6":
+        derived |= {"year", "no"}
+    return [
+        col for col in spec.model.__table__.columns
+        if col.name not in _SKIP_COLUMNS and col.name not in derived
+    ]
+
+
+def _text_array(values: List[Optional[str]]) -> np.ndarray:
+    return np.array([v or "" for v in values], dtype=str) if values else np.array([], dtype="<U1")
+
+
+def _bytes_array(values: List[Optional[str]]) -> np.ndarray:
+    """仅供导入还原的文本列按 UTF-8 定长字节保存，比 Unicode 数组小约 3/4"""
+    encoded = [(v or "").encode("utf-8") for v in values]
+    return np.array(encoded, dtype=bytes) if encoded else np.array([], dtype="S1")
+
+
+def export_archive(db: Session, lottery: str, target: ArchiveSource, compress: bool = False) -> Dict[str, Any]:
+    """导出某一彩票的全部历史（按开奖先后正序）
+
+    Args:
+        db: 数据库会话
+        lottery: ssq / dlt / hk6
+        target: 文件路径或可写的二进制文件对象
+        compress: 是否压缩（压缩后体积更小，但加载时无法内存映射）
+
+    Returns:
+        归档元数据
+    """
+    spec = SPECS.get(lottery)
+    if spec is None:
+        raise ValueError(f"不支持的彩种: {lottery}")
+    model = spec.model
+    extras = _extra_columns(spec)
+    names = ["period", spec.date_column] + [c.name for c in extras]
+    if spec.name == "hk6":
+        names += ["year", "no"]
+    rows = db.execute(
+        select(*[getattr(model, n) for n in names + spec.ball_columns]).order_by(*spec.order_by())
+    ).all()
+
+    n_named = len(names)
+    columns = {name: [row[i] for row in rows] for i, name in enumerate(names)}
+    periods, dates = columns["period"], columns[spec.date_column]
+    if spec.name == "hk6":
+        sort_keys = [int(y) * 1000 + int(n) for y, n in zip(columns["year"], columns["no"])]
+    else:
+        sort_keys = [int(p) for p in periods]
+    weekday_hints = columns.get("weekday") or [None] * len(rows)
+
+    arrays: Dict[str, np.ndarray] = {
+        "periods": np.array(periods, dtype=np.int64) if spec.period_is_int else _text_array(periods),
+        "sort_keys": np.array(sort_keys, dtype=np.int64),
+        "dates": _text_array(dates),
+        "weekdays": np.array([weekday_code(d, w) for d, w in zip(dates, weekday_hints)], dtype=np.int8),
+        "numbers": np.array(
+            [[b or 0 for b in row[n_named:]] for row in rows], dtype=np.uint8
+        ).reshape(-1, len(spec.ball_columns)),
+    }
+    for col in extras:
+        values = columns[col.name]
+        if col.type.python_type is int:
+            arrays[f"col_{col.name}"] = np.array([v or 0 for v in values], dtype=np.int64)
+        else:
+            arrays[f"col_{col.name}"] = _bytes_array(values)
+        if any(v is None for v in values):
+            arrays[f"null_{col.name}"] = np.array([v is None for v in values], dtype=bool)
+
+    meta = {
+        "format": ARCHIVE_FORMAT,
+        "version": ARCHIVE_VERSION,
+        "lottery": lottery,
+        "count": len(rows),
+        "ball_columns": spec.ball_columns,
+        "columns": [c.name for c in extras],
+        "latest_period": str(periods[-1]) if periods else None,
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    arrays["meta"] = np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+
+    if isinstance(target, (str, Path)):
+        Path(target).parent.mkdir(parents=True, exist_ok=True)
+    (np.savez_compressed if compress else np.savez)(target, **arrays)
+    logger.info(f"{lottery} 已导出 {len(rows)} 期")
+    return meta
+
+
+def _mmap_member(path: Path, archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> Optional[np.ndarray]:
+    """将未压缩成员直接映射为只读数组；压缩成员返回 None"""
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with open(path, "rb") as f:
+        # 本地文件头固定 30 字节，其后为文件名与扩展字段
+        f.seek(info.header_offset + 26)
+        name_len, extra_len = np.frombuffer(f.read(4), dtype="<u2")
+        f.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        if dtype.hasobject:
+            return None
+        offset = f.tell()
+    if 0 in shape:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape,
+                     order="F" if fortran_order else "C")
+
+
+class DrawArchive:
+    """已打开的归档：arrays 为各列数组（路径来源且未压缩时为内存映射）"""
+
+    def __init__(self, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        self.meta = meta
+        self.arrays = arrays
+
+    @property
+    def lottery(self) -> str:
+        return self.meta["lottery"]
+
+    def __len__(self) -> int:
+        return len(self.arrays["periods"])
+
+    def history(self) -> DrawHistory:
+        """构建只读 DrawHistory：号码矩阵、排序键、星期编码为零拷贝视图"""
+        spec = SPECS[self.lottery]
+        a = self.arrays
+        return DrawHistory(
+            spec,
+            periods=a["periods"],
+            sort_keys=a["sort_keys"],
+            dates=a["dates"],
+            weekdays=a["weekdays"],
+            numbers=a["numbers"].view(np.int8),
+        )
+
+    def iter_rows(self):
+        """还原为与数据源一致的行字典（字段名同模型列名）"""
+        spec = SPECS[self.lottery]
+        a = self.arrays
+        periods = a["periods"].tolist()
+        dates = a["dates"].tolist()
+        numbers = a["numbers"].tolist()
+        sort_keys = a["sort_keys"].tolist()
+        extras = {}
+        for name in self.meta["columns"]:
+            values = a[f"col_{name}"].tolist()
+            if a[f"col_{name}"].dtype.kind == "S":
+                values = [v.decode("utf-8") for v in values]
+            extras[name] = (values, a[f"null_{name}"] if f"null_{name}" in a else None)
+        for i, period in enumerate(periods):
+            row = {"period": period, spec.date_column: dates[i]}
+            if spec.name == "hk6":
+                row["year"], row["no"] = divmod(sort_keys[i], 1000)
+            for name, (values, nulls) in extras.items():
+                row[name] = None if nulls is not None and nulls[i] else values[i]
+            for col, ball in zip(spec.ball_columns, numbers[i]):
+                row[col] = ball or None
+            yield row
+
+
+def open_archive(source: ArchiveSource, mmap: bool = True) -> DrawArchive:
+    """打开归档；source 为路径且 mmap=True 时未压缩的成员直接内存映射"""
+    path = Path(source) if isinstance(source, (str, Path)) else None
+    arrays: Dict[str, np.ndarray] = {}
+    with np.load(source, allow_pickle=False) as npz:
+        names = list(npz.files)
+        if path is not None and mmap:
+            with zipfile.ZipFile(path) as archive:
+                for name in names:
+                    array = _mmap_member(path, archive, archive.getinfo(f"{name}.npy"))
+                    if array is not None:
+                        arrays[name] = array
+        for name in names:
+            if name not in arrays:
+                arrays[name] = npz[name]
+
+    if "meta" not in arrays:
+        raise ValueError("不是开奖数据归档：缺少 meta")
+    meta = json.loads(bytes(arrays.pop("meta")).decode("utf-8"))
+    if meta.get("format") != ARCHIVE_FORMAT or meta.get("version") != ARCHIVE_VERSION:
+        raise ValueError(f"不支持的归档格式: {meta.get('format')} v{meta.get('version')}")
+    spec = SPECS.get(meta.get("lottery"))
+    if spec is None:
+        raise ValueError(f"不支持的彩种: {meta.get('lottery')}")
+    if meta["ball_columns"] != spec.ball_columns:
+        raise ValueError(f"{spec.name} 号码列与当前版本不一致: {meta['ball_columns']}")
+    return DrawArchive(meta, arrays)
+
+
+def load_history(source: ArchiveSource) -> DrawHistory:
+    """直接由归档文件得到内存映射的 DrawHistory（不经过数据库）"""
+    return open_archive(source).history()
+
+
+def import_archive(
+    db: Session,
+    source: ArchiveSource,
+    lottery: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """经 bulk_upsert 导入归档（已存在的期号按归档内容更新）
+
+    Args:
+        db: 数据库会话
+        source: 文件路径或二进制文件对象
+        lottery: 期望的彩种，给定时与归档不一致会报错
+        chunk_size: 每批写入行数
+    """
+    archive = open_archive(source)
+    if lottery and archive.lottery != lottery:
+        raise ValueError(f"归档彩种为 {archive.lottery}，与 {lottery} 不一致")
+    rows = list(archive.iter_rows())
+    spec = SPECS[archive.lottery]
+    stats = bulk_upsert(db, spec.model, rows, chunk_size=chunk_size)
+    draw_store.on_saved(archive.lottery, rows, stats)
+    logger.info(
+        f"{archive.lottery} 归档导入 {stats['total']} 期: "
+        f"新增 {stats['inserted']}，更新 {stats['updated']}"
+    )
+    return {
+        "lottery": archive.lottery,
+        "total": stats["total"],
+        "inserted": stats["inserted"],
+        "updated": stats["updated"],
+        "unchanged": stats["unchanged"],
+        "exported_at": archive.meta.get("exported_at"),
+    }
+
+
+def export_bytes(db: Session, lottery: str) -> bytes:
+    """导出到内存（API 下载使用）"""
+    buffer = io.BytesIO()
+    export_archive(db, lottery, buffer)
+    return buffer.getvalue()
@@ -0,0 +1,382 @@
+"""
+开奖数据内存列式存储
+进程级共享、读多写少：每种彩票的历史数据以连续 NumPy 矩阵（期数 × 位置）保存，
+并附带期号、日期、星期向量。_save_data 提交后增量刷新，分析与预测服务直接切片读取，
+无需经过 ORM。
+"""
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.ssq import SSQResult
+from models.dlt import DLTResult
+from models.hk6 import HK6Result
+from models.draw_columns import WEEKDAY_CODES
+from services.frequency_engine import FrequencyIndex, position_counts, INDEX_MAX_NUMBER
+
+logger = logging.getLogger(__name__)
+
+class DrawSpec:
+    """彩票数据列定义"""
+
+    def __init__(
+        self,
+        name: str,
+        model,
+        ball_columns: Sequence[str],
+        main_count: int,
+        date_column: str,
+        period_is_int: bool,
+    ):
+        self.name = name
+        self.model = model
+        self.ball_columns = list(ball_columns)
+        self.main_count = main_count  # 前 main_count 列为主号码，其余为蓝球/后区/特码
+        self.date_column = date_column
+        self.period_is_int = period_is_int
+
+    def sort_key(self, row: Dict[str, Any]) -> int:
+        """与数据库 draw_key 一致的整数排序键"""
+        return self.model.sort_key_of(row)
+
+    def period_bounds(self, period) -> Optional[Tuple[int, int]]:
+        """期号参数 -> 排序键闭区间（六合彩 "2025" 为整年），无法解析时为 None"""
+        return self.model.period_bounds(period)
+
+    def select_columns(self) -> list:
+        m = self.model
+        return [m.period, getattr(m, self.date_column), m.draw_key, m.weekday_code] + [
+            getattr(m, c) for c in self.ball_columns
+        ]
+
+    def order_by(self) -> list:
+        return [self.model.draw_key]
+
+    def after(self, head: "DrawHistory"):
+        """排序键大于当前最新一期的查询条件"""
+        return self.model.draw_key > int(head.sort_keys[-1])
+
+
+SPECS = {
+    "ssq": DrawSpec(
+        "ssq", SSQResult,
+        ["red1", "red2", "red3", "red4", "red5", "red6", "blue"],
+        main_count=6, date_column="date", period_is_int=True,
+    ),
+    "dlt": DrawSpec(
+        "dlt", DLTResult,
+        ["front1", "front2", "front3", "front4", "front5", "back1", "back2"],
+        main_count=5, date_column="sale_end_time", period_is_int=False,
+    ),
+    "hk6": DrawSpec(
+        "hk6", HK6Result,
+        ["num1", "num2", "num3", "num4", "num5", "num6", "special"],
+        main_count=6, date_column="date", period_is_int=False,
+    ),
+}
+
+
+class DrawHistory:
+    """某一彩票历史数据的只读快照（按开奖先后正序）
+
+    切片（tail / 连续期号范围）返回共享底层内存的视图；
+    非连续筛选（如按星期）返回副本。
+
+    由 DrawStore 创建的完整快照及其按星期筛选结果会缓存累计频次索引与派生列，
+    其连续切片的频次统计直接由索引相减得到。
+    """
+
+    def __init__(
+        self,
+        spec: DrawSpec,
+        periods: np.ndarray,
+        sort_keys: np.ndarray,
+        dates: np.ndarray,
+        weekdays: np.ndarray,
+        numbers: np.ndarray,
+        revision: int = 0,
+    ):
+        self.spec = spec
+        self.periods = periods
+        self.sort_keys = sort_keys
+        self.dates = dates
+        self.weekdays = weekdays
+        self.numbers = numbers
+        self.revision = revision
+        # 连续切片所属的可缓存快照及起始位置（自身可缓存时 _base 为 None）
+        self._base: Optional["DrawHistory"] = None
+        self._offset = 0
+        self._cacheable = False
+        self._index: Optional[FrequencyIndex] = None
+        self._derived: Dict[str, np.ndarray] = {}
+        self._weekday_views: Dict[int, "DrawHistory"] = {}
+        self._period_lookup: Optional[Dict[Any, int]] = None
+
+    @classmethod
+    def from_rows(cls, spec: DrawSpec, rows: List[tuple], revision: int = 0) -> "DrawHistory":
+        """由 select_columns() 查询结果构建"""
+        n_balls = len(spec.ball_columns)
+        periods, dates, weekdays, sort_keys, balls = [], [], [], [], []
+        for row in rows:
+            period, date = row[0], row[1] or ""
+            sort_keys.append(row[2])
+            weekdays.append(-1 if row[3] is None else row[3])
+            periods.append(period)
+            dates.append(date)
+            balls.append([b or 0 for b in row[-n_balls:]])
+
+        if spec.period_is_int:
+            period_arr = np.array(periods, dtype=np.int64)
+        else:
+            period_arr = np.array(periods, dtype=str) if periods else np.array([], dtype="<U1")
+        return cls(
+            spec,
+            periods=period_arr,
+            sort_keys=np.array(sort_keys, dtype=np.int64),
+            dates=np.array(dates, dtype=str) if dates else np.array([], dtype="<U1"),
+            weekdays=np.array(weekdays, dtype=np.int8),
+            numbers=np.array(balls, dtype=np.int8).reshape(-1, n_balls),
+            revision=revision,
+        )
+
+    def __len__(self) -> int:
+        return len(self.periods)
+
+    @property
+    def lottery(self) -> str:
+        return self.spec.name
+
+    @property
+    def main(self) -> np.ndarray:
+        """主号码矩阵视图（红球/前区/正码）"""
+        return self.numbers[:, :self.spec.main_count]
+
+    @property
+    def extra(self) -> np.ndarray:
+        """附加号码矩阵视图（蓝球/后区/特码）"""
+        return self.numbers[:, self.spec.main_count:]
+
+    @property
+    def latest_period(self):
+        return self.periods[-1].item() if len(self) else None
+
+    def column(self, name: str) -> np.ndarray:
+        """按列名取单列视图，如 red1 / back2 / special"""
+        return self.numbers[:, self.spec.ball_columns.index(name)]
+
+    def _slice(self, start: int, stop: int) -> "DrawHistory":
+        sliced = DrawHistory(
+            self.spec, self.periods[start:stop], self.sort_keys[start:stop],
+            self.dates[start:stop], self.weekdays[start:stop], self.numbers[start:stop],
+            self.revision,
+        )
+        if self._base is not None:
+            sliced._base, sliced._offset = self._base, self._offset + start
+        elif self._cacheable:
+            sliced._base, sliced._offset = self, start
+        return sliced
+
+    def _cached_root(self):
+        """返回 (可缓存快照, 本视图在其中的起始位置)，无则为 (None, 0)"""
+        if self._base is not None:
+            return self._base, self._offset
+        if self._cacheable:
+            return self, 0
+        return None, 0
+
+    def frequency_index(self) -> FrequencyIndex:
+        """本快照的累计频次索引（首次访问时构建）"""
+        if self._index is None:
+            self._index = FrequencyIndex.build(self.numbers)
+        return self._index
+
+    def counts(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """第 start..stop-1 期（默认全部）各位置号码出现次数
+
+        返回形状为 (列数, 50) 的矩阵，第 j 列为号码 j。
+        可缓存快照的连续切片由累计索引两行相减得到，其余情况直接 bincount。
+        """
+        stop = len(self) if stop is None else stop
+        root, offset = self._cached_root()
+        if root is None:
+            return position_counts(self.numbers[start:stop], INDEX_MAX_NUMBER)
+        return root.frequency_index().window(offset + start, offset + stop)
+
+    def derived(self, name: str, compute: Callable[["DrawHistory"], np.ndarray]) -> np.ndarray:
+        """按期派生的向量（如农历年），在可缓存快照上只计算一次"""
+        root, offset = self._cached_root()
+        if root is None:
+            return compute(self)
+        values = root._derived.get(name)
+        if values is None:
+            values = root._derived[name] = compute(root)
+        return values[offset:offset + len(self)]
+
+    def _take(self, mask: np.ndarray) -> "DrawHistory":
+        idx = np.flatnonzero(mask)
+        if len(idx) == 0:
+            return self._slice(0, 0)
+        if idx[-1] - idx[0] + 1 == len(idx):
+            return self._slice(int(idx[0]), int(idx[-1]) + 1)
+        return DrawHistory(
+            self.spec, self.periods[idx], self.sort_keys[idx],
+            self.dates[idx], self.weekdays[idx], self.numbers[idx], self.revision,
+        )
+
+    def period_lookup(self) -> Dict[Any, int]:
+        """期号 -> 行下标（首次访问时构建并缓存在本快照上）"""
+        if self._period_lookup is None:
+            self._period_lookup = {period: i for i, period in enumerate(self.periods.tolist())}
+        return self._period_lookup
+
+    def tail(self, n: Optional[int]) -> "DrawHistory":
+        """最近 n 期（视图）"""
+        if not n or n >= len(self):
+            return self
+        return self._slice(len(self) - n, len(self))
+
+    def period_range(self, start=None, end=None) -> "DrawHistory":
+        """期号范围筛选，与列表接口一致：可解析的期号按排序键比较，其他写法仍按期号字符串比较"""
+        if not start and not end:
+            return self
+        mask = np.ones(len(self), dtype=bool)
+        if start:
+            bounds = self.spec.period_bounds(start)
+            mask &= self.sort_keys >= bounds[0] if bounds else self.periods >= start
+        if end:
+            bounds = self.spec.period_bounds(end)
+            mask &= self.sort_keys <= bounds[1] if bounds else self.periods <= end
+        return self._take(mask)
+
+    def on_weekday(self, weekday: Optional[str]) -> "DrawHistory":
+        """按星期筛选 (二/四/日 等)"""
+        if not weekday:
+            return self
+        codes = {WEEKDAY_CODES[ch] for ch in weekday if ch in WEEKDAY_CODES}
+        if len(codes) != 1:
+            return self._slice(0, 0)
+        code = codes.pop()
+        if not self._cacheable:
+            return self._take(self.weekdays == code)
+        # 完整快照的星期筛选结果缓存下来，以便复用其频次索引
+        view = self._weekday_views.get(code)
+        if view is None:
+            view = self._take(self.weekdays == code)
+            if view._base is None:
+                view._cacheable = True
+            self._weekday_views[code] = view
+        return view
+
+    def select(
+        self,
+        weekday: Optional[str] = None,
+        start_period=None,
+        end_period=None,
+        limit: Optional[int] = None,
+    ) -> "DrawHistory":
+        """组合筛选：星期、期号范围后取最近 limit 期"""
+        return self.on_weekday(weekday).period_range(start_period, end_period).tail(limit)
+
+    def append(self, other: "DrawHistory", revision: int) -> "DrawHistory":
+        """追加新开奖，已构建的频次索引随之延长"""
+        history = DrawHistory(
+            self.spec,
+            np.concatenate([self.periods, other.periods]),
+            np.concatenate([self.sort_keys, other.sort_keys]),
+            np.concatenate([self.dates, other.dates]),
+            np.concatenate([self.weekdays, other.weekdays]),
+            np.concatenate([self.numbers, other.numbers]),
+            revision,
+        )
+        history._cacheable = self._cacheable
+        if self._index is not None:
+            history._index = self._index.extend(other.numbers)
+        return history
+
+
+class DrawStore:
+    """进程级开奖数据存储"""
+
+    _APPEND = "append"
+    _FULL = "full"
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._histories: Dict[str, DrawHistory] = {}
+        self._pending: Dict[str, str] = {}
+        self._revision = 0
+        self._listeners: List[Callable[[str], None]] = []
+
+    def get(self, lottery: str, db: Session) -> DrawHistory:
+        """获取最新快照，必要时从数据库加载或增量追加"""
+        with self._lock:
+            history = self._histories.get(lottery)
+            pending = self._pending.pop(lottery, None)
+            if history is not None and pending is None:
+                return history
+
+            spec = SPECS[lottery]
+            self._revision += 1
+            if history is None or pending == self._FULL or len(history) == 0:
+                rows = db.execute(select(*spec.select_columns()).order_by(*spec.order_by())).all()
+                history = DrawHistory.from_rows(spec, rows, self._revision)
+                history._cacheable = True
+                logger.info(f"{lottery} 数据已载入内存: {len(history)} 期")
+            else:
+                rows = db.execute(
+                    select(*spec.select_columns())
+                    .where(spec.after(history))
+                    .order_by(*spec.order_by())
+                ).all()
+                history = history.append(DrawHistory.from_rows(spec, rows), self._revision)
+                logger.info(f"{lottery} 内存数据追加 {len(rows)} 期")
+            self._histories[lottery] = history
+            return history
+
+    def subscribe(self, listener: Callable[[str], None]) -> None:
+        """注册数据变更回调：_save_data 写入新数据后以彩种名调用，用于清理派生缓存"""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def on_saved(self, lottery: str, rows: List[Dict[str, Any]], stats: Dict[str, Any]) -> None:
+        """_save_data 提交后调用：判断增量追加还是整体重建，并通知派生缓存"""
+        if not stats.get("inserted") and not stats.get("updated"):
+            return
+        with self._lock:
+            history = self._histories.get(lottery)
+            if history is not None:
+                spec = SPECS[lottery]
+                appended_only = (
+                    not stats.get("updated")
+                    and len(history) > 0
+                    and min(spec.sort_key(r) for r in rows) > history.sort_keys[-1]
+                )
+                if self._pending.get(lottery) != self._FULL:
+                    self._pending[lottery] = self._APPEND if appended_only else self._FULL
+        self._notify(lottery)
+
+    def _notify(self, lottery: str) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(lottery)
+            except Exception as e:
+                logger.error(f"{lottery} 数据变更回调失败: {e}")
+
+    def invalidate(self, lottery: Optional[str] = None, notify: bool = False) -> None:
+        """丢弃缓存，下次访问时整体重建；notify=True 时同时通知派生缓存（数据由其他进程写入时使用）"""
+        with self._lock:
+            names = [lottery] if lottery else list(self._histories)
+            for name in names:
+                self._histories.pop(name, None)
+                self._pending.pop(name, None)
+        if notify:
+            for name in names:
+                self._notify(name)
+
+
+draw_store = DrawStore()
@@ -0,0 +1,102 @@
+"""
+位置频率统计引擎
+对 期数 × 位置 的号码矩阵做一次 bincount，得到每个位置每个号码的出现次数；
+FrequencyIndex 保存逐期累计计数，任意连续窗口的直方图只需两行相减。
+"""
+from typing import Dict, List
+
+import numpy as np
+
+# 索引统一按最大号码 49（六合彩）分列，双色球/大乐透取前若干列即可
+INDEX_MAX_NUMBER = 49
+
+
+def position_counts(matrix: np.ndarray, max_number: int) -> np.ndarray:
+    """统计每个位置每个号码的出现次数
+
+    Args:
+        matrix: 期数 × 位置 的号码矩阵
+        max_number: 号码上限（如红球 33）
+
+    Returns:
+        形状为 (位置数, max_number + 1) 的计数矩阵，第 j 列为号码 j 的次数，
+        超出 1..max_number 范围的号码计入第 0 列
+    """
+    n_positions = matrix.shape[1] if matrix.ndim == 2 else 1
+    width = max_number + 1
+    values = matrix.reshape(-1, n_positions).astype(np.int64)
+    values = np.where((values >= 1) & (values <= max_number), values, 0)
+    offsets = np.arange(n_positions, dtype=np.int64) * width
+    flat = (values + offsets).ravel()
+    return np.bincount(flat, minlength=n_positions * width).reshape(n_positions, width)
+
+
+def number_stats(counts: np.ndarray, total: int, max_number: int) -> List[Dict]:
+    """将单个位置的计数转换为 [{number, count, frequency}, ...]"""
+    result = []
+    for num, count in enumerate(counts[1:max_number + 1].tolist(), start=1):
+        result.append({
+            "number": num,
+            "count": count,
+            "frequency": round(count / total, 4) if total > 0 else 0,
+        })
+    return result
+
+
+def position_stats(counts: np.ndarray, total: int, max_number: int) -> List[Dict]:
+    """将计数矩阵转换为 [{position, stats}, ...]"""
+    return [
+        {"position": i + 1, "stats": number_stats(row, total, max_number)}
+        for i, row in enumerate(counts)
+    ]
+
+
+class FrequencyIndex:
+    """逐期累计频次索引
+
+    cumulative[i, p, j] 为前 i 期第 p 个位置号码 j 的出现次数，
+    第 start 期到第 stop 期（不含）的直方图为 cumulative[stop] - cumulative[start]。
+    """
+
+    def __init__(self, cumulative: np.ndarray):
+        self.cumulative = cumulative
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, max_number: int = INDEX_MAX_NUMBER) -> "FrequencyIndex":
+        n, n_positions = matrix.shape
+        cumulative = np.zeros((n + 1, n_positions, max_number + 1), dtype=np.int32)
+        cls._accumulate(cumulative, matrix, max_number)
+        return cls(cumulative)
+
+    @staticmethod
+    def _accumulate(cumulative: np.ndarray, matrix: np.ndarray, max_number: int) -> None:
+        """将 matrix 的 one-hot 计数累加写入 cumulative[1:]（cumulative[0] 为起始值）"""
+        n, n_positions = matrix.shape
+        if n == 0:
+            return
+        values = matrix.astype(np.int64)
+        values = np.where((values >= 1) & (values <= max_number), values, 0)
+        onehot = cumulative[1:]
+        onehot[np.arange(n)[:, None], np.arange(n_positions)[None, :], values] = 1
+        onehot[0] += cumulative[0]
+        np.cumsum(onehot, axis=0, out=onehot)
+
+    def __len__(self) -> int:
+        return len(self.cumulative) - 1
+
+    @property
+    def max_number(self) -> int:
+        return self.cumulative.shape[2] - 1
+
+    def extend(self, matrix: np.ndarray) -> "FrequencyIndex":
+        """追加新开奖后的索引（旧索引保持不变）"""
+        if len(matrix) == 0:
+            return self
+        tail = np.zeros((len(matrix) + 1,) + self.cumulative.shape[1:], dtype=np.int32)
+        tail[0] = self.cumulative[-1]
+        self._accumulate(tail, matrix, self.max_number)
+        return FrequencyIndex(np.concatenate([self.cumulative, tail[1:]]))
+
+    def window(self, start: int, stop: int) -> np.ndarray:
+        """第 start..stop-1 期的 (位置数, max_number + 1) 计数矩阵"""
+        return self.cumulative[stop] - self.cumulative[start]
@@ -3,11 +3,12 @@
 """
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from collections import defaultdict
 from datetime import datetime
 
-from models.hk6 import HK6Result
+import numpy as np
+
+from services.draw_store import draw_store, DrawHistory
+from services.frequency_engine import position_stats
 
 # 波色映射（固定不变）
 RED_WAVE = [1, 2, 7, 8, 12, 13, 18, 19, 23, 24, 29, 30, 34, 35, 40, 45, 46]
@@ -74,12 +75,48 @@ def get_zodiac(num: int, lunar_year: int) -> str:
     return ZODIACS[zodiac_idx]
 
 
+# 波色顺序及号码 -> 波色下标（下标 0 为缺失号码）
+WAVES = ["red", "blue", "green"]
+WAVE_OF_NUMBER = np.array([WAVES.index(get_wave_color(num)) for num in range(50)])
+
+
+def _zodiac_indexes(lunar_year: int) -> np.ndarray:
+    """某农历年内号码 0-49 对应的生肖下标"""
+    return np.array([ZODIACS.index(get_zodiac(num, lunar_year)) for num in range(50)])
+
+
+def _lunar_years(history: DrawHistory) -> np.ndarray:
+    """每期开奖日期对应的农历年，日期无法解析时取期号年份"""
+    years = []
+    for date, year in zip(history.dates.tolist(), (history.sort_keys // 1000).tolist()):
+        try:
+            date_str = date.split("+")[0] if "+" in date else date
+            dt = datetime.strptime(date_str[:10], "%Y-%m-%d")
+            years.append(get_lunar_year(dt.year, dt.month, dt.day))
+        except ValueError:
+            years.append(year)
+    return np.array(years, dtype=np.int64)
+
+
 class HK6AnalysisService:
     """香港六合彩统计分析"""
     
     def __init__(self, db: Session):
         self.db = db
     
+    def _load(
+        self,
+        start_period: Optional[str] = None,
+        end_period: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> DrawHistory:
+        """从内存数据存储按条件取数（按开奖先后正序）"""
+        return draw_store.get("hk6", self.db).select(
+            start_period=start_period,
+            end_period=end_period,
+            limit=limit,
+        )
+    
     def get_number_frequency(
         self,
         start_period: Optional[str] = None,
@@ -93,46 +130,23 @@ class HK6AnalysisService:
             numbers: 1-49号码的统计数据
             positions: 每个位置的号码统计
         """
-        query = self.db.query(HK6Result)
-        
-        if start_period:
-            query = query.filter(HK6Result.period >= start_period)
-        if end_period:
-            query = query.filter(HK6Result.period <= end_period)
-        
-        query = query.order_by(HK6Result.year.desc(), HK6Result.no.desc())
-        
-        if limit:
-            query = query.limit(limit)
-        
-        results = query.all()
-        total = len(results)
+        history = self._load(start_period, end_period, limit)
+        total = len(history)
         
         if total == 0:
             return {"total": 0, "numbers": [], "positions": []}
         
-        # 统计每个号码的总出现次数
-        number_counts = defaultdict(int)
-        special_counts = defaultdict(int)
-        
-        # 统计每个位置的号码
-        position_counts = [defaultdict(int) for _ in range(6)]
-        
-        for r in results:
-            nums = [r.num1, r.num2, r.num3, r.num4, r.num5, r.num6]
-            for i, num in enumerate(nums):
-                number_counts[num] += 1
-                position_counts[i][num] += 1
-            
-            # 特码单独统计
-            special_counts[r.special] += 1
-            number_counts[r.special] += 1
+        # 由累计频次索引得到每个位置（正码 6 个 + 特码）的计数
+        counts = history.counts()
+        main_counts = counts[:6]
+        special_counts = counts[6]
+        number_counts = counts.sum(axis=0)
         
         # 转换为列表格式
         numbers = []
-        for num in range(1, 50):
-            count = number_counts.get(num, 0)
-            special = special_counts.get(num, 0)
+        for num, count, special in zip(
+            range(1, 50), number_counts[1:].tolist(), special_counts[1:].tolist()
+        ):
             numbers.append({
                 "number": num,
                 "count": count,
@@ -142,20 +156,7 @@ class HK6AnalysisService:
             })
         
         # 每个位置的统计
-        positions = []
-        for i in range(6):
-            pos_data = []
-            for num in range(1, 50):
-                count = position_counts[i].get(num, 0)
-                pos_data.append({
-                    "number": num,
-                    "count": count,
-                    "frequency": round(count / total, 4) if total > 0 else 0,
-                })
-            positions.append({
-                "position": i + 1,
-                "stats": pos_data,
-            })
+        positions = position_stats(main_counts, total, 49)
         
         return {
             "total": total,
@@ -170,48 +171,33 @@ class HK6AnalysisService:
         limit: Optional[int] = None,
     ) -> Dict:
         """获取波色统计"""
-        query = self.db.query(HK6Result)
-        
-        if start_period:
-            query = query.filter(HK6Result.period >= start_period)
-        if end_period:
-            query = query.filter(HK6Result.period <= end_period)
-        
-        query = query.order_by(HK6Result.year.desc(), HK6Result.no.desc())
-        
-        if limit:
-            query = query.limit(limit)
-        
-        results = query.all()
-        total = len(results)
+        history = self._load(start_period, end_period, limit)
+        total = len(history)
         
         if total == 0:
             return {"total": 0, "wave_stats": {}, "special_wave": {}, "history": []}
         
-        # 统计所有号码的波色
-        wave_counts = {"red": 0, "blue": 0, "green": 0}
-        special_wave_counts = {"red": 0, "blue": 0, "green": 0}
+        # 由累计频次索引按号码计数，再按波色汇总
+        counts = history.counts()
+        main_counts = counts[:6].sum(axis=0)
+        wave_counts = {wave: int(main_counts[WAVE_OF_NUMBER == i].sum()) for i, wave in enumerate(WAVES)}
+        special_wave_counts = {wave: int(counts[6][WAVE_OF_NUMBER == i].sum()) for i, wave in enumerate(WAVES)}
         
-        history = []
+        latest = history.tail(20)
+        rows = zip(latest.periods.tolist(), latest.dates.tolist(), latest.numbers.tolist())
+        recent = []
         
-        for r in results:
-            nums = [r.num1, r.num2, r.num3, r.num4, r.num5, r.num6]
+        # 最近 20 期按期号倒序（最新在前）
+        for period, date, row in reversed(list(rows)):
             period_waves = {"red": 0, "blue": 0, "green": 0}
+            for num in row[:6]:
+                period_waves[get_wave_color(num)] += 1
             
-            for num in nums:
-                wave = get_wave_color(num)
-                wave_counts[wave] += 1
-                period_waves[wave] += 1
-            
-            # 特码波色
-            special_wave = get_wave_color(r.special)
-            special_wave_counts[special_wave] += 1
-            
-            history.append({
-                "period": r.period,
-                "date": r.date,
+            recent.append({
+                "period": period,
+                "date": date,
                 "waves": period_waves,
-                "special_wave": special_wave,
+                "special_wave": get_wave_color(row[6]),
             })
         
         total_balls = total * 6
@@ -246,7 +232,7 @@ class HK6AnalysisService:
                     "frequency": round(special_wave_counts["green"] / total, 4) if total > 0 else 0,
                 },
             },
-            "history": history[:20],  # 只返回最近20期
+            "history": recent,  # 只返回最近20期
         }
     
     def get_zodiac_stats(
@@ -256,56 +242,39 @@ class HK6AnalysisService:
         limit: Optional[int] = None,
     ) -> Dict:
         """获取生肖统计"""
-        query = self.db.query(HK6Result)
-        
-        if start_period:
-            query = query.filter(HK6Result.period >= start_period)
-        if end_period:
-            query = query.filter(HK6Result.period <= end_period)
-        
-        query = query.order_by(HK6Result.year.desc(), HK6Result.no.desc())
-        
-        if limit:
-            query = query.limit(limit)
-        
-        results = query.all()
-        total = len(results)
+        history = self._load(start_period, end_period, limit)
+        total = len(history)
         
         if total == 0:
             return {"total": 0, "zodiac_stats": [], "special_zodiac": [], "history": []}
         
-        # 统计所有号码的生肖
-        zodiac_counts = defaultdict(int)
-        special_zodiac_counts = defaultdict(int)
-        
-        history = []
-        
-        for r in results:
-            # 解析日期获取农历年
-            try:
-                date_str = r.date.split("+")[0] if "+" in r.date else r.date
-                dt = datetime.strptime(date_str[:10], "%Y-%m-%d")
-                lunar_year = get_lunar_year(dt.year, dt.month, dt.day)
-            except:
-                lunar_year = r.year
-            
-            nums = [r.num1, r.num2, r.num3, r.num4, r.num5, r.num6]
-            period_zodiacs = defaultdict(int)
-            
-            for num in nums:
-                zodiac = get_zodiac(num, lunar_year)
-                zodiac_counts[zodiac] += 1
-                period_zodiacs[zodiac] += 1
-            
-            # 特码生肖
-            special_zodiac = get_zodiac(r.special, lunar_year)
-            special_zodiac_counts[special_zodiac] += 1
-            
-            history.append({
-                "period": r.period,
-                "date": r.date,
-                "special": r.special,
-                "special_zodiac": special_zodiac,
+        # 同一农历年内号码与生肖的对应固定，按农历年分段由累计频次索引取计数
+        lunar_years = history.derived("lunar_year", _lunar_years)
+        zodiac_counts = np.zeros(len(ZODIACS), dtype=np.int64)
+        special_zodiac_counts = np.zeros(len(ZODIACS), dtype=np.int64)
+        bounds = [0, *(np.flatnonzero(np.diff(lunar_years)) + 1).tolist(), total]
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            counts = history.counts(start, stop)
+            zodiac_of_number = _zodiac_indexes(int(lunar_years[start]))
+            np.add.at(zodiac_counts, zodiac_of_number, counts[:6].sum(axis=0))
+            np.add.at(special_zodiac_counts, zodiac_of_number, counts[6])
+        
+        latest = history.tail(20)
+        rows = zip(
+            latest.periods.tolist(),
+            latest.dates.tolist(),
+            lunar_years[total - len(latest):].tolist(),
+            latest.numbers.tolist(),
+        )
+        recent = []
+        
+        # 最近 20 期按期号倒序（最新在前）
+        for period, date, lunar_year, row in reversed(list(rows)):
+            recent.append({
+                "period": period,
+                "date": date,
+                "special": row[6],
+                "special_zodiac": get_zodiac(row[6], lunar_year),
             })
         
         total_balls = total * 6
@@ -314,21 +283,21 @@ class HK6AnalysisService:
         zodiac_stats = []
         special_zodiac_stats = []
         
-        for zodiac in ZODIACS:
+        for zodiac, count, special in zip(ZODIACS, zodiac_counts.tolist(), special_zodiac_counts.tolist()):
             zodiac_stats.append({
                 "zodiac": zodiac,
-                "count": zodiac_counts.get(zodiac, 0),
-                "frequency": round(zodiac_counts.get(zodiac, 0) / total_balls, 4) if total_balls > 0 else 0,
+                "count": count,
+                "frequency": round(count / total_balls, 4) if total_balls > 0 else 0,
             })
             special_zodiac_stats.append({
                 "zodiac": zodiac,
-                "count": special_zodiac_counts.get(zodiac, 0),
-                "frequency": round(special_zodiac_counts.get(zodiac, 0) / total, 4) if total > 0 else 0,
+                "count": special,
+                "frequency": round(special / total, 4) if total > 0 else 0,
             })
         
         return {
             "total": total,
             "zodiac_stats": zodiac_stats,
             "special_zodiac": special_zodiac_stats,
-            "history": history[:20],
+            "history": recent,
         }
@@ -0,0 +1,279 @@
+"""
+HTTP 响应缓存（ETag / Last-Modified）
+开奖数据每周只更新几次，前端却在轮询列表与分析接口。
+以 (彩种, 最新期号, 数据最后修改时间, 路径, 规范化的查询参数) 生成 ETag：
+  - 请求带 If-None-Match / If-Modified-Since 且未变化时直接返回 304，不查库、不做分析
+  - 否则命中内存 LRU 时直接返回保存的响应体
+  - 未命中时照常交给内层处理（并发的相同请求由内层的 single_flight 中间件合并，与本缓存是否启用无关）
+  - _save_data 写入新数据后（draw_store.subscribe）按彩种失效
+数据版本按彩种保存在内存中，失效或超过 HTTP_CACHE_VERSION_TTL 后才重新查询（最新期号、最后修改时间与行数）。
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.dependencies.utils import get_flat_dependant
+from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+
+from config import HTTP_CACHE_ENABLED, HTTP_CACHE_SIZE, HTTP_CACHE_MAX_BODY, HTTP_CACHE_VERSION_TTL
+from services.draw_store import draw_store, SPECS
+
+logger = logging.getLogger(__name__)
+
+# 结果与开奖数据无关（按当前时间/随机生成）或反映运行状态的接口，不参与缓存
+_UNCACHED_SEGMENTS = {"metaphysical", "scraper-stats"}
+
+
+class DataVersion:
+    """某一彩种的数据版本"""
+
+    def __init__(self, lottery: str, period: Any, last_modified: Optional[datetime], count: int, generation: int):
+        self.lottery = lottery
+        self.period = period
+        self.last_modified = last_modified
+        self.count = count
+        self.generation = generation
+        self.loaded_at = time.monotonic()
+
+    @property
+    def token(self) -> tuple:
+        """可跨进程传递的版本标识（不含本进程内的失效代数）"""
+        return (self.period, self.last_modified.isoformat() if self.last_modified else None, self.count)
+
+
+class CachedResponse:
+    def __init__(self, lottery: str, body: bytes, headers: Dict[str, str]):
+        self.lottery = lottery
+        self.body = body
+        self.headers = headers
+
+
+def lottery_for(path: str) -> Optional[str]:
+    """/api/{彩种}/... 与 /api/analysis/{彩种}/... 对应的彩种，其余路径返回 None"""
+    parts = [p for p in path.split("/") if p]
+    if len(parts) < 2 or parts[0] != "api":
+        return None
+    if parts[1] == "analysis":
+        parts = parts[1:]
+    if len(parts) < 2 or parts[1] not in SPECS:
+        return None
+    if _UNCACHED_SEGMENTS.intersection(parts):
+        return None
+    return parts[1]
+
+
+def normalized_query(request: Request) -> list:
+    """按路由声明的查询参数规范化：缺省的参数补上默认值，未声明的参数忽略
+
+    使 ?lookback=2000 与 ?lookback=2000&page=1 这类等价请求得到同一 ETag 与同一合并计算键。
+    找不到路由时退回按名称排序的原始参数。
+    """
+    params = request.query_params
+    for route in request.app.router.routes:
+        dependant = getattr(route, "dependant", None)
+        if dependant is None:
+            continue
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            items = []
+            for field in get_flat_dependant(dependant).query_params:
+                if field.alias in params:
+                    items.append([field.alias, params.getlist(field.alias)])
+                elif field.default is not None:
+                    items.append([field.alias, [str(field.default)]])
+            return sorted(items)
+    return sorted(params.multi_items())
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 比较（弱比较，忽略 W/ 前缀）"""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """按数据版本校验的 GET 响应缓存"""
+
+    def __init__(
+        self,
+        max_entries: int = HTTP_CACHE_SIZE,
+        max_body: int = HTTP_CACHE_MAX_BODY,
+        version_ttl: float = HTTP_CACHE_VERSION_TTL,
+        enabled: bool = HTTP_CACHE_ENABLED,
+    ):
+        self.max_entries = max_entries
+        self.max_body = max_body
+        self.version_ttl = version_ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._versions: Dict[str, DataVersion] = {}
+        self._generations: Dict[str, int] = {}
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.not_modified = 0
+        self.hits = 0
+        self.misses = 0
+        self.version_loads = 0
+        self.invalidations = 0
+
+    # ---------- 数据版本 ----------
+
+    def _load_version(self, lottery: str, generation: int) -> DataVersion:
+        from database import ReadSessionLocal
+
+        model = SPECS[lottery].model
+        db = ReadSessionLocal()
+        try:
+            period = db.query(model.period).order_by(model.draw_key.desc()).limit(1).scalar()
+            last_modified, count = db.query(func.max(model.updated_at), func.count(model.id)).one()
+        finally:
+            db.close()
+        if last_modified is not None:
+            # SQLite 的 CURRENT_TIMESTAMP 为 UTC
+            last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+        return DataVersion(lottery, period, last_modified, count, generation)
+
+    def version(self, lottery: str) -> DataVersion:
+        """当前数据版本；已失效或超过 version_ttl 时查库重新获取"""
+        with self._lock:
+            current = self._versions.get(lottery)
+            generation = self._generations.get(lottery, 0)
+        if current is not None and time.monotonic() - current.loaded_at < self.version_ttl:
+            return current
+
+        loaded = self._load_version(lottery, generation)
+        with self._lock:
+            self.version_loads += 1
+            if self._generations.get(lottery, 0) == generation:
+                self._versions[lottery] = loaded
+        return loaded
+
+    def invalidate(self, lottery: Optional[str] = None) -> None:
+        """清除指定彩种（默认全部）的数据版本与响应"""
+        with self._lock:
+            names = [lottery] if lottery else list(set(self._versions) | set(SPECS))
+            for name in names:
+                self._versions.pop(name, None)
+                self._generations[name] = self._generations.get(name, 0) + 1
+            for key in [k for k, v in self._entries.items() if lottery is None or v.lottery == lottery]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    # ---------- 响应 ----------
+
+    @staticmethod
+    def make_etag(version: DataVersion, request: Request) -> str:
+        query = normalized_query(request)
+        raw = json.dumps([
+            version.lottery, str(version.period),
+            version.last_modified.isoformat() if version.last_modified else None,
+            version.count, request.url.path, query,
+        ], ensure_ascii=False)
+        digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+        return f'"{version.lottery}-{version.period}-{digest}"'
+
+    @staticmethod
+    def _is_not_modified(request: Request, etag: str, version: DataVersion) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # 两者同时存在时以 If-None-Match 为准
+            return _etag_matches(if_none_match, etag)
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and version.last_modified is not None:
+            try:
+                return version.last_modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def _validators(etag: str, version: DataVersion) -> Dict[str, str]:
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if version.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(version.last_modified, usegmt=True)
+        return headers
+
+    def _get(self, etag: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(etag)
+            self.hits += 1
+            return entry
+
+    def _put(self, etag: str, entry: CachedResponse, version: DataVersion) -> bool:
+        """保存响应；计算期间数据已变化时不保存，返回 False"""
+        with self._lock:
+            if self._generations.get(version.lottery, 0) != version.generation:
+                return False
+            if len(entry.body) <= self.max_body:
+                self._entries[etag] = entry
+                self._entries.move_to_end(etag)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return True
+
+    async def middleware(self, request: Request, call_next):
+        """HTTP 中间件：条件请求返回 304，命中缓存直接返回响应体"""
+        lottery = lottery_for(request.url.path) if self.enabled and request.method == "GET" else None
+        if lottery is None:
+            return await call_next(request)
+
+        version = await run_in_threadpool(self.version, lottery)
+        etag = self.make_etag(version, request)
+        validators = self._validators(etag, version)
+        if self._is_not_modified(request, etag, version):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status_code=304, headers=validators)
+
+        cached = self._get(etag)
+        if cached is not None:
+            return Response(content=cached.body, status_code=200, headers={**cached.headers, **validators})
+
+        response = await call_next(request)
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+        if response.status_code == 200 and self._put(etag, CachedResponse(lottery, body, dict(headers)), version):
+            headers = {**headers, **validators}
+        return Response(content=body, status_code=response.status_code, headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.not_modified
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "not_modified": self.not_modified,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.not_modified) / lookups, 4) if lookups else 0.0,
+                "version_loads": self.version_loads,
+                "invalidations": self.invalidations,
+                "versions": {
+                    name: {
+                        "latest_period": v.period,
+                        "last_modified": v.last_modified.isoformat() if v.last_modified else None,
+                        "count": v.count,
+                    }
+                    for name, v in self._versions.items()
+                },
+            }
+
+
+response_cache = ResponseCache()
+draw_store.subscribe(response_cache.invalidate)
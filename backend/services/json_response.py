@@ -0,0 +1,38 @@
+"""
+JSON 序列化（orjson）
+杀号分析、六合彩频率/生肖统计与全方法预测的结果是多层嵌套的大对象。
+FastAPI 默认先用 jsonable_encoder 逐层复制一遍，再交给标准库 json，两步都在 Python 中逐个对象处理。
+这里改用 orjson 一次输出字节，并直接处理 NumPy 数组与标量（无需先 tolist / to_native）：
+  - dumps(): 供工作进程与线程池序列化分析结果
+  - NumpyJSONResponse: 分析路由的响应类；处理函数直接返回它时跳过 jsonable_encoder
+与标准库的差异：NaN / Infinity 输出为 null（标准库 JSONResponse 会直接报错）。
+"""
+from typing import Any
+
+import numpy as np
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """orjson 不直接支持的类型：非连续或特殊 dtype 的数组、其余 NumPy 标量，其他交给 jsonable_encoder"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return jsonable_encoder(value)
+
+
+def dumps(value: Any) -> bytes:
+    """序列化为 UTF-8 JSON 字节（紧凑格式，中文不转义）"""
+    return orjson.dumps(value, default=_default, option=_OPTIONS)
+
+
+class NumpyJSONResponse(JSONResponse):
+    """基于 orjson 的 JSON 响应，内容可包含 NumPy 数组与标量"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,210 @@
+"""
+杀号回测位掩码工具
+号码集合用 uint64 位掩码表示（第 n 位对应号码 n，适用于 1-63），
+杀号成功即 kill_mask & draw_mask == 0，可对 期数 × 方法 矩阵整体计算。
+"""
+import bisect
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_ONE = np.uint64(1)
+
+
+def number_bits(max_number: int) -> np.ndarray:
+    """号码 0..max_number 对应的单个位掩码，超出 1..max_number 的号码为 0"""
+    bits = np.left_shift(_ONE, np.arange(max_number + 1, dtype=np.uint64))
+    bits[0] = 0
+    return bits
+
+
+def single_mask(values: np.ndarray, max_number: int) -> np.ndarray:
+    """每期一个杀号：值在 1..max_number 内时为该号码的位，否则为空集"""
+    values = np.asarray(values, dtype=np.int64)
+    valid = (values >= 1) & (values <= max_number)
+    return np.where(valid, number_bits(max_number)[np.where(valid, values, 0)], np.uint64(0))
+
+
+def rows_mask(matrix: np.ndarray, max_number: int) -> np.ndarray:
+    """每行号码集合的位掩码（超出范围的号码忽略）"""
+    bits = number_bits(max_number)
+    values = np.asarray(matrix, dtype=np.int64)
+    values = np.where((values >= 1) & (values <= max_number), values, 0)
+    return np.bitwise_or.reduce(bits[values], axis=1)
+
+
+def tail_masks(max_number: int) -> np.ndarray:
+    """尾数 0-9 对应的号码集合掩码（如尾数 3 -> 3, 13, 23, 33）"""
+    bits = number_bits(max_number)  # bits[0] 为 0，尾数 0 即 10, 20, 30
+    return np.array([np.bitwise_or.reduce(bits[t::10]) for t in range(10)], dtype=np.uint64)
+
+
+if hasattr(np, "bitwise_count"):
+    def popcount(masks: np.ndarray) -> np.ndarray:
+        """逐元素统计置位数"""
+        return np.bitwise_count(np.asarray(masks, dtype=np.uint64)).astype(np.int64)
+else:
+    def popcount(masks: np.ndarray) -> np.ndarray:
+        """逐元素统计置位数（SWAR，兼容 NumPy < 2.0）"""
+        x = np.asarray(masks, dtype=np.uint64)
+        x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+        x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+        x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+        return ((x * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
+
+def mask_to_numbers(mask: int) -> List[int]:
+    """位掩码转升序号码列表"""
+    mask = int(mask)
+    numbers = []
+    while mask:
+        low = mask & -mask
+        numbers.append(low.bit_length() - 1)
+        mask ^= low
+    return numbers
+
+
+def pack_bits(flags) -> int:
+    """布尔序列打包为 Python 整数位集（第 i 位对应第 i 个元素）"""
+    packed = np.packbits(np.asarray(flags, dtype=bool), bitorder="little")
+    return int.from_bytes(packed.tobytes(), "little")
+
+
+def numbers_mask(numbers) -> int:
+    """号码列表转 Python 整数位掩码"""
+    mask = 0
+    for n in numbers:
+        mask |= 1 << n
+    return mask
+
+
+def rank_method_combinations(
+    success_bits: Dict[int, int],
+    kill_masks: Dict[int, int],
+    candidates: List[int],
+    total_periods: int,
+    method_names: Dict[int, str],
+    top_k: Optional[int] = 20,
+    min_size: int = 2,
+    max_size: int = 8,
+    time_budget: Optional[float] = None,
+) -> List[Dict]:
+    """杀号方法组合排名
+
+    每种方法的历史成功情况为期数位集，组合的成功期数即各位集按位与后的置位数，
+    组合杀号为各方法下期杀号掩码的并集。组合按候选顺序深度优先逐个追加方法，
+    子组合的位集与掩码直接由父组合扩展得到。
+
+    top_k 不为 None 时使用分支定界：由子组合与各剩余方法的交集成功期数、
+    剩余方法可新增的杀号数估计子树的效率上界，低于第 top_k 名时整棵子树剪掉，
+    结果与完整枚举后取前 top_k 名相同。
+
+    排序与逐一枚举 itertools.combinations 后按 (效率, 成功率, 杀号数) 稳定排序一致。
+
+    Args:
+        success_bits: 方法 -> 历史成功期数位集
+        kill_masks: 方法 -> 下期杀号掩码
+        candidates: 候选方法（顺序决定同分时的先后）
+        total_periods: 回测期数
+        method_names: 方法名称
+        top_k: 返回前几名，None 表示返回全部组合
+        min_size / max_size: 组合方法数范围
+        time_budget: 搜索时间上限（秒），超时后不再展开新的子树，返回已找到的最优结果
+
+    Returns:
+        [{methods, method_names, success_rate, unique_kills, kill_numbers, efficiency, method_count}, ...]
+    """
+    n = len(candidates)
+    bits = [success_bits.get(m, 0) for m in candidates]
+    kills = [kill_masks.get(m, 0) for m in candidates]
+    pruning = top_k is not None
+
+    ranked: List[tuple] = []  # 按排序键升序
+    path: List[int] = []
+    # 剪枝阈值（以 成功期数 × 杀号数 计）：低于它的组合四舍五入后的效率必定低于第 top_k 名
+    floor = [-1.0]
+
+    def score(success_count: int, kill_count: int) -> Tuple[float, float]:
+        rate = (success_count / total_periods * 100) if total_periods > 0 else 0
+        return round(rate * kill_count / 100, 2), round(rate, 2)
+
+    def record(success_count: int, kill_count: int, killed: int) -> None:
+        if pruning and success_count * kill_count < floor[0]:
+            return
+        efficiency, rate = score(success_count, kill_count)
+        key = (-efficiency, -rate, -kill_count, len(path), tuple(path), killed)
+        if not pruning:
+            ranked.append(key)
+        elif len(ranked) < top_k or key < ranked[-1]:
+            bisect.insort(ranked, key)
+            del ranked[top_k:]
+            if len(ranked) == top_k:
+                floor[0] = (-ranked[-1][0] - 0.006) * total_periods
+
+    def descendant_bound(counts: List[int], gains: List[int], kill_count: int, slots: int) -> int:
+        """追加 1..slots 个方法后 成功期数 × 杀号数 的上界
+
+        追加的方法中成功期数最少者不超过其与当前组合的交集，按交集从大到小取前 p 个，
+        新增杀号数不超过其中最大的 slots 个增量之和。
+        """
+        best: List[int] = []
+        bound = 0
+        for count, gain in sorted(zip(counts, gains), reverse=True):
+            bisect.insort(best, gain)
+            if len(best) > slots:
+                del best[0]
+            bound = max(bound, count * (kill_count + sum(best)))
+        return bound
+
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    timed_out = [False]
+
+    def visit(start: int, killed: int, child_bits: List[int]) -> None:
+        size = len(path) + 1  # 子组合的方法数
+        if deadline is not None and time.perf_counter() > deadline:
+            timed_out[0] = True
+            return
+        for i in range(start, n):
+            success = child_bits[i - start]
+            child_killed = killed | kills[i]
+            success_count = success.bit_count()
+            kill_count = child_killed.bit_count()
+            path.append(i)
+            if size >= min_size:
+                record(success_count, kill_count, child_killed)
+            if size < max_size and i + 1 < n:
+                slots = max_size - size
+                grand_bits = [success & bits[j] for j in range(i + 1, n)]
+                expand = True
+                if pruning and len(ranked) >= top_k:
+                    counts = [g.bit_count() for g in grand_bits]
+                    gains = [(kills[j] & ~child_killed).bit_count() for j in range(i + 1, n)]
+                    expand = descendant_bound(counts, gains, kill_count, slots) >= floor[0]
+                if expand:
+                    visit(i + 1, child_killed, grand_bits)
+            path.pop()
+
+    all_periods = (1 << max(total_periods, 0)) - 1
+    visit(0, 0, [all_periods & b for b in bits])
+    if not pruning:
+        ranked.sort()
+    if timed_out[0]:
+        logger.warning(f"方法组合搜索超过 {time_budget}s，返回部分结果（候选 {n} 种）")
+
+    results = []
+    for neg_eff, neg_rate, neg_kills, size, indexes, killed in ranked:
+        methods = [candidates[i] for i in indexes]
+        results.append({
+            "methods": methods,
+            "method_names": [method_names.get(m, f"方法{m}") for m in methods],
+            "success_rate": -neg_rate,
+            "unique_kills": -neg_kills,
+            "kill_numbers": mask_to_numbers(killed),
+            "efficiency": -neg_eff,
+            "method_count": size,
+        })
+    return results
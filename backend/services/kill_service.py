@@ -5,8 +5,14 @@
 import logging
 import random
 from typing import List, Dict, Set, Tuple
+
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+
+from services.draw_store import draw_store
+from services.kill_engine import (
+    numbers_mask, pack_bits, popcount, rank_method_combinations, rows_mask, single_mask, tail_masks,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -177,9 +183,92 @@ def get_blue_kill_numbers(blue_balls: List[int]) -> Dict[int, List[int]]:
     return kills
 
 
+# 向量化杀号规则使用的查找表（与上面的逐期规则一一对应）
+_RED_TAIL_MASKS = tail_masks(33)
+_BLUE_TAIL_MASKS = tail_masks(16)
+_IS_PRIME = np.array([is_prime(n) for n in range(64)])
+_MUL_088 = np.array([int(n * 0.88) for n in range(64)])
+
+
+def red_kill_masks(reds: np.ndarray, blue: np.ndarray) -> np.ndarray:
+    """get_red_kill_numbers 的向量化版本
+
+    Args:
+        reds: 上期红球矩阵 (期数, 6)
+        blue: 上期蓝球向量 (期数,)
+
+    Returns:
+        (期数, 17) 的 uint64 杀号掩码，第 m-1 列对应方法 m
+    """
+    reds = np.clip(np.asarray(reds, dtype=np.int64), 0, 63)
+    blue = np.asarray(blue, dtype=np.int64)
+    r1, r2, r3, r5, r6 = reds[:, 0], reds[:, 1], reds[:, 2], reds[:, 4], reds[:, 5]
+
+    prime_count = _IS_PRIME[reds].sum(axis=1)
+    # AC值：排序后两两差值的种类数 - 5
+    ordered = np.sort(reds, axis=1)
+    gaps = np.zeros(len(reds), dtype=np.uint64)
+    for i in range(6):
+        for j in range(i + 1, 6):
+            gaps |= np.left_shift(np.uint64(1), (ordered[:, j] - ordered[:, i]).astype(np.uint64))
+    ac = np.maximum(popcount(gaps) - 5, 0)
+    total = reds.sum(axis=1)
+
+    masks = np.zeros((len(reds), 17), dtype=np.uint64)
+    masks[:, 0] = _RED_TAIL_MASKS[blue % 10]
+    masks[:, 1] = single_mask((reds % 10).sum(axis=1) % 10, 33)
+    masks[:, 2] = _RED_TAIL_MASKS[prime_count % 10]
+    masks[:, 3] = single_mask(34 - r1, 33)
+    masks[:, 4] = single_mask(r1 + r6, 33)
+    sum_125 = (r1 + r2 + r5) % 33
+    masks[:, 5] = single_mask(np.where(sum_125 == 0, 33, sum_125), 33)
+    masks[:, 6] = single_mask(total // 100 + total // 10 % 10 + total % 10, 33)
+    masks[:, 7] = _RED_TAIL_MASKS[ac % 10]
+    masks[:, 8] = _RED_TAIL_MASKS[(blue + ac) % 10]
+    masks[:, 9] = single_mask(blue + prime_count, 33)
+    masks[:, 10] = single_mask(ac * prime_count, 33)
+    masks[:, 11] = single_mask(ac + prime_count, 33)
+    masks[:, 12] = single_mask(np.abs(ac - r6), 33)
+    masks[:, 13] = single_mask(np.abs(blue - r1 - r6), 33)
+    masks[:, 14] = single_mask(blue + ac + prime_count, 33)
+    masks[:, 15] = rows_mask(_MUL_088[reds], 33)
+    red3_sym = 41 - r3
+    kill17 = np.where((red3_sym >= 1) & (red3_sym <= 33), red3_sym, red3_sym % 33)
+    masks[:, 16] = single_mask(np.where(kill17 == 0, 33, kill17), 33)
+    return masks
+
+
+def blue_kill_masks(prev: np.ndarray, prev2: np.ndarray) -> np.ndarray:
+    """get_blue_kill_numbers 的向量化版本
+
+    Args:
+        prev: 上期蓝球
+        prev2: 上上期蓝球，无数据时为 0
+
+    Returns:
+        (期数, 6) 的 uint64 杀号掩码，第 m-1 列对应方法 m
+    """
+    prev = np.asarray(prev, dtype=np.int64)
+    prev2 = np.asarray(prev2, dtype=np.int64)
+    masks = np.zeros((len(prev), 6), dtype=np.uint64)
+    masks[:, 0] = _BLUE_TAIL_MASKS[(15 - prev % 10) % 10]
+    masks[:, 1] = _BLUE_TAIL_MASKS[(19 - prev % 10) % 10]
+    masks[:, 2] = _BLUE_TAIL_MASKS[(21 - prev % 10) % 10]
+    has_prev2 = prev2 != 0
+    empty = np.uint64(0)
+    masks[:, 3] = np.where(has_prev2, _BLUE_TAIL_MASKS[(prev2 // 10 + prev % 10) % 10], empty)
+    masks[:, 4] = np.where(has_prev2, _BLUE_TAIL_MASKS[(prev2 % 10 + prev // 10) % 10], empty)
+    masks[:, 5] = np.where(has_prev2, _BLUE_TAIL_MASKS[(prev2 % 10 + prev % 10) % 10], empty)
+    return masks
+
+
 class SSQKillService:
     """双色球杀号服务"""
     
+    # 方法组合分析的候选方法上限（全部 17 种）与搜索时间上限（秒）
+    MAX_COMBO_CANDIDATES = 17
+    COMBO_TIME_BUDGET = 2.0
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -196,104 +285,47 @@ class SSQKillService:
         num_sets: 每种策略生成的推荐组数
         page/page_size: 历史记录分页
         """
-        from models.ssq import SSQResult
-        
-        results = self.db.query(SSQResult).order_by(desc(SSQResult.period)).limit(lookback + 2).all()
-        if len(results) < 3:
+        history_data = draw_store.get("ssq", self.db).tail(lookback + 2)
+        if len(history_data) < 3:
             return {"error": "数据不足"}
         
-        results = list(reversed(results))
-        
-        # 初始化统计
-        history = []
-        red_success = {i: 0 for i in range(1, 18)}
-        red_kill_counts = {i: [] for i in range(1, 18)}  # 每种方法每期杀几个号
-        blue_success = {i: 0 for i in range(1, 7)}
-        blue_kill_counts = {i: [] for i in range(1, 7)}
-        total_red = 0
-        total_blue = 0
-        
-        # 综合统计
-        all_methods_success = 0  # 所有方法都成功的次数
-        methods_success_10 = 0   # ≥10个方法成功
-        methods_success_15 = 0   # ≥15个方法成功
-        
-        for i in range(1, len(results)):
-            prev = results[i - 1]
-            curr = results[i]
-            prev_reds = [prev.red1, prev.red2, prev.red3, prev.red4, prev.red5, prev.red6]
-            prev_blue = prev.blue
-            curr_reds = set([curr.red1, curr.red2, curr.red3, curr.red4, curr.red5, curr.red6])
-            curr_reds_sorted = sorted(curr_reds)
-            curr_blue = curr.blue
-            
-            # 红球杀号
-            red_kills = get_red_kill_numbers(prev_reds, prev_blue)
-            red_results = {}
-            red_success_count = 0
-            
-            for m, kills in red_kills.items():
-                success = not any(k in curr_reds for k in kills) if kills else None
-                red_results[m] = {"kills": kills, "success": success}
-                red_kill_counts[m].append(len(kills))
-                if kills and success is not None:
-                    red_success[m] += int(success)
-                    if success:
-                        red_success_count += 1
-            
-            # 蓝球杀号
-            blue_balls = [prev_blue]
-            if i >= 2:
-                blue_balls.append(results[i - 2].blue)
-            blue_kills = get_blue_kill_numbers(blue_balls)
-            blue_results = {}
-            
-            for m, kills in blue_kills.items():
-                if not kills:
-                    blue_results[m] = {"kills": [], "success": None}
-                    blue_kill_counts[m].append(0)
-                    continue
-                success = curr_blue not in kills
-                blue_results[m] = {"kills": kills, "success": success}
-                blue_kill_counts[m].append(len(kills))
-                blue_success[m] += int(success)
-            
-            # 综合统计
-            if red_success_count == 17:
-                all_methods_success += 1
-            if red_success_count >= 10:
-                methods_success_10 += 1
-            if red_success_count >= 15:
-                methods_success_15 += 1
-            
-            total_red += 1
-            if i >= 2:
-                total_blue += 1
-            
-            history.append({
-                "period": curr.period,
-                "red_balls": curr_reds_sorted,
-                "blue": curr_blue,
-                "red_kills": red_results,
-                "blue_kills": blue_results,
-                "red_success_count": red_success_count
-            })
+        periods = history_data.periods.tolist()
+        results = history_data.numbers.tolist()  # 每行: 红1-红6, 蓝
+        numbers = history_data.numbers.astype(np.int64)
+        reds, blues = numbers[:, :6], numbers[:, 6]
+        
+        # 回测第 1..n 期：杀号由上一期（蓝球另用上上期）计算，每期每种方法一个位掩码
+        red_kills = red_kill_masks(reds[:-1], blues[:-1])
+        blue_kills = blue_kill_masks(blues[:-1], np.concatenate([[0], blues[:-2]]))
+        red_draws = rows_mask(reds[1:], 33)[:, None]
+        blue_draws = rows_mask(blues[1:, None], 16)[:, None]
+        
+        # 杀号非空且与开奖号码无交集即为成功
+        red_hits = (red_kills != 0) & ((red_kills & red_draws) == 0)
+        blue_hits = (blue_kills != 0) & ((blue_kills & blue_draws) == 0)
+        red_kill_counts = popcount(red_kills)  # 每种方法每期杀几个号
+        blue_kill_counts = popcount(blue_kills)
+        red_success_counts = red_hits.sum(axis=1)
+        
+        total_red = len(red_kills)
+        total_blue = total_red - 1  # 第 1 期没有上上期蓝球
         
         # 计算方法统计数据
-        def calc_method_stats(success_dict, kill_counts_dict, total):
+        def calc_method_stats(hits, kill_counts, total):
             stats = {}
-            for m in success_dict.keys():
-                counts = kill_counts_dict[m]
-                avg_kills = sum(counts) / len(counts) if counts else 0
-                max_kills = max(counts) if counts else 0
-                min_kills = min(counts) if counts else 0
-                success_rate = success_dict[m] / total * 100 if total > 0 else 0
+            n_rows = len(kill_counts)
+            for idx, success in enumerate(hits.sum(axis=0).tolist()):
+                counts = kill_counts[:, idx]
+                avg_kills = int(counts.sum()) / n_rows if n_rows else 0
+                max_kills = int(counts.max()) if n_rows else 0
+                min_kills = int(counts.min()) if n_rows else 0
+                success_rate = success / total * 100 if total > 0 else 0
                 
                 # 效率指标 = 成功率 / 平均杀号数 (杀号越多成功率相对越难)
                 # 或者: 成功率 * 平均杀号数 (考虑杀号贡献)
                 efficiency = success_rate * avg_kills / 100 if avg_kills > 0 else 0
                 
-                stats[m] = {
+                stats[idx + 1] = {
                     "success_rate": round(success_rate, 2),
                     "avg_kills": round(avg_kills, 2),
                     "max_kills": max_kills,
@@ -302,29 +334,29 @@ class SSQKillService:
                 }
             return stats
         
-        red_stats = calc_method_stats(red_success, red_kill_counts, total_red)
-        blue_stats = calc_method_stats(blue_success, blue_kill_counts, total_blue)
+        red_stats = calc_method_stats(red_hits, red_kill_counts, total_red)
+        blue_stats = calc_method_stats(blue_hits, blue_kill_counts, total_blue)
         
         # 总体杀号统计
-        all_red_kills = [sum(red_kill_counts[m][i] for m in range(1, 18)) 
-                         for i in range(len(red_kill_counts[1]))]
+        all_red_kills = red_kill_counts.sum(axis=1)
+        all_methods_success = int((red_success_counts == 17).sum())  # 所有方法都成功的次数
         
         summary_stats = {
             "total_periods": total_red,
-            "max_total_kills": max(all_red_kills) if all_red_kills else 0,
-            "min_total_kills": min(all_red_kills) if all_red_kills else 0,
-            "avg_total_kills": round(sum(all_red_kills) / len(all_red_kills), 2) if all_red_kills else 0,
+            "max_total_kills": int(all_red_kills.max()),
+            "min_total_kills": int(all_red_kills.min()),
+            "avg_total_kills": round(int(all_red_kills.sum()) / total_red, 2),
             "all_methods_success": all_methods_success,
-            "methods_success_10": methods_success_10,
-            "methods_success_15": methods_success_15,
+            "methods_success_10": int((red_success_counts >= 10).sum()),  # ≥10个方法成功
+            "methods_success_15": int((red_success_counts >= 15).sum()),  # ≥15个方法成功
             "combined_success_rate": round(all_methods_success / total_red * 100, 2) if total_red > 0 else 0
         }
         
         # 计算下期预测
         last = results[-1]
-        last_reds = [last.red1, last.red2, last.red3, last.red4, last.red5, last.red6]
-        last_blue = last.blue
-        last2_blue = results[-2].blue if len(results) >= 2 else None
+        last_reds = last[:6]
+        last_blue = last[6]
+        last2_blue = results[-2][6] if len(results) >= 2 else None
         
         next_red_kills = get_red_kill_numbers(last_reds, last_blue)
         next_blue_kills = get_blue_kill_numbers([last_blue, last2_blue] if last2_blue else [last_blue])
@@ -354,7 +386,7 @@ class SSQKillService:
         
         # 分析方法组合 - 找出最佳组合
         method_combinations = self._analyze_method_combinations(
-            history, next_red_kills, red_stats, total_red
+            red_hits, next_red_kills, red_stats, total_red
         )
         
         # 生成多种策略的推荐号码
@@ -364,11 +396,14 @@ class SSQKillService:
             red_stats, blue_stats, method_combinations, num_sets
         )
         
-        # 分页历史记录
-        total_history = len(history)
+        # 分页历史记录：只展开当前页的明细
+        total_history = total_red
         start_idx = max(0, total_history - page * page_size)
         end_idx = max(0, total_history - (page - 1) * page_size)
-        paged_history = list(reversed(history[start_idx:end_idx]))
+        paged_history = [
+            self._history_record(results, periods, i + 1)
+            for i in reversed(range(start_idx, end_idx))
+        ]
         
         return {
             "history": paged_history,
@@ -385,7 +420,7 @@ class SSQKillService:
             "summary_stats": summary_stats,
             "method_combinations": method_combinations,  # 方法组合排名
             "next_prediction": {
-                "period": str(int(last.period) + 1),  # 下一期期号
+                "period": str(int(periods[-1]) + 1),  # 下一期期号
                 "red_kills": {m: {"kills": k, "name": RED_KILL_METHOD_NAMES[m], **red_stats[m]} 
                              for m, k in next_red_kills.items()},
                 "blue_kills": {m: {"kills": k, "name": BLUE_KILL_METHOD_NAMES[m], **blue_stats[m]} 
@@ -399,9 +434,39 @@ class SSQKillService:
             "recommended_sets": recommended_sets
         }
     
+    def _history_record(self, results: List[List[int]], periods: List[int], i: int) -> Dict:
+        """第 i 期的杀号明细（杀号列表与逐期规则的输出一致）"""
+        prev, curr = results[i - 1], results[i]
+        curr_reds = set(curr[:6])
+        curr_blue = curr[6]
+        
+        red_results = {}
+        red_success_count = 0
+        for m, kills in get_red_kill_numbers(prev[:6], prev[6]).items():
+            success = not any(k in curr_reds for k in kills) if kills else None
+            red_results[m] = {"kills": kills, "success": success}
+            if success:
+                red_success_count += 1
+        
+        blue_balls = [prev[6]]
+        if i >= 2:
+            blue_balls.append(results[i - 2][6])
+        blue_results = {}
+        for m, kills in get_blue_kill_numbers(blue_balls).items():
+            blue_results[m] = {"kills": kills, "success": curr_blue not in kills if kills else None}
+        
+        return {
+            "period": periods[i],
+            "red_balls": sorted(curr_reds),
+            "blue": curr_blue,
+            "red_kills": red_results,
+            "blue_kills": blue_results,
+            "red_success_count": red_success_count
+        }
+    
     def _analyze_method_combinations(
         self,
-        history: List[Dict],
+        red_hits: np.ndarray,
         next_red_kills: Dict[int, List[int]],
         red_stats: Dict[int, Dict],
         total_periods: int
@@ -409,9 +474,8 @@ class SSQKillService:
         """
         分析方法组合的效果
         找出成功率高且杀号多的最佳组合
+        red_hits: (期数, 17) 布尔矩阵，第 m-1 列为方法 m 各期是否杀号成功
         """
-        from itertools import combinations
-        
         # 获取成功率≥60%的方法作为候选
         candidate_methods = [m for m, s in red_stats.items() if s["success_rate"] >= 60]
         
@@ -419,58 +483,24 @@ class SSQKillService:
             candidate_methods = list(red_stats.keys())
         
         # 限制候选方法数量以控制计算量
-        if len(candidate_methods) > 12:
-            # 按效率排序，取前12个
+        if len(candidate_methods) > self.MAX_COMBO_CANDIDATES:
+            # 按效率排序，取前 MAX_COMBO_CANDIDATES 个
             sorted_methods = sorted(
                 candidate_methods, 
                 key=lambda m: red_stats[m]["efficiency"], 
                 reverse=True
-            )[:12]
+            )[:self.MAX_COMBO_CANDIDATES]
             candidate_methods = sorted_methods
         
-        combo_results = []
+        # 每种方法的历史成功期数位集、下期杀号掩码
+        success_bits = {m: pack_bits(red_hits[:, m - 1]) for m in candidate_methods}
+        kill_masks = {m: numbers_mask(next_red_kills.get(m, [])) for m in candidate_methods}
         
-        # 评估不同大小的组合 (2-8个方法的组合)
-        for combo_size in range(2, min(9, len(candidate_methods) + 1)):
-            for combo in combinations(candidate_methods, combo_size):
-                # 计算这个组合在历史上的表现
-                combo_success_count = 0
-                
-                for record in history:
-                    # 检查组合中的所有方法是否都成功
-                    all_success = all(
-                        record["red_kills"].get(m, {}).get("success", False)
-                        for m in combo
-                    )
-                    if all_success:
-                        combo_success_count += 1
-                
-                # 计算组合的杀号数（去重）
-                combo_kills = set()
-                for m in combo:
-                    combo_kills.update(next_red_kills.get(m, []))
-                unique_kills = len(combo_kills)
-                
-                # 计算组合成功率
-                combo_success_rate = (combo_success_count / total_periods * 100) if total_periods > 0 else 0
-                
-                # 计算组合效率 = 成功率 × 杀号数 / 100
-                efficiency = combo_success_rate * unique_kills / 100
-                
-                combo_results.append({
-                    "methods": list(combo),
-                    "method_names": [RED_KILL_METHOD_NAMES.get(m, f"方法{m}") for m in combo],
-                    "success_rate": round(combo_success_rate, 2),
-                    "unique_kills": unique_kills,
-                    "kill_numbers": sorted(combo_kills),
-                    "efficiency": round(efficiency, 2),
-                    "method_count": len(combo),
-                })
-        
-        # 按效率排序，取前20个最佳组合
-        combo_results.sort(key=lambda x: (-x["efficiency"], -x["success_rate"], -x["unique_kills"]))
-        
-        return combo_results[:20]
+        # 评估不同大小的组合 (2-8个方法的组合)，分支定界取效率前20个最佳组合
+        return rank_method_combinations(
+            success_bits, kill_masks, candidate_methods, total_periods, RED_KILL_METHOD_NAMES,
+            top_k=20, min_size=2, max_size=8, time_budget=self.COMBO_TIME_BUDGET,
+        )
     
     def _generate_recommendations(
         self,
@@ -319,13 +319,15 @@ class MetaphysicalService:
     
     DRAW_TIMES = {
         "ssq": {"weekdays": [1, 3, 6], "hour": 21, "minute": 15},
-        "dlt": {"weekdays": [0, 2, 5], "hour": 21, "minute": 25}
+        "dlt": {"weekdays": [0, 2, 5], "hour": 21, "minute": 25},
+        # 六合彩开奖时间：周二、四、六、日 21:30
+        "hk6": {"weekdays": [1, 3, 5, 6], "hour": 21, "minute": 30},
     }
     
-    def get_next_draw_time(self, lottery_type: str = "ssq") -> datetime:
-        """获取下一期开奖时间"""
+    def get_next_draw_time(self, lottery_type: str = "ssq", now: Optional[datetime] = None) -> datetime:
+        """获取下一期开奖时间（晚于 now，默认当前时间）"""
         config = self.DRAW_TIMES[lottery_type]
-        now = datetime.now()
+        now = now or datetime.now()
         for i in range(14):
             check_date = now + timedelta(days=i)
             if check_date.weekday() in config["weekdays"]:
@@ -809,15 +811,7 @@ class MetaphysicalService:
     ) -> Dict:
         """六合彩综合预测"""
         if draw_time is None:
-            # 六合彩开奖时间：周二、四、六、日 21:30
-            now = datetime.now()
-            hk6_weekdays = [1, 3, 5, 6]  # 周二、四、六、日
-            for i in range(14):
-                check_date = now + timedelta(days=i)
-                if check_date.weekday() in hk6_weekdays:
-                    draw_time = check_date.replace(hour=21, minute=30, second=0, microsecond=0)
-                    if draw_time > now:
-                        break
+            draw_time = self.get_next_draw_time("hk6")
         
         lunar_year = get_hk6_lunar_year(draw_time)
         
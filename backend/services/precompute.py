@@ -0,0 +1,297 @@
+"""
+开奖后后台预计算
+按各彩种开奖时间（MetaphysicalService.DRAW_TIMES）在开奖后自动增量同步，
+随后预先计算默认参数下的杀号分析、全方法预测（推荐的输入）与频率统计，
+接口在参数为默认值时直接返回预计算结果。
+"""
+import asyncio
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from config import (
+    PRECOMPUTE_ENABLED,
+    PRECOMPUTE_DELAY_MINUTES,
+    PRECOMPUTE_JITTER_SECONDS,
+    PRECOMPUTE_MAX_RETRIES,
+    PRECOMPUTE_RETRY_BASE_SECONDS,
+)
+from database import SessionLocal
+from services.draw_store import draw_store
+
+logger = logging.getLogger(__name__)
+
+# 与接口默认参数一致
+KILL_DEFAULTS = {"lookback": 100, "num_sets": 5, "page": 1, "page_size": 20}
+PREDICTION_LOOKBACK = 100
+
+
+def _ssq_kill(db: Session) -> Dict:
+    from services.kill_service import SSQKillService
+    return SSQKillService(db).get_kill_analysis(**KILL_DEFAULTS)
+
+
+def _dlt_kill(db: Session) -> Dict:
+    from services.dlt_kill_service import DLTKillService
+    return DLTKillService(db).get_kill_analysis(**KILL_DEFAULTS)
+
+
+def _ssq_frequency(db: Session) -> Dict:
+    from services.ssq_analysis import SSQAnalysisService
+    return SSQAnalysisService(db).get_position_frequency()
+
+
+def _dlt_frequency(db: Session) -> Dict:
+    from services.dlt_analysis import DLTAnalysisService
+    return DLTAnalysisService(db).get_position_frequency()
+
+
+def _hk6_frequency(db: Session) -> Dict:
+    from services.hk6_analysis import HK6AnalysisService
+    return HK6AnalysisService(db).get_number_frequency()
+
+
+def _ssq_predictions(db: Session):
+    # 结果写入预测缓存，推荐接口由缓存组装
+    from services.prediction_service import SSQPredictionService
+    return SSQPredictionService(db).predict_all_methods(PREDICTION_LOOKBACK)
+
+
+def _dlt_predictions(db: Session):
+    from services.prediction_service import DLTPredictionService
+    return DLTPredictionService(db).predict_all_methods(PREDICTION_LOOKBACK)
+
+
+def _hk6_predictions(db: Session):
+    from services.prediction_service import HK6PredictionService
+    return HK6PredictionService(db).predict_all_methods(PREDICTION_LOOKBACK)
+
+
+# 彩种 -> {结果名: 计算函数}
+PRECOMPUTE_TASKS: Dict[str, Dict[str, Callable[[Session], Any]]] = {
+    "ssq": {"kill": _ssq_kill, "frequency": _ssq_frequency, "predictions": _ssq_predictions},
+    "dlt": {"kill": _dlt_kill, "frequency": _dlt_frequency, "predictions": _dlt_predictions},
+    "hk6": {"frequency": _hk6_frequency, "predictions": _hk6_predictions},
+}
+
+
+def _sync_service(lottery: str, db: Session):
+    if lottery == "ssq":
+        from services.ssq_service import SSQService
+        return SSQService(db)
+    if lottery == "dlt":
+        from services.dlt_service import DLTService
+        return DLTService(db)
+    from services.hk6_service import HK6Service
+    return HK6Service(db)
+
+
+class PrecomputedResults:
+    """按 (彩种, 结果名) 保存的预计算结果，与计算时的最新期号绑定"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results: Dict[tuple, tuple] = {}
+
+    def put(self, lottery: str, name: str, latest_period: Any, value: Any) -> None:
+        with self._lock:
+            self._results[(lottery, name)] = (latest_period, value, datetime.now())
+
+    def get(self, lottery: str, name: str, latest_period: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self._results.get((lottery, name))
+        if entry is None or entry[0] != latest_period:
+            return None
+        return entry[1]
+
+    def serve(self, lottery: str, name: str, db: Session) -> Any:
+        """返回预计算结果，不存在或已过期时现场计算并保存"""
+        latest_period = draw_store.get(lottery, db).latest_period
+        value = self.get(lottery, name, latest_period)
+        if value is None:
+            value = PRECOMPUTE_TASKS[lottery][name](db)
+            self.put(lottery, name, latest_period, value)
+        return value
+
+    def invalidate(self, lottery: Optional[str] = None) -> None:
+        with self._lock:
+            for key in [k for k in self._results if lottery is None or k[0] == lottery]:
+                del self._results[key]
+
+    def describe(self, lottery: str) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                name: {"latest_period": period, "computed_at": computed_at.isoformat(timespec="seconds")}
+                for (lot, name), (period, _, computed_at) in self._results.items()
+                if lot == lottery
+            }
+
+
+precomputed = PrecomputedResults()
+draw_store.subscribe(precomputed.invalidate)
+
+
+async def precompute(lottery: str) -> Dict[str, Any]:
+    """计算并保存某彩种的全部预计算结果
+
+    各项计算经 compute_pool 在工作进程中执行，不占用处理请求的进程；
+    全方法预测在本进程执行（拟合分发到预测进程池），结果直接写入本进程的预测缓存，推荐接口可直接组装。
+    """
+    from services.compute_pool import compute_pool
+    from services.http_cache import response_cache
+
+    version = await asyncio.to_thread(response_cache.version, lottery)
+    done = {}
+    for name, compute in PRECOMPUTE_TASKS[lottery].items():
+        value = await compute_pool.run("precompute", compute, lottery=lottery, version=version.token,
+                                       local=name == "predictions")
+        precomputed.put(lottery, name, version.period, value)
+        done[name] = version.period
+    return done
+
+
+def _is_current(sync_result: Dict) -> bool:
+    """同步后库中已有预期的最新一期：同步到了新数据，或按开奖日历下一期尚未开奖（计划为 none）"""
+    return bool(sync_result.get("synced")) or sync_result.get("plan", {}).get("mode") == "none"
+
+
+class PrecomputeScheduler:
+    """开奖后同步 + 预计算调度器（事件循环内的后台任务）"""
+
+    def __init__(
+        self,
+        lotteries=("ssq", "dlt", "hk6"),
+        delay_minutes: float = PRECOMPUTE_DELAY_MINUTES,
+        jitter_seconds: float = PRECOMPUTE_JITTER_SECONDS,
+        max_retries: int = PRECOMPUTE_MAX_RETRIES,
+        retry_base_seconds: float = PRECOMPUTE_RETRY_BASE_SECONDS,
+    ):
+        self.lotteries = list(lotteries)
+        self.delay = timedelta(minutes=delay_minutes)
+        self.jitter_seconds = jitter_seconds
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._status: Dict[str, Dict[str, Any]] = {
+            lottery: {
+                "state": "idle",
+                "next_run": None,
+                "last_started": None,
+                "last_finished": None,
+                "last_result": None,
+                "last_error": None,
+                "attempts": 0,
+                "runs": 0,
+                "failures": 0,
+            }
+            for lottery in self.lotteries
+        }
+
+    def next_run_time(self, lottery: str, now: Optional[datetime] = None) -> datetime:
+        """下一次开奖时间 + 延迟（等待开奖结果发布）"""
+        from services.metaphysical_service import MetaphysicalService
+        now = now or datetime.now()
+        # 开奖时间已过但延迟未到时，仍安排本期
+        draw_time = MetaphysicalService().get_next_draw_time(lottery, now - self.delay)
+        return draw_time + self.delay
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        for lottery in self.lotteries:
+            self._tasks[lottery] = asyncio.create_task(self._loop(lottery), name=f"precompute-{lottery}")
+        logger.info(f"预计算调度器已启动: {', '.join(self.lotteries)}")
+
+    async def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _loop(self, lottery: str) -> None:
+        status = self._status[lottery]
+        # 启动时先用库中已有数据预热，不访问网络
+        if await self._run_precompute(lottery) is None:
+            status["failures"] += 1
+        while True:
+            run_at = self.next_run_time(lottery) + timedelta(seconds=random.uniform(0, self.jitter_seconds))
+            status["state"] = "waiting"
+            status["next_run"] = run_at.isoformat(timespec="seconds")
+            await asyncio.sleep(max(0.0, (run_at - datetime.now()).total_seconds()))
+            await self.run_once(lottery)
+
+    async def run_once(self, lottery: str) -> Dict[str, Any]:
+        """同步（失败或尚无新一期时按指数退避重试）后预计算；同步与预计算都失败时只计一次失败"""
+        status = self._status[lottery]
+        status["state"] = "syncing"
+        status["last_started"] = datetime.now().isoformat(timespec="seconds")
+        status["last_error"] = None
+        sync_result = None
+        for attempt in range(1, self.max_retries + 1):
+            status["attempts"] = attempt
+            try:
+                sync_result = await self._sync(lottery)
+                if _is_current(sync_result):
+                    break
+                # 开奖结果可能尚未发布
+                status["last_error"] = sync_result.get("message")
+            except Exception as e:
+                logger.warning(f"{lottery} 开奖后同步失败 (第 {attempt} 次): {e}")
+                status["last_error"] = str(e)
+            if attempt < self.max_retries:
+                backoff = self.retry_base_seconds * 2 ** (attempt - 1)
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+        failed = not (sync_result and _is_current(sync_result))
+
+        result = await self._run_precompute(lottery)
+        if failed or result is None:
+            status["failures"] += 1
+        status["last_result"] = {"sync": sync_result, "precomputed": result}
+        return status["last_result"]
+
+    async def _sync(self, lottery: str) -> Dict:
+        db = SessionLocal()
+        try:
+            return await _sync_service(lottery, db).sync_latest()
+        finally:
+            db.close()
+
+    async def _run_precompute(self, lottery: str) -> Optional[Dict]:
+        status = self._status[lottery]
+        status["state"] = "precomputing"
+        try:
+            result = await precompute(lottery)
+            status["runs"] += 1
+            return result
+        except Exception as e:
+            logger.error(f"{lottery} 预计算失败: {e}")
+            status["last_error"] = str(e)
+            return None
+        finally:
+            status["state"] = "idle"
+            status["last_finished"] = datetime.now().isoformat(timespec="seconds")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": bool(self._tasks),
+            "lotteries": {
+                lottery: {**self._status[lottery], "results": precomputed.describe(lottery)}
+                for lottery in self.lotteries
+            },
+        }
+
+
+precompute_scheduler = PrecomputeScheduler()
+
+
+async def start_precompute_scheduler() -> None:
+    if PRECOMPUTE_ENABLED:
+        precompute_scheduler.start()
+
+
+async def stop_precompute_scheduler() -> None:
+    await precompute_scheduler.stop()
@@ -0,0 +1,183 @@
+"""
+预测结果缓存
+开奖数据每周只更新几次，而每次预测都要重新拟合 RF/SVR/ARIMA 模型。
+以 (彩种, 最新期号, 方法, 参数, lookback) 为键缓存单个方法的预测结果：
+内存层为 LRU，可选磁盘层（JSON 文件）使结果在重启后仍可用；
+_save_data 写入新数据后按彩种整体失效。
+"""
+import copy
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config import PREDICTION_CACHE_SIZE, PREDICTION_CACHE_DIR
+from services.draw_store import draw_store, DrawHistory
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """LRU 预测结果缓存（内存 + 可选磁盘）"""
+
+    def __init__(self, max_entries: int = PREDICTION_CACHE_SIZE, disk_dir: Optional[str] = PREDICTION_CACHE_DIR):
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._entries: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(lottery: str, latest_period: Any, method: str, params: Optional[Dict], lookback: int) -> tuple:
+        return (
+            lottery, str(latest_period), method,
+            json.dumps(params or {}, sort_keys=True, default=str), int(lookback),
+        )
+
+    def _disk_path(self, key: tuple) -> Path:
+        digest = hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()
+        return self.disk_dir / key[0] / f"{digest}.json"
+
+    def get(self, key: tuple) -> Optional[Dict]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(value)
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, value)
+        return copy.deepcopy(value)
+
+    def contains(self, key: tuple) -> bool:
+        """是否已有该键的结果（不计入命中统计）"""
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self.disk_dir is not None and self._disk_path(key).exists()
+
+    def put(self, key: tuple, value: Dict) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._store(key, value)
+        self._write_disk(key, value)
+
+    def _store(self, key: tuple, value: Dict) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key: tuple) -> Optional[Dict]:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取预测缓存文件失败 {path}: {e}")
+            return None
+        # 防止哈希碰撞
+        if tuple(record.get("key", ())) != key:
+            return None
+        return record.get("value")
+
+    def _write_disk(self, key: tuple, value: Dict) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"key": list(key), "value": value}, f, ensure_ascii=False)
+            tmp.replace(path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"写入预测缓存文件失败 {path}: {e}")
+
+    def invalidate(self, lottery: Optional[str] = None) -> None:
+        """清除指定彩种（默认全部）的缓存"""
+        with self._lock:
+            for key in [k for k in self._entries if lottery is None or k[0] == lottery]:
+                del self._entries[key]
+            self.invalidations += 1
+        if self.disk_dir is None or not self.disk_dir.exists():
+            return
+        dirs = [self.disk_dir / lottery] if lottery else [p for p in self.disk_dir.iterdir() if p.is_dir()]
+        for directory in dirs:
+            for path in directory.glob("*.json"):
+                try:
+                    path.unlink()
+                except OSError as e:
+                    logger.warning(f"删除预测缓存文件失败 {path}: {e}")
+        logger.info(f"预测缓存已失效: {lottery or '全部'}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_enabled": self.disk_dir is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+prediction_cache = PredictionCache()
+draw_store.subscribe(prediction_cache.invalidate)
+
+
+def has_predictions(lottery: str, latest_period: Any, lookback: int, method_params: Dict[str, Dict]) -> bool:
+    """method_params 中的每个方法是否都已缓存（此时组装结果无需拟合模型）"""
+    return all(
+        prediction_cache.contains(PredictionCache.make_key(lottery, latest_period, method, params, lookback))
+        for method, params in method_params.items()
+    )
+
+
+def cached_predictions(
+    lottery: str,
+    history: DrawHistory,
+    lookback: int,
+    method_params: Dict[str, Dict],
+    compute: Callable[[DrawHistory, Dict[str, Dict]], List[Dict]],
+) -> List[Dict]:
+    """按方法查缓存，只对未命中的方法调用 compute(history, {method: params})
+
+    出错的结果不缓存。返回顺序与 method_params 一致。
+    """
+    keys = {
+        method: PredictionCache.make_key(lottery, history.latest_period, method, params, lookback)
+        for method, params in method_params.items()
+    }
+    results = {method: prediction_cache.get(key) for method, key in keys.items()}
+    missing = {method: method_params[method] for method, result in results.items() if result is None}
+    if missing:
+        for result in compute(history, missing):
+            method = result["method"]
+            if "error" not in result:
+                prediction_cache.put(keys[method], result)
+            results[method] = result
+    return [results[method] for method in method_params]
@@ -0,0 +1,263 @@
+"""
+预测任务执行器
+将 (方法 × 位置) 的模型拟合分发到进程池并行执行：每个任务独立计时与超时，
+失败或超时的任务在当前进程内用回退方法（移动平均）补算。
+预测接口在主进程中调用本执行器（不经 compute_pool 的工作进程），所有请求共用同一个进程池。
+"""
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from config import PREDICTION_WORKERS, PREDICTION_TASK_TIMEOUT, PREDICTION_START_METHOD
+
+logger = logging.getLogger(__name__)
+
+# 等待进程池结果时的轮询间隔（秒）
+_POLL_INTERVAL = 0.05
+# 进程池启动时等待全部工作进程预热完成的上限（秒）
+_WARMUP_TIMEOUT = 60
+
+
+class PredictionTask:
+    """单个拟合任务：fn(*args)，失败时以 fallback(*args) 代替"""
+
+    def __init__(
+        self,
+        key: Hashable,
+        fn: Callable,
+        args: tuple,
+        fallback: Optional[Callable] = None,
+    ):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.fallback = fallback
+
+
+class TaskResult:
+    """任务结果
+
+    status: ok / fallback（出错或超时后由回退方法得出）/ error（无回退或回退也失败）
+    """
+
+    def __init__(self, value: Any, status: str, elapsed_ms: float, finished_ms: float, error: str = ""):
+        self.value = value
+        self.status = status
+        self.elapsed_ms = elapsed_ms    # 任务自身耗时
+        self.finished_ms = finished_ms  # 自批次开始到拿到结果的墙钟时间
+        self.error = error
+
+
+def _timed_call(fn: Callable, args: tuple) -> Tuple[Any, float]:
+    """在工作进程中执行任务并计时"""
+    start = time.perf_counter()
+    value = fn(*args)
+    return value, (time.perf_counter() - start) * 1000
+
+
+# 工作进程内：预热时所有工作进程共同等待的屏障
+_warmup_barrier = None
+
+
+def _init_worker(barrier) -> None:
+    global _warmup_barrier
+    _warmup_barrier = barrier
+
+
+def _ready() -> None:
+    """工作进程预热：导入拟合所需的模块（sklearn / statsmodels，冷启动需数秒）
+
+    在屏障处等待全部工作进程，保证每个工作进程恰好执行一次预热。
+    """
+    import services.prediction_service  # noqa: F401
+    _warmup_barrier.wait(_WARMUP_TIMEOUT)
+
+
+class PredictionRunner:
+    """进程池预测执行器
+
+    workers 为 0 时在当前进程内顺序执行（不启用超时）。
+    进程池为进程内共享，所有批次共用 workers 个执行名额：只在有空闲工作进程时提交，
+    任务提交即开始运行，超时从此刻算起；排队中的任务不会因等待而超时。
+    超时的任务无法强行终止，会继续占用工作进程（及名额）直到跑完；
+    所有工作进程都被超时任务占用时换一个新进程池，不取消其他批次的任务。
+    """
+
+    def __init__(
+        self,
+        workers: int = PREDICTION_WORKERS,
+        task_timeout: float = PREDICTION_TASK_TIMEOUT,
+        start_method: str = PREDICTION_START_METHOD,
+    ):
+        self.workers = workers
+        self.task_timeout = task_timeout
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._busy = 0  # 当前进程池中占用工作进程的任务数（含已超时的）
+        self._stuck: set = set()  # 当前进程池中已超时但仍占用工作进程的任务
+
+    def _get_pool_locked(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            context = multiprocessing.get_context(self.start_method)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(context.Barrier(self.workers),),
+            )
+            # 等待工作进程启动并导入拟合模块，进程启动与模块导入耗时不计入任务超时
+            wait([self._pool.submit(_ready) for _ in range(self.workers)])
+            logger.info(f"预测进程池已启动: {self.workers} 个工作进程 ({self.start_method})")
+        return self._pool
+
+    def _discard_locked(self, pool: ProcessPoolExecutor) -> None:
+        """丢弃进程池；仅当它仍是当前进程池时生效，不取消其上的任务"""
+        if pool is not self._pool:
+            return
+        self._pool = None
+        self._busy = 0
+        self._stuck.clear()
+        pool.shutdown(wait=False)
+        self._slot_freed.notify_all()
+
+    def _submit(self, task: PredictionTask) -> Optional[Tuple[Future, ProcessPoolExecutor]]:
+        """有空闲执行名额时提交任务，返回 (future, 所用进程池)；名额已满时返回 None"""
+        with self._lock:
+            if self._pool is not None and len(self._stuck) >= self.workers:
+                # 旧进程跑完当前任务后退出
+                logger.warning("预测进程池的工作进程均被超时任务占用，重建进程池")
+                self._discard_locked(self._pool)
+            if self._busy >= self.workers:
+                return None
+            pool = self._get_pool_locked()
+            try:
+                future = pool.submit(_timed_call, task.fn, task.args)
+            except BrokenProcessPool:
+                self._discard_locked(pool)
+                raise
+            self._busy += 1
+        # 在锁外登记：future 已完成时回调会立即在当前线程执行
+        future.add_done_callback(lambda f: self._release(pool, f))
+        return future, pool
+
+    def _release(self, pool: ProcessPoolExecutor, future: Future) -> None:
+        """任务结束，归还执行名额（进程池已被替换时名额已随之重置）"""
+        with self._lock:
+            if pool is self._pool:
+                self._busy -= 1
+                self._stuck.discard(future)
+                self._slot_freed.notify_all()
+
+    def _mark_stuck(self, pool: ProcessPoolExecutor, future: Future) -> None:
+        with self._lock:
+            if pool is self._pool and not future.done():
+                self._stuck.add(future)
+
+    def shutdown(self) -> None:
+        """应用关闭时释放进程池"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                self._busy = 0
+                self._stuck.clear()
+
+    def run(self, tasks: List[PredictionTask]) -> Dict[Hashable, TaskResult]:
+        """执行一批任务，返回 key -> TaskResult"""
+        batch_start = time.perf_counter()
+        if self.workers <= 0:
+            return {task.key: self._run_inline(task, batch_start) for task in tasks}
+
+        results: Dict[Hashable, TaskResult] = {}
+        queue = list(reversed(tasks))
+        running: Dict[Future, Tuple[PredictionTask, ProcessPoolExecutor, float]] = {}
+        while queue or running:
+            while queue:
+                task = queue[-1]
+                try:
+                    submitted = self._submit(task)
+                except Exception as e:
+                    # 进程池不可用（如工作进程崩溃）时已丢弃，下次提交重建
+                    queue.pop()
+                    logger.error(f"预测进程池提交失败: {e}")
+                    results[task.key] = self._fallback(task, str(e), batch_start, time.perf_counter())
+                    continue
+                if submitted is None:
+                    break
+                queue.pop()
+                future, pool = submitted
+                running[future] = (task, pool, time.perf_counter())
+            if not running:
+                if queue:
+                    # 执行名额被其他批次占满，等待归还
+                    with self._slot_freed:
+                        self._slot_freed.wait(_POLL_INTERVAL)
+                continue
+
+            done, _ = wait(list(running), timeout=_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            now = time.perf_counter()
+            for future in done:
+                task, pool, _ = running.pop(future)
+                try:
+                    value, elapsed_ms = future.result()
+                    results[task.key] = TaskResult(value, "ok", elapsed_ms, (now - batch_start) * 1000)
+                except Exception as e:
+                    logger.warning(f"预测任务 {task.key} 失败: {e}")
+                    if isinstance(e, BrokenProcessPool):
+                        with self._lock:
+                            self._discard_locked(pool)
+                    results[task.key] = self._fallback(task, str(e), batch_start, now)
+
+            for future, (task, pool, started) in list(running.items()):
+                if now - started > self.task_timeout:
+                    del running[future]
+                    self._mark_stuck(pool, future)
+                    logger.warning(f"预测任务 {task.key} 超过 {self.task_timeout}s，使用回退方法")
+                    results[task.key] = self._fallback(task, "timeout", batch_start, started)
+        return results
+
+    def _run_inline(self, task: PredictionTask, batch_start: float) -> TaskResult:
+        start = time.perf_counter()
+        try:
+            value, elapsed_ms = _timed_call(task.fn, task.args)
+            return TaskResult(value, "ok", elapsed_ms, (time.perf_counter() - batch_start) * 1000)
+        except Exception as e:
+            logger.warning(f"预测任务 {task.key} 失败: {e}")
+            return self._fallback(task, str(e), batch_start, start)
+
+    def _fallback(self, task: PredictionTask, error: str, batch_start: float, start: float) -> TaskResult:
+        if task.fallback is None:
+            return TaskResult(None, "error", 0.0, (time.perf_counter() - batch_start) * 1000, error)
+        try:
+            value = task.fallback(*task.args)
+            status = "fallback"
+        except Exception as e:
+            value, status, error = None, "error", f"{error}; fallback: {e}"
+        now = time.perf_counter()
+        return TaskResult(value, status, (now - start) * 1000, (now - batch_start) * 1000, error)
+
+
+_runner: Optional[PredictionRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_prediction_runner() -> PredictionRunner:
+    """进程级共享的预测执行器"""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = PredictionRunner()
+        return _runner
+
+
+def shutdown_prediction_runner() -> None:
+    """应用关闭时释放进程池"""
+    with _runner_lock:
+        if _runner is not None:
+            _runner.shutdown()
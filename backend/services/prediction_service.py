@@ -5,9 +5,8 @@
 """
 import logging
 import numpy as np
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
 from collections import Counter
 
 # 预测方法依赖
@@ -15,6 +14,10 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.svm import SVR
 from sklearn.linear_model import BayesianRidge
 
+from services.draw_store import draw_store, DrawHistory
+from services.prediction_runner import PredictionTask, get_prediction_runner
+from services.prediction_cache import cached_predictions
+
 logger = logging.getLogger(__name__)
 
 
@@ -129,6 +132,49 @@ def predict_next_number(series: np.ndarray, method: str = "ma",
     return max(min_val, min(max_val, result))
 
 
+def fallback_prediction(series: np.ndarray, method: str = "ma",
+                        min_val: int = 1, max_val: int = 33,
+                        params: Dict = None) -> int:
+    """任务失败或超时时的回退预测：默认参数的移动平均"""
+    return predict_next_number(series, "ma", min_val, max_val)
+
+
+def run_position_predictions(specs: List[Tuple[str, np.ndarray, int, int]],
+                             method_params: Dict[str, Dict]) -> Dict[str, Dict]:
+    """按 (方法 × 位置) 并行拟合
+
+    specs: [(位置, 序列, 最小值, 最大值)]，所有方法共用同一份历史数据
+    返回 method -> {"values": {位置: 号码} 或 None, "error": str, "timing": {...}}
+    """
+    tasks = [
+        PredictionTask((method, pos), predict_next_number,
+                       (series, method, min_v, max_v, params), fallback_prediction)
+        for method, params in method_params.items()
+        for pos, series, min_v, max_v in specs
+    ]
+    results = get_prediction_runner().run(tasks)
+
+    outputs = {}
+    for method in method_params:
+        values, positions, fallbacks, errors = {}, {}, [], []
+        wall_ms = 0.0
+        for pos, _, _, _ in specs:
+            result = results[(method, pos)]
+            values[pos] = result.value
+            positions[pos] = round(result.elapsed_ms, 2)
+            wall_ms = max(wall_ms, result.finished_ms)
+            if result.status == "fallback":
+                fallbacks.append(pos)
+            elif result.status == "error":
+                errors.append(f"{pos}: {result.error}")
+        outputs[method] = {
+            "values": None if errors else values,
+            "error": "; ".join(errors),
+            "timing": {"wall_ms": round(wall_ms, 2), "positions": positions, "fallbacks": fallbacks},
+        }
+    return outputs
+
+
 class SSQPredictionService:
     """双色球时间序列预测服务"""
     
@@ -158,56 +204,66 @@ class SSQPredictionService:
         """获取所有方法的可调参数"""
         return self.METHOD_PARAMS
     
+    RED_LIMITS = [(1, 11), (2, 18), (5, 24), (8, 28), (15, 32), (20, 33)]
+    
     def predict(self, method: str = "ma", lookback: int = 100, params: Dict = None) -> Dict:
         """使用指定方法预测下一期号码"""
-        from models.ssq import SSQResult
         params = params or {}
         
-        results = self.db.query(SSQResult).order_by(desc(SSQResult.period)).limit(lookback).all()
-        if len(results) < 10:
+        history = draw_store.get("ssq", self.db).tail(lookback)
+        if len(history) < 10:
             return {"error": "数据不足", "red": [], "blue": None}
         
-        results = list(reversed(results))
-        
-        red_predictions = []
-        position_limits = [(1, 11), (2, 18), (5, 24), (8, 28), (15, 32), (20, 33)]
-        
-        for i, (min_v, max_v) in enumerate(position_limits):
-            pos_key = f"red{i+1}"
-            series = np.array([getattr(r, pos_key) for r in results])
-            pred = predict_next_number(series, method, min_v, max_v, params)
-            red_predictions.append(pred)
-        
-        red_predictions = self._ensure_sorted_unique(red_predictions, 1, 33)
-        
-        blue_series = np.array([r.blue for r in results])
-        blue_pred = predict_next_number(blue_series, method, 1, 16, params)
-        
-        return {
-            "method": method,
-            "method_name": self.METHOD_NAMES.get(method, method),
-            "red": red_predictions,
-            "blue": blue_pred,
-            "params": params,
-            "sample_size": len(results)
-        }
+        result = cached_predictions("ssq", history, lookback, {method: params}, self._predict_methods)[0]
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        return result
     
     def predict_all_methods(self, lookback: int = 100, method_params: Dict = None) -> List[Dict]:
         """使用所有方法预测"""
         method_params = method_params or {}
+        history = draw_store.get("ssq", self.db).tail(lookback)
+        if len(history) < 10:
+            return [{"error": "数据不足", "red": [], "blue": None} for _ in self.METHODS]
+        
+        return cached_predictions(
+            "ssq", history, lookback,
+            {method: method_params.get(method, {}) for method in self.METHODS},
+            self._predict_methods,
+        )
+    
+    def _predict_methods(self, history: DrawHistory, method_params: Dict[str, Dict]) -> List[Dict]:
+        """各方法共用同一份历史数据，(方法 × 位置) 并行拟合后组装结果"""
+        specs = [
+            (f"red{i+1}", history.column(f"red{i+1}").astype(np.int64), min_v, max_v)
+            for i, (min_v, max_v) in enumerate(self.RED_LIMITS)
+        ]
+        specs.append(("blue", history.column("blue").astype(np.int64), 1, 16))
+        
+        outputs = run_position_predictions(specs, method_params)
         results = []
-        for method in self.METHODS:
-            try:
-                params = method_params.get(method, {})
-                result = self.predict(method, lookback, params)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"方法 {method} 预测失败: {e}")
+        for method, params in method_params.items():
+            output = outputs[method]
+            if output["values"] is None:
+                logger.error(f"方法 {method} 预测失败: {output['error']}")
                 results.append({
                     "method": method,
                     "method_name": self.METHOD_NAMES.get(method, method),
-                    "error": str(e)
+                    "error": output["error"],
+                    "timing": output["timing"],
                 })
+                continue
+            values = output["values"]
+            red_predictions = [values[f"red{i+1}"] for i in range(len(self.RED_LIMITS))]
+            results.append({
+                "method": method,
+                "method_name": self.METHOD_NAMES.get(method, method),
+                "red": self._ensure_sorted_unique(red_predictions, 1, 33),
+                "blue": values["blue"],
+                "params": params,
+                "sample_size": len(history),
+                "timing": output["timing"],
+            })
         return results
     
     def generate_recommendations(self, lookback: int = 100, num_sets: int = 5, 
@@ -385,62 +441,68 @@ class DLTPredictionService:
     def get_method_params(self) -> Dict:
         return self.METHOD_PARAMS
     
+    FRONT_LIMITS = [(1, 10), (3, 18), (8, 26), (15, 32), (22, 35)]
+    BACK_LIMITS = [(1, 8), (4, 12)]
+    
     def predict(self, method: str = "ma", lookback: int = 100, params: Dict = None) -> Dict:
-        from models.dlt import DLTResult
         params = params or {}
         
-        results = self.db.query(DLTResult).order_by(desc(DLTResult.period)).limit(lookback).all()
-        if len(results) < 10:
+        history = draw_store.get("dlt", self.db).tail(lookback)
+        if len(history) < 10:
             return {"error": "数据不足", "front": [], "back": []}
         
-        results = list(reversed(results))
-        
-        front_predictions = []
-        front_limits = [(1, 10), (3, 18), (8, 26), (15, 32), (22, 35)]
-        
-        for i, (min_v, max_v) in enumerate(front_limits):
-            pos_key = f"front{i+1}"
-            series = np.array([getattr(r, pos_key) for r in results])
-            pred = predict_next_number(series, method, min_v, max_v, params)
-            front_predictions.append(pred)
-        
-        front_predictions = self._ensure_sorted_unique(front_predictions, 1, 35)
-        
-        back_predictions = []
-        back_limits = [(1, 8), (4, 12)]
-        
-        for i, (min_v, max_v) in enumerate(back_limits):
-            pos_key = f"back{i+1}"
-            series = np.array([getattr(r, pos_key) for r in results])
-            pred = predict_next_number(series, method, min_v, max_v, params)
-            back_predictions.append(pred)
-        
-        back_predictions = self._ensure_sorted_unique(back_predictions, 1, 12)
-        
-        return {
-            "method": method,
-            "method_name": self.METHOD_NAMES.get(method, method),
-            "front": front_predictions,
-            "back": back_predictions,
-            "params": params,
-            "sample_size": len(results)
-        }
+        result = cached_predictions("dlt", history, lookback, {method: params}, self._predict_methods)[0]
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        return result
     
     def predict_all_methods(self, lookback: int = 100, method_params: Dict = None) -> List[Dict]:
         method_params = method_params or {}
+        history = draw_store.get("dlt", self.db).tail(lookback)
+        if len(history) < 10:
+            return [{"error": "数据不足", "front": [], "back": []} for _ in self.METHODS]
+        
+        return cached_predictions(
+            "dlt", history, lookback,
+            {method: method_params.get(method, {}) for method in self.METHODS},
+            self._predict_methods,
+        )
+    
+    def _predict_methods(self, history: DrawHistory, method_params: Dict[str, Dict]) -> List[Dict]:
+        """各方法共用同一份历史数据，(方法 × 位置) 并行拟合后组装结果"""
+        specs = [
+            (f"front{i+1}", history.column(f"front{i+1}").astype(np.int64), min_v, max_v)
+            for i, (min_v, max_v) in enumerate(self.FRONT_LIMITS)
+        ] + [
+            (f"back{i+1}", history.column(f"back{i+1}").astype(np.int64), min_v, max_v)
+            for i, (min_v, max_v) in enumerate(self.BACK_LIMITS)
+        ]
+        
+        outputs = run_position_predictions(specs, method_params)
         results = []
-        for method in self.METHODS:
-            try:
-                params = method_params.get(method, {})
-                result = self.predict(method, lookback, params)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"方法 {method} 预测失败: {e}")
+        for method, params in method_params.items():
+            output = outputs[method]
+            if output["values"] is None:
+                logger.error(f"方法 {method} 预测失败: {output['error']}")
                 results.append({
                     "method": method,
                     "method_name": self.METHOD_NAMES.get(method, method),
-                    "error": str(e)
+                    "error": output["error"],
+                    "timing": output["timing"],
                 })
+                continue
+            values = output["values"]
+            front_predictions = [values[f"front{i+1}"] for i in range(len(self.FRONT_LIMITS))]
+            back_predictions = [values[f"back{i+1}"] for i in range(len(self.BACK_LIMITS))]
+            results.append({
+                "method": method,
+                "method_name": self.METHOD_NAMES.get(method, method),
+                "front": self._ensure_sorted_unique(front_predictions, 1, 35),
+                "back": self._ensure_sorted_unique(back_predictions, 1, 12),
+                "params": params,
+                "sample_size": len(history),
+                "timing": output["timing"],
+            })
         return results
     
     def generate_recommendations(self, lookback: int = 100, num_sets: int = 5,
@@ -653,99 +715,117 @@ class HK6PredictionService:
     
     def predict(self, method: str = "ma", lookback: int = 100, params: Dict = None) -> Dict:
         """使用指定方法预测下一期号码"""
-        from models.hk6 import HK6Result
         params = params or {}
         
-        results = self.db.query(HK6Result).order_by(desc(HK6Result.year), desc(HK6Result.no)).limit(lookback).all()
-        if len(results) < 10:
+        history = draw_store.get("hk6", self.db).tail(lookback)
+        if len(history) < 10:
             return {"error": "数据不足", "numbers": [], "special": None}
         
-        results = list(reversed(results))
-        
-        # 预测6个主号码
-        number_predictions = []
+        result = cached_predictions("hk6", history, lookback, {method: params}, self._predict_methods)[0]
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        return result
+    
+    def _predict_methods(self, history: DrawHistory, method_params: Dict[str, Dict]) -> List[Dict]:
+        """各方法共用同一份历史数据，(方法 × 位置) 并行拟合后组装结果"""
+        specs = []
+        # 6个主号码（过滤无效数据，样本过少的位置不预测）
         num_fields = ['num1', 'num2', 'num3', 'num4', 'num5', 'num6']
-        for i, field in enumerate(num_fields):
-            series = np.array([getattr(r, field) for r in results if getattr(r, field, None)])
-            series = series[series > 0]  # 过滤无效数据
+        for field in num_fields:
+            series = history.column(field).astype(np.int64)
+            series = series[series > 0]
             if len(series) > 5:
-                pred = predict_next_number(series, method, 1, 49, params)
-                number_predictions.append(pred)
-        
-        number_predictions = self._ensure_sorted_unique(number_predictions, 1, 49)
-        while len(number_predictions) < 6:
-            # 填充缺失号码
-            for n in range(1, 50):
-                if n not in number_predictions:
-                    number_predictions.append(n)
-                    break
-            number_predictions = sorted(number_predictions)[:6]
-        
-        # 预测特码
-        special_series = np.array([r.special for r in results])
-        special_pred = predict_next_number(special_series, method, 1, 49, params)
-        
-        # 预测波色趋势
-        wave_prediction = self._predict_wave(results, method, params)
-        
-        # 预测生肖趋势
-        zodiac_prediction = self._predict_zodiac(results, method, params)
-        
-        return {
-            "method": method,
-            "method_name": self.METHOD_NAMES.get(method, method),
-            "numbers": number_predictions,
-            "special": special_pred,
-            "wave_prediction": wave_prediction,
-            "zodiac_prediction": zodiac_prediction,
-            "params": params,
-            "sample_size": len(results)
-        }
+                specs.append((field, series, 1, 49))
+        # 特码
+        specs.append(("special", history.column("special").astype(np.int64), 1, 49))
+        # 波色、生肖趋势
+        wave_series = self._wave_series(history)
+        if len(wave_series) >= 5:
+            specs.append(("wave", wave_series, 0, 2))
+        zodiac_series = self._zodiac_series(history)
+        if len(zodiac_series) >= 5:
+            specs.append(("zodiac", zodiac_series, 0, 11))
+        
+        outputs = run_position_predictions(specs, method_params)
+        results = []
+        for method, params in method_params.items():
+            output = outputs[method]
+            if output["values"] is None:
+                logger.error(f"HK6方法 {method} 预测失败: {output['error']}")
+                results.append({
+                    "method": method,
+                    "method_name": self.METHOD_NAMES.get(method, method),
+                    "error": output["error"],
+                    "timing": output["timing"],
+                })
+                continue
+            values = output["values"]
+            
+            number_predictions = [values[field] for field in num_fields if field in values]
+            number_predictions = self._ensure_sorted_unique(number_predictions, 1, 49)
+            while len(number_predictions) < 6:
+                # 填充缺失号码
+                for n in range(1, 50):
+                    if n not in number_predictions:
+                        number_predictions.append(n)
+                        break
+                number_predictions = sorted(number_predictions)[:6]
+            
+            results.append({
+                "method": method,
+                "method_name": self.METHOD_NAMES.get(method, method),
+                "numbers": number_predictions,
+                "special": values["special"],
+                "wave_prediction": self._wave_prediction(wave_series, values.get("wave")),
+                "zodiac_prediction": self._zodiac_prediction(zodiac_series, values.get("zodiac")),
+                "params": params,
+                "sample_size": len(history),
+                "timing": output["timing"],
+            })
+        return results
     
-    def _predict_wave(self, results, method: str, params: Dict) -> Dict:
-        """预测波色趋势"""
-        # 统计特码的波色序列
+    def _wave_series(self, history: DrawHistory) -> np.ndarray:
+        """特码的波色序列 (red=0, blue=1, green=2)"""
         wave_series = []
-        for r in results:
-            wave = self.get_wave_color(r.special)
+        for special in history.column("special").tolist():
+            wave = self.get_wave_color(special)
             wave_series.append({"red": 0, "blue": 1, "green": 2}.get(wave, 0))
-        
-        if len(wave_series) < 5:
+        return np.array(wave_series)
+    
+    def _wave_prediction(self, wave_series: np.ndarray, pred: Optional[int]) -> Dict:
+        """由波色预测值计算波色趋势"""
+        if pred is None:
             return {"predicted": "red", "confidence": 0.33}
         
-        series = np.array(wave_series)
-        pred = predict_next_number(series, method, 0, 2, params)
-        
         wave_map = {0: "red", 1: "blue", 2: "green"}
         predicted_wave = wave_map.get(pred, "red")
         
         # 计算置信度 (基于最近N期的波色分布)
-        recent = wave_series[-20:]
+        recent = wave_series[-20:].tolist()
         wave_counts = Counter(recent)
         total = len(recent)
         confidence = wave_counts.get(pred, 0) / total if total > 0 else 0.33
         
         return {"predicted": predicted_wave, "confidence": round(confidence, 2)}
     
-    def _predict_zodiac(self, results, method: str, params: Dict) -> Dict:
-        """预测生肖趋势"""
-        # 统计特码的生肖序列
+    def _zodiac_series(self, history: DrawHistory) -> np.ndarray:
+        """特码的生肖序列 (ZODIACS 下标)"""
         zodiac_series = []
-        for r in results:
-            zodiac = self.get_zodiac_by_date(r.special, r.date)
+        for special, date in zip(history.column("special").tolist(), history.dates.tolist()):
+            zodiac = self.get_zodiac_by_date(special, date)
             idx = self.ZODIACS.index(zodiac) if zodiac in self.ZODIACS else 0
             zodiac_series.append(idx)
-        
-        if len(zodiac_series) < 5:
+        return np.array(zodiac_series)
+    
+    def _zodiac_prediction(self, zodiac_series: np.ndarray, pred: Optional[int]) -> Dict:
+        """由生肖预测值计算生肖趋势"""
+        if pred is None:
             return {"predicted": "龙", "confidence": 0.08}
         
-        series = np.array(zodiac_series)
-        pred = predict_next_number(series, method, 0, 11, params)
-        
         predicted_zodiac = self.ZODIACS[pred] if 0 <= pred < 12 else "龙"
         
         # 计算置信度
-        recent = zodiac_series[-30:]
+        recent = zodiac_series[-30:].tolist()
         zodiac_counts = Counter(recent)
         total = len(recent)
         confidence = zodiac_counts.get(pred, 0) / total if total > 0 else 0.08
@@ -755,20 +835,15 @@ class HK6PredictionService:
     def predict_all_methods(self, lookback: int = 100, method_params: Dict = None) -> List[Dict]:
         """使用所有方法预测"""
         method_params = method_params or {}
-        results = []
-        for method in self.METHODS:
-            try:
-                params = method_params.get(method, {})
-                result = self.predict(method, lookback, params)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"HK6方法 {method} 预测失败: {e}")
-                results.append({
-                    "method": method,
-                    "method_name": self.METHOD_NAMES.get(method, method),
-                    "error": str(e)
-                })
-        return results
+        history = draw_store.get("hk6", self.db).tail(lookback)
+        if len(history) < 10:
+            return [{"error": "数据不足", "numbers": [], "special": None} for _ in self.METHODS]
+        
+        return cached_predictions(
+            "hk6", history, lookback,
+            {method: method_params.get(method, {}) for method in self.METHODS},
+            self._predict_methods,
+        )
     
     def generate_recommendations(self, lookback: int = 100, num_sets: int = 5,
                                   method_params: Dict = None,
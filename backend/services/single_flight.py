@@ -0,0 +1,167 @@
+"""
+相同请求合并（single-flight）
+新一期开奖后大量页面同时请求同一个分析接口（如 kill?lookback=2000），每个请求都会重新做一遍
+相同的回测或模型拟合。以 (接口, 规范化参数, 数据版本) 为键：同一时刻只有第一个请求真正计算，
+其余请求等待并共享它的结果。
+计算在独立任务中进行，发起请求的客户端断开不会中断计算；等待超过该键的超时时间的请求单独失败（504），
+计算本身继续。
+以独立的 HTTP 中间件接入，位于响应缓存（http_cache）内层：缓存关闭时合并照常生效，
+缓存开启时只有缓存未命中的请求才会到达这里。
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from config import SINGLE_FLIGHT_ENABLED, SINGLE_FLIGHT_TIMEOUT, SINGLE_FLIGHT_TIMEOUTS
+from services.http_cache import response_cache, lottery_for, normalized_query
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightTimeout(Exception):
+    """等待合并计算结果超时"""
+
+    def __init__(self, key: str, timeout: float):
+        super().__init__(f"等待 {key} 的计算结果超过 {timeout:g} 秒")
+        self.key = key
+        self.timeout = timeout
+
+
+class SingleFlight:
+    """按键合并并发的异步计算"""
+
+    def __init__(
+        self,
+        default_timeout: float = SINGLE_FLIGHT_TIMEOUT,
+        timeouts: Optional[Dict[str, float]] = None,
+        enabled: bool = SINGLE_FLIGHT_ENABLED,
+    ):
+        self.default_timeout = default_timeout
+        self.timeouts = dict(SINGLE_FLIGHT_TIMEOUTS if timeouts is None else timeouts)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._flights: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self.flights = 0
+        self.coalesced = 0
+        self.timeouts_hit = 0
+        self.errors = 0
+        self.max_waiters = 0
+        # 按接口统计：{接口: {"flights": n, "coalesced": n}}
+        self._by_endpoint: Dict[str, Dict[str, int]] = defaultdict(lambda: {"flights": 0, "coalesced": 0})
+
+    def timeout_for(self, endpoint: str) -> float:
+        """接口路径最后一段（如 kill / recommend）配置了超时时使用该值，否则为默认超时"""
+        return self.timeouts.get(endpoint.rstrip("/").rsplit("/", 1)[-1], self.default_timeout)
+
+    def _done(self, key: str, task: asyncio.Future) -> None:
+        """计算结束：移除进行中记录，并取走异常避免无人等待时的未处理告警"""
+        failed = not task.cancelled() and task.exception() is not None
+        with self._lock:
+            if self._flights.get(key) is task:
+                del self._flights[key]
+                self._waiters.pop(key, None)
+            if failed:
+                self.errors += 1
+        if failed:
+            logger.warning(f"合并计算 {key} 失败: {task.exception()}")
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        endpoint: str = "",
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """执行 fn 或等待同键的进行中计算，返回其结果
+
+        Args:
+            key: 合并键（接口 + 规范化参数 + 数据版本）
+            fn: 无参协程函数，只在没有同键计算进行中时调用
+            endpoint: 接口路径，用于按接口统计与选择超时
+            timeout: 等待上限（秒），默认按 endpoint 取
+
+        Raises:
+            SingleFlightTimeout: 等待超时（计算仍在进行）
+        """
+        if not self.enabled:
+            return await fn()
+        if timeout is None:
+            timeout = self.timeout_for(endpoint)
+
+        with self._lock:
+            task = self._flights.get(key)
+            if task is None:
+                task = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda t: self._done(key, t))
+                self._flights[key] = task
+                self._waiters[key] = 1
+                self.flights += 1
+                self._by_endpoint[endpoint]["flights"] += 1
+            else:
+                self._waiters[key] += 1
+                self.max_waiters = max(self.max_waiters, self._waiters[key])
+                self.coalesced += 1
+                self._by_endpoint[endpoint]["coalesced"] += 1
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts_hit += 1
+            raise SingleFlightTimeout(key, timeout) from None
+
+    @staticmethod
+    def make_key(request: Request, version_token: tuple) -> str:
+        """合并键：接口路径 + 规范化参数 + 数据版本"""
+        raw = json.dumps([normalized_query(request), version_token], ensure_ascii=False, default=str)
+        return f"{request.url.path}#{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]}"
+
+    async def middleware(self, request: Request, call_next):
+        """HTTP 中间件：与开奖数据相关的 GET 请求按合并键共享一次计算"""
+        lottery = lottery_for(request.url.path) if self.enabled and request.method == "GET" else None
+        if lottery is None:
+            return await call_next(request)
+
+        version = await run_in_threadpool(response_cache.version, lottery)
+        key = self.make_key(request, version.token)
+
+        async def compute():
+            response = await call_next(request)
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+            return response.status_code, headers, body
+
+        try:
+            status_code, headers, body = await self.do(key, compute, endpoint=request.url.path)
+        except SingleFlightTimeout as e:
+            return JSONResponse(status_code=504, content={"detail": str(e)})
+        return Response(content=body, status_code=status_code, headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.flights + self.coalesced
+            return {
+                "enabled": self.enabled,
+                "in_flight": len(self._flights),
+                "flights": self.flights,
+                "coalesced": self.coalesced,
+                "coalesce_rate": round(self.coalesced / requests, 4) if requests else 0.0,
+                "max_waiters": self.max_waiters,
+                "timeouts": self.timeouts_hit,
+                "errors": self.errors,
+                "default_timeout": self.default_timeout,
+                "endpoint_timeouts": dict(self.timeouts),
+                "endpoints": {name: dict(counts) for name, counts in self._by_endpoint.items()},
+            }
+
+
+single_flight = SingleFlight()
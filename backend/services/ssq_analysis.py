@@ -3,10 +3,9 @@
 """
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from collections import defaultdict
 
-from models.ssq import SSQResult
+from services.draw_store import draw_store
+from services.frequency_engine import position_stats, number_stats
 
 
 class SSQAnalysisService:
@@ -30,60 +29,24 @@ class SSQAnalysisService:
             end_period: 结束期号
             limit: 限制期数
         """
-        query = self.db.query(SSQResult)
-        
-        if weekday:
-            query = query.filter(SSQResult.weekday.contains(weekday))
-        if start_period:
-            query = query.filter(SSQResult.period >= start_period)
-        if end_period:
-            query = query.filter(SSQResult.period <= end_period)
-        
-        query = query.order_by(SSQResult.period.desc())
-        
-        if limit:
-            query = query.limit(limit)
-        
-        results = query.all()
-        total = len(results)
+        history = draw_store.get("ssq", self.db).select(
+            weekday=weekday,
+            start_period=start_period,
+            end_period=end_period,
+            limit=limit,
+        )
+        total = len(history)
         
         if total == 0:
             return {"total": 0, "red_positions": [], "blue": {}}
         
-        # 统计红球每个位置
-        red_counts = [defaultdict(int) for _ in range(6)]
-        blue_counts = defaultdict(int)
-        
-        for r in results:
-            reds = [r.red1, r.red2, r.red3, r.red4, r.red5, r.red6]
-            for i, num in enumerate(reds):
-                red_counts[i][num] += 1
-            blue_counts[r.blue] += 1
-        
-        # 转换为频率
-        red_positions = []
-        for i in range(6):
-            position_data = []
-            for num in range(1, 34):  # 红球 1-33
-                count = red_counts[i].get(num, 0)
-                position_data.append({
-                    "number": num,
-                    "count": count,
-                    "frequency": round(count / total, 4) if total > 0 else 0,
-                })
-            red_positions.append({
-                "position": i + 1,
-                "stats": position_data,
-            })
+        # 由累计频次索引得到红球每个位置及蓝球的计数
+        counts = history.counts()
+        red_counts = counts[:6]
+        blue_counts = counts[6]
         
-        blue_data = []
-        for num in range(1, 17):  # 蓝球 1-16
-            count = blue_counts.get(num, 0)
-            blue_data.append({
-                "number": num,
-                "count": count,
-                "frequency": round(count / total, 4) if total > 0 else 0,
-            })
+        red_positions = position_stats(red_counts, total, 33)  # 红球 1-33
+        blue_data = number_stats(blue_counts, total, 16)  # 蓝球 1-16
         
         return {
             "total": total,
@@ -7,6 +7,10 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from models.ssq import SSQResult
+from models.draw_columns import WEEKDAY_CODES, parse_day
+from services.draw_store import draw_store
+from services.sync_planner import sync_with_plan
+from services.bulk_upsert import bulk_upsert, bulk_upsert_stream, load_by_keys, format_upsert_message
 from sources.scraper.ssq_scraper import SSQScraper
 
 logger = logging.getLogger(__name__)
@@ -20,32 +24,8 @@ class SSQService:
         self.scraper = SSQScraper()
     
     async def sync_latest(self) -> dict:
-        """增量同步：只获取数据库中缺失的最新数据"""
-        latest_db = self.get_latest()
-        latest_period = latest_db.period if latest_db else 0
-        
-        # 先获取少量数据判断是否有新期
-        data = await self.scraper.fetch_by_count(10)
-        if not data:
-            return {"synced": 0, "message": "无法获取数据"}
-        
-        # 找出需要同步的期数
-        new_data = [d for d in data if d["period"] > latest_period]
-        
-        if not new_data:
-            return {"synced": 0, "message": "已是最新数据"}
-        
-        # 如果差距较大，获取更多数据
-        newest_period = max(d["period"] for d in data)
-        gap = newest_period - latest_period
-        
-        if gap > 10:
-            data = await self.scraper.fetch_by_count(min(gap + 5, 100))
-            new_data = [d for d in data if d["period"] > latest_period]
-        
-        # 保存新数据
-        saved = self._save_data(new_data)
-        return {"synced": len(saved), "message": f"已同步 {len(saved)} 期新数据"}
+        """增量同步：按开奖日历只获取库中最新一期之后应已开出的期号"""
+        return await sync_with_plan(self, "ssq")
     
     async def fetch_and_save(
         self,
@@ -66,35 +46,58 @@ class SSQService:
         else:
             data = await self.scraper.fetch_by_count(30)
         
-        return self._save_data(data)
+        stats = self._save_data(data)
+        return load_by_keys(self.db, SSQResult, stats["periods"])
     
     async def refresh_all(self, count: int = 100) -> dict:
-        """全量刷新：获取指定期数的所有数据并更新数据库"""
-        data = await self.scraper.fetch_by_count(count)
-        saved = self._save_data(data)
-        return {"refreshed": len(saved), "message": f"已刷新 {len(saved)} 期数据"}
+        """全量刷新：边获取边分批写入数据库，内存占用与期数无关"""
+        stats = await bulk_upsert_stream(
+            self.db, SSQResult, self.scraper.stream_draws(count),
+            on_chunk=lambda rows, chunk_stats: draw_store.on_saved("ssq", rows, chunk_stats),
+        )
+        logger.info(f"已刷新 {stats['total']} 条双色球数据")
+        return {
+            "refreshed": stats["total"],
+            "inserted": stats["inserted"],
+            "updated": stats["updated"],
+            "unchanged": stats["unchanged"],
+            "message": format_upsert_message("已刷新", stats),
+        }
     
-    def _save_data(self, data: List[dict]) -> List[SSQResult]:
-        """保存数据到数据库"""
-        saved_results = []
-        for item in data:
-            existing = self.db.query(SSQResult).filter(
-                SSQResult.period == item["period"]
-            ).first()
-            
-            if existing:
-                for key, value in item.items():
-                    setattr(existing, key, value)
-                saved_results.append(existing)
-            else:
-                result = SSQResult(**item)
-                self.db.add(result)
-                saved_results.append(result)
-        
-        self.db.commit()
-        logger.info(f"已保存 {len(saved_results)} 条双色球数据")
-        return saved_results
+    def _save_data(self, data: List[dict]) -> dict:
+        """批量保存数据到数据库，返回新增/更新/未变计数"""
+        stats = bulk_upsert(self.db, SSQResult, data)
+        draw_store.on_saved("ssq", data, stats)
+        logger.info(f"已保存 {stats['total']} 条双色球数据")
+        return stats
     
+    @staticmethod
+    def _filter(
+        query,
+        start_period: Optional[int] = None,
+        end_period: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        weekday: Optional[str] = None,
+    ):
+        """筛选条件落在派生列上：期号 -> draw_key，日期 -> draw_date（含结束日当天），星期 -> weekday_code
+
+        无法解析为 YYYY-MM-DD 的日期参数（如 "2025-01"）仍按原日期字符串比较"""
+        if start_period:
+            query = query.filter(SSQResult.draw_key >= start_period)
+        if end_period:
+            query = query.filter(SSQResult.draw_key <= end_period)
+        if start_date:
+            day = parse_day(start_date)
+            query = query.filter(SSQResult.draw_date >= day if day else SSQResult.date >= start_date)
+        if end_date:
+            day = parse_day(end_date)
+            query = query.filter(SSQResult.draw_date <= day if day else SSQResult.date <= end_date)
+        if weekday:
+            codes = sorted({WEEKDAY_CODES[ch] for ch in weekday if ch in WEEKDAY_CODES})
+            query = query.filter(SSQResult.weekday_code.in_(codes))
+        return query
+
     def get_all(
         self,
         limit: int = 100,
@@ -103,21 +106,20 @@ class SSQService:
         end_period: Optional[int] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
+        weekday: Optional[str] = None,
     ) -> List[SSQResult]:
         """获取双色球数据（支持筛选）"""
-        query = self.db.query(SSQResult)
-        
-        if start_period:
-            query = query.filter(SSQResult.period >= start_period)
-        if end_period:
-            query = query.filter(SSQResult.period <= end_period)
-        if start_date:
-            query = query.filter(SSQResult.date >= start_date)
-        if end_date:
-            query = query.filter(SSQResult.date <= end_date)
-        
+        query = self._filter(
+            self.db.query(SSQResult), start_period, end_period, start_date, end_date, weekday
+        )
+        if start_date or end_date:
+            # 日期范围走 (draw_date, draw_key) 索引，按同一索引倒序即为开奖先后倒序
+            order = [SSQResult.draw_date.desc(), SSQResult.draw_key.desc()]
+        else:
+            order = [SSQResult.draw_key.desc()]
+
         return (
-            query.order_by(SSQResult.period.desc())
+            query.order_by(*order)
             .offset(offset)
             .limit(limit)
             .all()
@@ -133,21 +135,14 @@ class SSQService:
         end_period: Optional[int] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
+        weekday: Optional[str] = None,
     ) -> int:
         """获取数据总数（支持筛选）"""
-        query = self.db.query(func.count(SSQResult.id))
-        
-        if start_period:
-            query = query.filter(SSQResult.period >= start_period)
-        if end_period:
-            query = query.filter(SSQResult.period <= end_period)
-        if start_date:
-            query = query.filter(SSQResult.date >= start_date)
-        if end_date:
-            query = query.filter(SSQResult.date <= end_date)
-        
+        query = self._filter(
+            self.db.query(func.count(SSQResult.id)), start_period, end_period, start_date, end_date, weekday
+        )
         return query.scalar()
     
     def get_latest(self) -> Optional[SSQResult]:
         """获取最新一期数据"""
-        return self.db.query(SSQResult).order_by(SSQResult.period.desc()).first()
+        return self.db.query(SSQResult).order_by(SSQResult.draw_key.desc()).first()
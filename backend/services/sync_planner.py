@@ -0,0 +1,189 @@
+"""
+增量同步规划
+由库中最新一期（draw_key 索引上的倒序取一行）与开奖日历（MetaphysicalService.DRAW_TIMES）
+推算此后应已开出的期号，只请求这一范围；下一期尚未开奖时不访问网络。
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import SYNC_BOOTSTRAP_COUNT, SYNC_PERIOD_SLACK
+from services.draw_store import SPECS
+from services.metaphysical_service import MetaphysicalService
+
+logger = logging.getLogger(__name__)
+
+
+def latest_head(db: Session, lottery: str) -> Optional[Dict[str, Any]]:
+    """库中最新一期的期号、(年份, 当年期数) 与开奖日期（draw_key 索引上取一行，不扫描全表）"""
+    spec = SPECS[lottery]
+    model = spec.model
+    row = (
+        db.query(model.period, getattr(model, spec.date_column), model.draw_key)
+        .order_by(model.draw_key.desc())
+        .first()
+    )
+    if row is None:
+        return None
+    period, date, key = row
+    if lottery == "dlt":
+        # 大乐透期号 yyNNN
+        year, no = 2000 + int(period[:2]), int(period[2:])
+    else:
+        # 双色球 yyyyNNN；六合彩 draw_key = 年份*1000+当年期数
+        year, no = divmod(int(key), 1000)
+    return {"period": period, "year": year, "no": no, "date": date or ""}
+
+
+def format_period(lottery: str, year: int, no: int) -> str:
+    """(年份, 当年期数) -> 数据源期号"""
+    if lottery == "ssq":
+        return str(year * 1000 + no)
+    if lottery == "dlt":
+        return f"{year % 100:02d}{no:03d}"
+    return f"{year}{no}N"
+
+
+class SyncPlan:
+    """一次增量同步要请求的范围
+
+    mode:
+      - "none": 按开奖日历下一期尚未开奖，不访问网络
+      - "count": 库中无数据，按期数获取最近 count 期
+      - "period": 按期号范围 [start, end] 获取（双色球、大乐透）
+      - "date": 按开奖日期范围 [start, end] 获取（六合彩，HKJC 接口只支持日期筛选）
+    """
+
+    def __init__(
+        self,
+        lottery: str,
+        mode: str,
+        head: Optional[Dict[str, Any]] = None,
+        expected_draws: Optional[List[datetime]] = None,
+        next_draw: Optional[datetime] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        count: Optional[int] = None,
+    ):
+        self.lottery = lottery
+        self.mode = mode
+        self.head = head
+        self.expected_draws = expected_draws or []
+        self.next_draw = next_draw
+        self.start = start
+        self.end = end
+        self.count = count
+
+    def select_new(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """只保留排序键晚于库中最新一期的记录"""
+        if not self.head:
+            return data
+        spec = SPECS[self.lottery]
+        head_key = spec.sort_key(self.head)
+        return [d for d in data if spec.sort_key(d) > head_key]
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "lottery": self.lottery,
+            "mode": self.mode,
+            "head": self.head["period"] if self.head else None,
+            "expected": len(self.expected_draws),
+            "start": self.start,
+            "end": self.end,
+            "count": self.count,
+            "next_draw": self.next_draw.isoformat(timespec="minutes") if self.next_draw else None,
+        }
+
+
+def _head_draw_time(lottery: str, head: Dict[str, Any]) -> Optional[datetime]:
+    config = MetaphysicalService.DRAW_TIMES[lottery]
+    try:
+        day = datetime.strptime(head["date"][:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+    return day.replace(hour=config["hour"], minute=config["minute"])
+
+
+def _expected_periods(head: Dict[str, Any], draws: List[datetime]) -> Tuple[int, int]:
+    """按开奖日历逐期推算最后一期的 (年份, 当年期数)，跨年时期数从 1 重新计"""
+    year, no = head["year"], head["no"]
+    for draw in draws:
+        if draw.year != year:
+            year, no = draw.year, 0
+        no += 1
+    return year, no + SYNC_PERIOD_SLACK
+
+
+def plan_sync(db: Session, lottery: str, now: Optional[datetime] = None) -> SyncPlan:
+    """根据最新一期与开奖日历生成同步计划"""
+    now = now or datetime.now()
+    calendar = MetaphysicalService()
+    head = latest_head(db, lottery)
+    if head is None:
+        return SyncPlan(lottery, "count", count=SYNC_BOOTSTRAP_COUNT)
+
+    last_draw = _head_draw_time(lottery, head)
+    if last_draw is None:
+        logger.warning(f"{lottery} 最新一期 {head['period']} 开奖日期无法解析: {head['date']!r}")
+        return SyncPlan(lottery, "count", head=head, count=SYNC_BOOTSTRAP_COUNT)
+
+    # 库中最新一期之后、当前时间之前按日历应已开出的各期
+    expected = []
+    draw = calendar.get_next_draw_time(lottery, last_draw)
+    while draw <= now:
+        expected.append(draw)
+        draw = calendar.get_next_draw_time(lottery, draw)
+    if not expected:
+        return SyncPlan(lottery, "none", head=head, next_draw=draw)
+
+    if lottery == "hk6":
+        # 日期范围从最新一期当天取到今天，日历外的加开也能取到
+        return SyncPlan(
+            lottery, "date", head=head, expected_draws=expected, next_draw=draw,
+            start=head["date"][:10], end=now.strftime("%Y-%m-%d"),
+        )
+    end_year, end_no = _expected_periods(head, expected)
+    return SyncPlan(
+        lottery, "period", head=head, expected_draws=expected, next_draw=draw,
+        start=format_period(lottery, head["year"], head["no"] + 1),
+        end=format_period(lottery, end_year, end_no),
+    )
+
+
+async def fetch_planned(scraper, plan: SyncPlan) -> List[Dict[str, Any]]:
+    """按计划调用数据源，返回晚于库中最新一期的记录"""
+    if plan.mode == "none":
+        return []
+    if plan.mode == "count":
+        data = await scraper.fetch_by_count(plan.count)
+    elif plan.mode == "date":
+        data = await scraper.fetch_by_date(plan.start, plan.end)
+    else:
+        data = await scraper.fetch_by_period(plan.start, plan.end)
+    return plan.select_new(data)
+
+
+async def sync_with_plan(service, lottery: str) -> Dict[str, Any]:
+    """各彩种 sync_latest 的公共实现：规划 -> 按范围获取 -> 保存"""
+    plan = plan_sync(service.db, lottery)
+    if plan.mode == "none":
+        return {
+            "synced": 0,
+            "message": f"已是最新数据，下一期 {plan.next_draw:%Y-%m-%d %H:%M} 开奖",
+            "plan": plan.describe(),
+        }
+
+    new_data = await fetch_planned(service.scraper, plan)
+    if not new_data:
+        return {"synced": 0, "message": "开奖结果尚未发布或无法获取数据", "plan": plan.describe()}
+
+    stats = service._save_data(new_data)
+    return {
+        "synced": stats["total"],
+        "inserted": stats["inserted"],
+        "updated": stats["updated"],
+        "message": f"已同步 {stats['total']} 期新数据",
+        "plan": plan.describe(),
+    }
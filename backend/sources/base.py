@@ -2,11 +2,23 @@
 数据源抽象基类
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+
+from sources.http_clients import SourceClient, http_clients
 
 
 class DataSource(ABC):
-    """数据源抽象基类"""
+    """数据源抽象基类
+
+    子类通过 source_name 指定使用注册表中的哪个 HTTP 客户端，
+    也可在构造时注入其他 SourceClient（如测试用的本地桩服务）。
+    """
+    
+    source_name: str = ""
+    
+    def __init__(self, client: Optional[SourceClient] = None):
+        self.client = client or http_clients.get(self.source_name)
+        self.url = self.client.url
     
     @abstractmethod
     async def fetch_by_count(self, count: int) -> List[Dict[str, Any]]:
@@ -46,3 +58,32 @@ class DataSource(ABC):
             开奖结果列表
         """
         raise NotImplementedError("该数据源不支持按日期查询")
+    
+    async def iter_pages(
+        self, count: Optional[int] = None, start_page: int = 1
+    ) -> AsyncIterator[Tuple[int, int, List[Dict[str, Any]]]]:
+        """按页（新到旧）逐页产出数据，供断点续传的历史回填使用（可选实现）
+        
+        Args:
+            count: 最多获取的期数，为空时获取全部历史
+            start_page: 起始页码（从检查点续传时为上次提交页的下一页）
+            
+        Yields:
+            (页码, 总页数, 该页开奖结果)；某页重试后仍失败时抛出异常，不跳过
+        """
+        raise NotImplementedError("该数据源不支持分页回填")
+        yield
+    
+    async def stream_draws(self, count: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """逐条产出开奖结果（新到旧），内存占用只与单批页数有关、与总期数无关
+        
+        Args:
+            count: 最多产出的期数，为空时产出全部历史
+        """
+        produced = 0
+        async for _, _, rows in self.iter_pages(count):
+            for row in rows:
+                yield row
+                produced += 1
+                if count and produced >= count:
+                    return
@@ -0,0 +1,240 @@
+"""
+数据源 HTTP 客户端注册表
+每个数据源一个长连接客户端（独立的超时、连接数上限、重试策略与限速），
+在 main.py 的 lifespan 中启动、关闭时统一释放，并注入各 DataSource。
+"""
+import asyncio
+import logging
+import random
+import threading
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from config import SSQ_CONFIG, DLT_CONFIG, HK6_CONFIG
+from sources.rate_limit import get_host_limiter
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _retryable(error: Exception) -> bool:
+    """传输层错误、429 与 5xx 可重试；其他 4xx 为请求本身的问题，重试无益"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return True
+
+
+class SourceClient:
+    """单个数据源的 HTTP 客户端
+
+    httpx 的连接绑定在创建它的事件循环上，因此每个事件循环各持有一个 AsyncClient
+    （应用运行时只有一个；脚本中的 asyncio.run 会另建）。
+    request() 负责限速、失败重试（仅传输错误、429 与 5xx，指数退避）与统计。
+    """
+
+    def __init__(self, name: str, config: Dict[str, Any]):
+        self.name = name
+        self.url = config["url"]
+        self.timeout = config.get("timeout", 30.0)
+        self.max_connections = config.get("max_concurrency", 4)
+        self.keepalive_expiry = config.get("keepalive_expiry", 30.0)
+        self.http2 = bool(config.get("http2")) and _http2_available()
+        self.verify = config.get("verify", True)
+        self.max_retries = config.get("max_retries", 3)
+        self.retry_backoff = config.get("retry_backoff", 0.5)
+        self.rate_limiter = get_host_limiter(self.url, config.get("rate_limit", 0))
+        if config.get("http2") and not self.http2:
+            logger.info(f"未安装 h2，{name} 数据源使用 HTTP/1.1")
+
+        self._clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+        self._streams: "weakref.WeakSet" = weakref.WeakSet()
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.new_connections = 0
+        self.http_versions: Dict[str, int] = {}
+
+    def client(self) -> httpx.AsyncClient:
+        """当前事件循环上的长连接客户端"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for stale in [lp for lp in self._clients if lp.is_closed()]:
+                del self._clients[stale]
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    http2=self.http2,
+                    verify=self.verify,
+                    follow_redirects=True,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                        keepalive_expiry=self.keepalive_expiry,
+                    ),
+                    event_hooks={"response": [self._on_response]},
+                )
+                self._clients[loop] = client
+            return client
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        self.http_versions[response.http_version] = self.http_versions.get(response.http_version, 0) + 1
+        stream = response.extensions.get("network_stream")
+        if stream is not None and stream not in self._streams:
+            self._streams.add(stream)
+            self.new_connections += 1
+
+    async def request(self, method: str, url: Optional[str] = None, **kwargs) -> httpx.Response:
+        """发送请求（限速 + 重试传输错误、429 与 5xx），重试用尽或不可重试时抛出该次异常"""
+        client = self.client()
+        url = url or self.url
+        for attempt in range(1, self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            self.in_flight += 1
+            self.requests += 1
+            try:
+                response = await client.request(method, url, **kwargs)
+                response.raise_for_status()
+                return response
+            except (httpx.HTTPError, OSError) as e:
+                self.errors += 1
+                if attempt == self.max_retries or not _retryable(e):
+                    raise
+                self.retries += 1
+                backoff = self.retry_backoff * 2 ** (attempt - 1)
+                logger.warning(f"{self.name} 请求失败: {e}, {backoff:.1f}s 后重试 ({attempt}/{self.max_retries})")
+            finally:
+                self.in_flight -= 1
+            await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: Optional[str] = None, **kwargs) -> AsyncIterator[httpx.Response]:
+        """流式请求：建立连接与状态码检查按 request() 的策略重试，响应体由调用方边接收边读取
+
+        开始读取响应体后不再重试（已产出的数据无法撤回），读取中的异常直接抛给调用方。
+        """
+        client = self.client()
+        url = url or self.url
+        for attempt in range(1, self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            self.in_flight += 1
+            self.requests += 1
+            response = None
+            try:
+                response = await client.send(client.build_request(method, url, **kwargs), stream=True)
+                response.raise_for_status()
+            except (httpx.HTTPError, OSError) as e:
+                self.errors += 1
+                self.in_flight -= 1
+                if response is not None:
+                    await response.aclose()
+                if attempt == self.max_retries or not _retryable(e):
+                    raise
+                self.retries += 1
+                backoff = self.retry_backoff * 2 ** (attempt - 1)
+                logger.warning(f"{self.name} 请求失败: {e}, {backoff:.1f}s 后重试 ({attempt}/{self.max_retries})")
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+                continue
+            try:
+                yield response
+            except (httpx.HTTPError, OSError):
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+                await response.aclose()
+            return
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+        for loop, client in clients:
+            if loop.is_closed():
+                continue
+            try:
+                if loop is asyncio.get_running_loop():
+                    await client.aclose()
+                else:
+                    asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            except Exception as e:
+                logger.warning(f"关闭 {self.name} 客户端失败: {e}")
+
+    def _pool_connections(self) -> Dict[str, int]:
+        """连接池中的连接数（总数 / 空闲），读取 httpcore 连接池状态"""
+        total = idle = 0
+        with self._lock:
+            clients = list(self._clients.values())
+        for client in clients:
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            for conn in getattr(pool, "connections", []):
+                total += 1
+                idle += bool(conn.is_idle())
+        return {"pooled": total, "idle": idle}
+
+    def stats(self) -> Dict[str, Any]:
+        reused = max(self.requests - self.errors - self.new_connections, 0)
+        ok = self.requests - self.errors
+        return {
+            "source": self.name,
+            "in_flight": self.in_flight,
+            **self._pool_connections(),
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_rate": round(reused / ok, 4) if ok else 0.0,
+            "http_versions": dict(self.http_versions),
+            "http2_enabled": self.http2,
+            "timeout": self.timeout,
+            "max_connections": self.max_connections,
+            "max_retries": self.max_retries,
+        }
+
+
+class ClientRegistry:
+    """按数据源名称管理 SourceClient"""
+
+    def __init__(self, configs: Dict[str, Dict[str, Any]]):
+        self.configs = configs
+        self._clients: Dict[str, SourceClient] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> SourceClient:
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                client = self._clients[name] = SourceClient(name, self.configs[name])
+            return client
+
+    async def start(self) -> None:
+        """在应用事件循环上预先创建各数据源的客户端"""
+        for name in self.configs:
+            self.get(name).client()
+        logger.info(f"数据源 HTTP 客户端已创建: {', '.join(self.configs)}")
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+        for client in clients:
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: self.get(name).stats() for name in self.configs}
+
+
+http_clients = ClientRegistry({"ssq": SSQ_CONFIG, "dlt": DLT_CONFIG, "hk6": HK6_CONFIG})
@@ -0,0 +1,140 @@
+"""
+增量 JSON 解析
+响应体边到边解析：只在内存中保留目标数组的当前元素与未消费的字节，
+每个元素完整到达后立即解码产出，适用于大 pageSize / lastNDraw 的抓取。
+"""
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import httpx
+
+# 字符串 | 结构字符 | 数字与字面量
+_TOKEN = re.compile(
+    r'[ \t\r\n]*(?:("(?:[^"\\]|\\.)*")|([{}\[\],:])|(-?[0-9][0-9.eE+\-]*|true|false|null))',
+    re.DOTALL,
+)
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+_decoder = json.JSONDecoder()
+
+
+class JSONArrayStream:
+    """从 JSON 文档中增量提取某个数组的元素
+
+    Args:
+        array_path: 目标数组所在的对象键路径，如 ("value", "list")
+        field_paths: 需要同时记录的标量字段路径（如总页数 ("value", "pages")），
+            解析过程中写入 fields
+
+    feed() 每次传入一段字节，返回其中已完整的数组元素；最后以 final=True 结束。
+    数组外的结构逐个记号扫描，数组元素整体交给 json 的 C 解码器。
+    """
+
+    def __init__(self, array_path: Sequence[str], field_paths: Iterable[Sequence[str]] = ()):
+        self.array_path = tuple(array_path)
+        self.field_paths = {tuple(p) for p in field_paths}
+        self.fields: Dict[Tuple[str, ...], Any] = {}
+        self.found = False  # 是否遇到了目标数组
+        self.items = 0
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        # 每层容器: [类型 "o"/"a", 当前键, 是否期待键]
+        self._stack: List[list] = []
+        self._in_target = False
+
+    def _path(self) -> Optional[Tuple[str, ...]]:
+        """当前位置的键路径，途经数组时为 None"""
+        keys = []
+        for kind, key, _ in self._stack:
+            if kind != "o":
+                return None
+            keys.append(key)
+        return tuple(keys)
+
+    def feed(self, chunk: bytes, final: bool = False) -> List[Any]:
+        buf = self._buf + self._utf8.decode(chunk, final)
+        pos = 0
+        n = len(buf)
+        stack = self._stack
+        items = []
+        while pos < n:
+            if self._in_target:
+                # 目标数组内：跳过分隔符后整体解码一个元素
+                pos = _WHITESPACE.match(buf, pos).end()
+                if pos < n and buf[pos] == ",":
+                    pos = _WHITESPACE.match(buf, pos + 1).end()
+                if pos >= n:
+                    break
+                if buf[pos] == "]":
+                    self._in_target = False
+                    stack.pop()
+                    pos += 1
+                    continue
+                try:
+                    item, end = _decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if not final:
+                        break  # 元素尚未完整到达
+                    raise ValueError(f"JSON 格式错误（位置 {pos}）: {buf[pos:pos + 40]!r}")
+                if buf[pos] not in "{[\"" and not final and (end == n or buf[end] not in " \t\r\n,]"):
+                    break  # 数字/字面量可能被截断
+                items.append(item)
+                self.items += 1
+                pos = end
+                continue
+
+            m = _TOKEN.match(buf, pos)
+            if m is None:
+                if _WHITESPACE.match(buf, pos).end() == n:
+                    pos = n
+                    break
+                if not final:
+                    break  # 字符串或字面量被截断，等待后续字节
+                raise ValueError(f"JSON 格式错误（位置 {pos}）: {buf[pos:pos + 40]!r}")
+            if m.lastindex == 3 and m.end() == n and not final:
+                break  # 数字/字面量可能被截断
+            pos = m.end()
+            frame = stack[-1] if stack else None
+
+            if m.lastindex in (1, 3):
+                token = m.group(m.lastindex)
+                if m.lastindex == 1 and frame is not None and frame[0] == "o" and frame[2]:
+                    frame[1] = json.loads(token)
+                    frame[2] = False
+                elif frame is not None and frame[0] == "o" and self.field_paths:
+                    path = self._path()
+                    if path in self.field_paths:
+                        self.fields[path] = json.loads(token)
+                continue
+
+            ch = m.group(2)
+            if ch in "{[":
+                is_target = (
+                    ch == "[" and not self.found
+                    and frame is not None and self._path() == self.array_path
+                )
+                stack.append(["o" if ch == "{" else "a", None, ch == "{"])
+                if is_target:
+                    self.found = self._in_target = True
+            elif ch in "}]":
+                if not stack:
+                    raise ValueError(f"JSON 格式错误（位置 {pos}）: 多余的 {ch}")
+                stack.pop()
+            elif ch == "," and frame is not None and frame[0] == "o":
+                frame[2] = True
+
+        if final and (stack or pos < n):
+            raise ValueError("JSON 响应不完整")
+        # 丢弃已消费的部分，只保留未完整到达的元素或记号
+        self._buf = buf[pos:]
+        return items
+
+
+async def stream_json_items(response: httpx.Response, parser: JSONArrayStream) -> AsyncIterator[Any]:
+    """边接收响应体边产出目标数组的元素（标量字段见 parser.fields）"""
+    async for chunk in response.aiter_bytes():
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.feed(b"", final=True):
+        yield item
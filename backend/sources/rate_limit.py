@@ -0,0 +1,42 @@
+"""
+数据源请求限速
+同一主机的所有请求共享一个限速器，保证相邻请求的最小间隔
+"""
+import asyncio
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlsplit
+
+
+class RateLimiter:
+    """按固定速率放行请求（每秒 rate 次，rate <= 0 表示不限速）"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    async def acquire(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_host_limiter(url: str, rate: float) -> RateLimiter:
+    """获取 url 所在主机的共享限速器（首次创建时的速率生效）"""
+    host = urlsplit(url).netloc
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = RateLimiter(rate)
+        return limiter
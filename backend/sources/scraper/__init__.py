@@ -1,4 +1,5 @@
 from sources.scraper.ssq_scraper import SSQScraper
 from sources.scraper.dlt_scraper import DLTScraper
+from sources.scraper.hk6_scraper import HK6Scraper
 
-__all__ = ["SSQScraper", "DLTScraper"]
+__all__ = ["SSQScraper", "DLTScraper", "HK6Scraper"]
@@ -2,29 +2,28 @@
 大乐透数据爬虫
 从体育彩票官网获取数据
 """
-import logging
-from typing import List, Dict, Any
-import requests
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import logging
 import math
+from datetime import datetime
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 
 from sources.base import DataSource
+from sources.http_clients import SourceClient, http_clients
+from sources.json_stream import JSONArrayStream, stream_json_items
 from config import DLT_CONFIG
 
 logger = logging.getLogger(__name__)
 
-# 创建线程池用于同步请求
-_executor = ThreadPoolExecutor(max_workers=5)
-
 
 class DLTScraper(DataSource):
     """大乐透数据爬虫"""
-    
+
     PAGE_SIZE = 30  # API 每页最多30条
-    
-    def __init__(self):
-        self.url = DLT_CONFIG["url"]
+    source_name = "dlt"
+
+    def __init__(self, client: Optional[SourceClient] = None):
+        super().__init__(client)
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36",
             "Accept": "application/json, text/plain, */*",
@@ -38,126 +37,192 @@ class DLTScraper(DataSource):
             "Sec-Fetch-Site": "cross-site",
         }
         self.default_params = DLT_CONFIG["default_params"].copy()
-    
+        self.max_concurrency = self.client.max_connections
+        # 最近一次抓取中重试后仍失败的页码
+        self.failed_pages: List[int] = []
+
+    @staticmethod
+    def connection_stats() -> Dict[str, Any]:
+        """共享客户端的请求数与连接复用统计"""
+        return http_clients.get("dlt").stats()
+
     async def fetch_by_count(self, count: int) -> List[Dict[str, Any]]:
         """按期数获取大乐透数据 - 通过多页获取超过100期"""
+        pages = await self._fetch_pages(self.default_params, max_rows=count)
         all_results = []
-        total_pages = math.ceil(count / self.PAGE_SIZE)
-        
-        loop = asyncio.get_event_loop()
-        
-        for page_no in range(1, total_pages + 1):
-            params = {
-                **self.default_params,
-                "pageNo": str(page_no),
-                "pageSize": str(self.PAGE_SIZE),
-            }
-            
-            page_data = await loop.run_in_executor(
-                _executor, self._sync_fetch_page, params, page_no
-            )
-            
-            if not page_data:
-                break
-                
-            parsed = self._parse_results(page_data)
-            all_results.extend(parsed)
-            
-            # 检查是否已获取足够数据
-            if len(all_results) >= count:
-                break
-            
-            # 检查是否还有更多页
-            value = page_data.get("value", {})
-            api_total_pages = value.get("pages", 1)
-            if page_no >= api_total_pages:
-                break
-        
-        return all_results[:count]
-    
+        for rows, _ in pages:
+            all_results.extend(rows)
+        return self._dedupe(all_results)[:count]
+
     async def fetch_by_period(self, start: str, end: str) -> List[Dict[str, Any]]:
         """按期号范围获取大乐透数据"""
+        params = {
+            **self.default_params,
+            "startTerm": start,
+            "endTerm": end,
+        }
         all_results = []
+        for rows, _ in await self._fetch_pages(params):
+            all_results.extend(rows)
+        return self._dedupe(all_results)
+
+    async def fetch_by_date(
+        self, start_date: str, end_date: str
+    ) -> List[Dict[str, Any]]:
+        """按日期范围获取大乐透数据
+
+        接口不支持按日期查询：从最新一期起按页并发获取（每批 max_concurrency 页），
+        按停售日期（即开奖日）筛选，越过起始日期后停止。
+        停售日期缺失或无法解析的记录跳过；重试后仍失败的页记入 failed_pages。
+        """
+        self.failed_pages = []
+        results = []
         page_no = 1
-        
-        loop = asyncio.get_event_loop()
-        
-        while True:
-            params = {
-                **self.default_params,
-                "pageNo": str(page_no),
-                "pageSize": str(self.PAGE_SIZE),
-                "startTerm": start,
-                "endTerm": end,
-            }
-            
-            page_data = await loop.run_in_executor(
-                _executor, self._sync_fetch_page, params, page_no
-            )
-            
-            if not page_data:
+        total_pages = None
+        while total_pages is None or page_no <= total_pages:
+            if total_pages is None:
+                batch = [page_no]
+            else:
+                batch = list(range(page_no, min(page_no + self.max_concurrency, total_pages + 1)))
+            pages = await self._gather_pages(self.default_params, batch)
+            if total_pages is None:
+                if pages[0] is None:
+                    break
+                total_pages = pages[0][1]
+            reached_start = False
+            for page in pages:
+                for item in page[0] if page else []:
+                    day = item["sale_end_time"][:10]
+                    try:
+                        datetime.strptime(day, "%Y-%m-%d")
+                    except ValueError:
+                        # 空字符串会小于任何起始日期，导致提前停止翻页
+                        logger.warning(f"大乐透第 {item['period']} 期停售日期无法解析: {item['sale_end_time']!r}")
+                        continue
+                    if day < start_date:
+                        reached_start = True
+                    elif day <= end_date:
+                        results.append(item)
+            if reached_start:
                 break
-                
-            parsed = self._parse_results(page_data)
-            if not parsed:
-                break
-                
-            all_results.extend(parsed)
-            
-            # 检查是否还有更多页
-            value = page_data.get("value", {})
-            total_pages = value.get("pages", 1)
-            if page_no >= total_pages:
-                break
-            
-            page_no += 1
+            page_no = batch[-1] + 1
+        if self.failed_pages:
+            logger.error(f"大乐透第 {sorted(self.failed_pages)} 页重试后仍获取失败，结果不完整")
+        return self._dedupe(results)
+
+    async def iter_pages(
+        self, count: Optional[int] = None, start_page: int = 1
+    ) -> AsyncIterator[Tuple[int, int, List[Dict[str, Any]]]]:
+        """逐页产出全部历史（新到旧），每批 max_concurrency 页并发、按页序产出"""
+        self.failed_pages = []
+        first_page = await self._fetch_page(self.default_params, 1)
+        if first_page is None:
+            raise RuntimeError("大乐透第 1 页获取失败")
+        total_pages = first_page[1]
+        if count:
+            total_pages = min(total_pages, self._pages_for(count, first_page))
         
-        return all_results
+        page_no = start_page
+        while page_no <= total_pages:
+            batch = list(range(page_no, min(page_no + self.max_concurrency, total_pages + 1)))
+            pages = await self._gather_pages(self.default_params, [p for p in batch if p != 1])
+            if batch[0] == 1:
+                pages = [first_page] + pages
+            for p, page in zip(batch, pages):
+                if page is None:
+                    raise RuntimeError(f"大乐透第 {p} 页重试后仍获取失败")
+                yield p, total_pages, page[0]
+            page_no = batch[-1] + 1
     
-    def _sync_fetch_page(self, params: dict, page_no: int) -> Dict[str, Any]:
-        """同步获取单页数据"""
+    def _pages_for(self, count: int, first_page: Tuple[List[Dict[str, Any]], int]) -> int:
+        """取 count 期所需页数，按服务端第一页实际返回的条数计算（服务端可能限制 pageSize）"""
+        return math.ceil(count / (len(first_page[0]) or self.PAGE_SIZE))
+
+    async def _fetch_pages(self, params: dict, max_rows: Optional[int] = None) -> List[Tuple[List[Dict[str, Any]], int]]:
+        """第一页确定总页数，其余页并发获取，按页序返回（跳过失败页）"""
+        self.failed_pages = []
+        first_page = await self._fetch_page(params, 1)
+        if first_page is None:
+            return []
+        total_pages = first_page[1]
+        if max_rows is not None:
+            total_pages = min(total_pages, self._pages_for(max_rows, first_page))
+        rest = await self._gather_pages(params, list(range(2, total_pages + 1)))
+        if self.failed_pages:
+            logger.error(f"大乐透第 {sorted(self.failed_pages)} 页重试后仍获取失败，结果不完整")
+        return [first_page] + [page for page in rest if page is not None]
+
+    async def _gather_pages(
+        self, params: dict, page_numbers: List[int]
+    ) -> List[Optional[Tuple[List[Dict[str, Any]], int]]]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(page_no: int):
+            async with semaphore:
+                return await self._fetch_page(params, page_no)
+
+        return list(await asyncio.gather(*(fetch(page_no) for page_no in page_numbers)))
+
+    async def _fetch_page(self, params: dict, page_no: int) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """获取单页数据，返回 (解析后的记录, 总页数)，失败时为 None
+
+        响应体边接收边解析（限速与失败重试由数据源客户端负责）。
+        """
+        page_params = {
+            **params,
+            "pageNo": str(page_no),
+            "pageSize": str(self.PAGE_SIZE),
+        }
+        parser = JSONArrayStream(("value", "list"), [("value", "pages")])
+        rows = []
         try:
-            response = requests.get(
-                self.url, 
-                headers=self.headers, 
-                params=params,
-                timeout=15
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if "value" not in data or "list" not in data.get("value", {}):
-                logger.warning(f"DLT API 第 {page_no} 页响应格式异常")
-                return {}
-            
-            return data
+            async with self.client.stream("GET", self.url, headers=self.headers, params=page_params) as response:
+                async for item in stream_json_items(response, parser):
+                    row = self._parse_item(item)
+                    if row is not None:
+                        rows.append(row)
         except Exception as e:
             logger.error(f"获取大乐透第 {page_no} 页数据失败: {e}")
-            return {}
-    
-    def _parse_results(self, json_data: dict) -> List[Dict[str, Any]]:
-        """解析响应数据"""
-        results = []
-        value = json_data.get("value", {})
-        for item in value.get("list", []):
-            try:
-                draw_result = item["lotteryDrawResult"].split()
-                front_area = list(map(int, draw_result[:5]))
-                back_area = list(map(int, draw_result[5:]))
-                
-                results.append({
-                    "period": item["lotteryDrawNum"],
-                    "front1": front_area[0],
-                    "front2": front_area[1],
-                    "front3": front_area[2],
-                    "front4": front_area[3],
-                    "front5": front_area[4],
-                    "back1": back_area[0],
-                    "back2": back_area[1],
-                    "sale_begin_time": item.get("lotterySaleBeginTime", ""),
-                    "sale_end_time": item.get("lotterySaleEndtime", ""),
-                })
-            except (KeyError, ValueError, IndexError) as e:
-                logger.error(f"解析大乐透数据失败: {e}")
-                continue
-        return results
+            self.failed_pages.append(page_no)
+            return None
+
+        if not parser.found:
+            logger.warning(f"DLT API 第 {page_no} 页响应格式异常")
+            self.failed_pages.append(page_no)
+            return None
+
+        return rows, int(parser.fields.get(("value", "pages")) or 1)
+
+    @staticmethod
+    def _dedupe(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """按期号去重（抓取期间开奖会使后续页整体后移一条）"""
+        seen = set()
+        unique = []
+        for item in results:
+            if item["period"] not in seen:
+                seen.add(item["period"])
+                unique.append(item)
+        return unique
+
+    def _parse_item(self, item: dict) -> Optional[Dict[str, Any]]:
+        """解析单条开奖记录，格式异常时返回 None"""
+        try:
+            draw_result = item["lotteryDrawResult"].split()
+            front_area = list(map(int, draw_result[:5]))
+            back_area = list(map(int, draw_result[5:]))
+
+            return {
+                "period": item["lotteryDrawNum"],
+                "front1": front_area[0],
+                "front2": front_area[1],
+                "front3": front_area[2],
+                "front4": front_area[3],
+                "front5": front_area[4],
+                "back1": back_area[0],
+                "back2": back_area[1],
+                "sale_begin_time": item.get("lotterySaleBeginTime", ""),
+                "sale_end_time": item.get("lotterySaleEndtime", ""),
+            }
+        except (KeyError, ValueError, IndexError) as e:
+            logger.error(f"解析大乐透数据失败: {e}")
+            return None
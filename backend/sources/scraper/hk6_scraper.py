@@ -0,0 +1,166 @@
+"""
+香港六合彩数据爬虫
+从 HKJC 官网 GraphQL 接口获取数据
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+
+from sources.base import DataSource
+from sources.http_clients import SourceClient
+from sources.json_stream import JSONArrayStream, stream_json_items
+
+logger = logging.getLogger(__name__)
+
+# 必须使用官网完全相同的查询格式（包含lotteryPool），否则会被白名单拒绝
+GRAPHQL_QUERY = "fragment lotteryDrawsFragment on LotteryDraw {\n  id\n  year\n  no\n  openDate\n  closeDate\n  drawDate\n  status\n  snowballCode\n  snowballName_en\n  snowballName_ch\n  lotteryPool {\n    sell\n    status\n    totalInvestment\n    jackpot\n    unitBet\n    estimatedPrize\n    derivedFirstPrizeDiv\n    lotteryPrizes {\n      type\n      winningUnit\n      dividend\n    }\n  }\n  drawResult {\n    drawnNo\n    xDrawnNo\n  }\n}\n\nquery marksixResult($lastNDraw: Int, $startDate: String, $endDate: String, $drawType: LotteryDrawType) {\n  lotteryDraws(\n    lastNDraw: $lastNDraw\n    startDate: $startDate\n    endDate: $endDate\n    drawType: $drawType\n  ) {\n    ...lotteryDrawsFragment\n  }\n}"
+
+
+def parse_period(period: str) -> Tuple[int, int]:
+    """期号（HKJC 开奖 id，如 20265N）-> (年份, 当年期数)"""
+    return int(period[:4]), int(period[4:].rstrip("N"))
+
+
+class HK6Scraper(DataSource):
+    """香港六合彩数据爬虫"""
+
+    source_name = "hk6"
+    FIRST_YEAR = 1976  # 六合彩首期开奖年份
+
+    def __init__(self, client: Optional[SourceClient] = None):
+        super().__init__(client)
+        self.headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        }
+
+    async def fetch_by_count(self, count: int) -> List[Dict[str, Any]]:
+        """获取最近 count 期数据"""
+        return await self._fetch_draws(last_n_draw=count)
+
+    async def fetch_by_date(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """按开奖日期范围获取（YYYY-MM-DD，接口使用 YYYYMMDD）"""
+        return await self._fetch_draws(
+            start_date=start_date.replace("-", ""),
+            end_date=end_date.replace("-", ""),
+        )
+
+    async def fetch_by_period(self, start: str, end: str) -> List[Dict[str, Any]]:
+        """按期号范围获取：接口只支持日期筛选，按所跨年份查询后按 (年份, 期数) 过滤"""
+        lo, hi = parse_period(start), parse_period(end)
+        data = await self.fetch_by_date(f"{lo[0]}-01-01", f"{hi[0]}-12-31")
+        return [d for d in data if lo <= (d["year"], int(d["no"])) <= hi]
+
+    async def iter_pages(
+        self, count: Optional[int] = None, start_page: int = 1
+    ) -> AsyncIterator[Tuple[int, int, List[Dict[str, Any]]]]:
+        """按年份逐页产出全部历史：第 1 页为今年，往前每年一页
+
+        跨年续传时页码整体对应到晚一年，只会重复获取已写入的年份，不会遗漏。
+        count 由调用方按已写入期数截断。
+        """
+        current_year = datetime.now().year
+        total_pages = current_year - self.FIRST_YEAR + 1
+        max_concurrency = self.client.max_connections
+        page_no = start_page
+        while page_no <= total_pages:
+            batch = list(range(page_no, min(page_no + max_concurrency, total_pages + 1)))
+            years = [current_year - p + 1 for p in batch]
+            pages = await asyncio.gather(
+                *(self._query_draws(start_date=f"{y}0101", end_date=f"{y}1231") for y in years),
+                return_exceptions=True,
+            )
+            for p, year, page_data in zip(batch, years, pages):
+                if isinstance(page_data, Exception):
+                    raise RuntimeError(f"六合彩 {year} 年数据获取失败: {page_data}")
+                yield p, total_pages, page_data
+            page_no = batch[-1] + 1
+
+    async def _fetch_draws(
+        self,
+        last_n_draw: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        try:
+            return await self._query_draws(last_n_draw, start_date, end_date)
+        except Exception as e:
+            logger.error(f"获取六合彩数据失败: {e}")
+            return []
+
+    async def stream_draws(self, count: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """按 lastNDraw 一次请求，响应体边接收边解析、逐条产出（新到旧）"""
+        if not count:
+            async for row in super().stream_draws(count):
+                yield row
+            return
+        async for row in self._stream_draws(last_n_draw=count):
+            yield row
+
+    async def _query_draws(
+        self,
+        last_n_draw: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """请求 GraphQL 接口，失败时抛出异常"""
+        return [row async for row in self._stream_draws(last_n_draw, start_date, end_date)]
+
+    async def _stream_draws(
+        self,
+        last_n_draw: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        payload = {
+            "operationName": "marksixResult",
+            "variables": {
+                "lastNDraw": last_n_draw,
+                "drawType": "All",
+                "startDate": start_date,
+                "endDate": end_date
+            },
+            "query": GRAPHQL_QUERY
+        }
+        parser = JSONArrayStream(("data", "lotteryDraws"))
+        async with self.client.stream("POST", self.url, json=payload, headers=self.headers) as response:
+            async for draw in stream_json_items(response, parser):
+                row = self._parse_item(draw)
+                if row is not None:
+                    yield row
+        if not parser.found:
+            raise RuntimeError("六合彩接口响应格式异常（无 lotteryDraws）")
+
+    def _parse_item(self, draw: dict) -> Optional[Dict[str, Any]]:
+        """解析单条开奖记录，只保留已开奖的记录"""
+        if draw.get("status") != "Result":
+            return None
+
+        draw_result = draw.get("drawResult", {})
+        numbers = draw_result.get("drawnNo", [])
+        special = draw_result.get("xDrawnNo")
+
+        if len(numbers) != 6 or special is None:
+            return None
+
+        # 解析日期
+        draw_date = draw.get("drawDate", "")
+        if "+" in draw_date:
+            draw_date = draw_date.split("+")[0]
+
+        return {
+            "period": draw.get("id"),
+            "year": int(draw.get("year", 0)),
+            "no": draw.get("no"),
+            "date": draw_date,
+            "num1": numbers[0],
+            "num2": numbers[1],
+            "num3": numbers[2],
+            "num4": numbers[3],
+            "num5": numbers[4],
+            "num6": numbers[5],
+            "special": special,
+            "snowball_code": draw.get("snowballCode") or None,
+            "snowball_name": draw.get("snowballName_ch") or None,
+        }
@@ -2,21 +2,30 @@
 双色球数据爬虫
 从中国福利彩票官网获取数据
 """
+import asyncio
 import logging
-from typing import List, Dict, Any
-import httpx
+import random
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 
 from sources.base import DataSource
+from sources.http_clients import SourceClient
+from sources.json_stream import JSONArrayStream, stream_json_items
 from config import SSQ_CONFIG
 
 logger = logging.getLogger(__name__)
 
 
+class MalformedPage(Exception):
+    """响应可以解析，但不是预期的分页数据（如接口繁忙时返回的错误信息）"""
+
+
 class SSQScraper(DataSource):
     """双色球数据爬虫"""
     
-    def __init__(self):
-        self.url = SSQ_CONFIG["url"]
+    source_name = "ssq"
+    
+    def __init__(self, client: Optional[SourceClient] = None):
+        super().__init__(client)
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36",
             "Accept": "application/json, text/javascript, */*; q=0.01",
@@ -26,6 +35,9 @@ class SSQScraper(DataSource):
             "X-Requested-With": "XMLHttpRequest",
         }
         self.default_params = SSQ_CONFIG["default_params"].copy()
+        self.max_concurrency = self.client.max_connections
+        # 最近一次抓取中重试后仍失败的页码
+        self.failed_pages: List[int] = []
     
     async def fetch_by_count(self, count: int) -> List[Dict[str, Any]]:
         """按期数获取双色球数据"""
@@ -55,65 +67,123 @@ class SSQScraper(DataSource):
         }
         return await self._fetch_all_pages(params)
     
+    async def iter_pages(
+        self, count: Optional[int] = None, start_page: int = 1
+    ) -> AsyncIterator[Tuple[int, int, List[Dict[str, Any]]]]:
+        """逐页产出全部历史（新到旧），每批 max_concurrency 页并发、按页序产出"""
+        params = dict(self.default_params)
+        if count:
+            params["issueCount"] = str(count)
+        self.failed_pages = []
+        first_page = await self._fetch_page(params, 1)
+        if first_page is None:
+            raise RuntimeError("双色球第 1 页获取失败")
+        total_pages = first_page[1]
+        
+        page_no = start_page
+        while page_no <= total_pages:
+            batch = list(range(page_no, min(page_no + self.max_concurrency, total_pages + 1)))
+            pages = await asyncio.gather(
+                *(self._fetch_page(params, p) for p in batch if p != 1)
+            )
+            if batch[0] == 1:
+                pages = [first_page] + list(pages)
+            for p, page in zip(batch, pages):
+                if page is None:
+                    raise RuntimeError(f"双色球第 {p} 页重试后仍获取失败")
+                yield p, total_pages, page[0]
+            page_no = batch[-1] + 1
+    
     async def _fetch_all_pages(self, params: dict) -> List[Dict[str, Any]]:
-        """获取所有分页数据"""
-        all_results = []
+        """获取所有分页数据：第一页确定总页数，其余页并发获取后按页序拼接、按期号去重"""
+        self.failed_pages = []
+        # 获取第一页确定总页数
+        first_page = await self._fetch_page(params, 1)
+        if first_page is None:
+            return []
+        
+        total_pages = first_page[1]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def fetch(page_no: int):
+            async with semaphore:
+                return await self._fetch_page(params, page_no)
         
-        async with httpx.AsyncClient(
-            timeout=30.0,
-            follow_redirects=True,  # 跟随重定向
-            verify=False,  # 忽略 SSL 验证问题
-        ) as client:
-            # 获取第一页确定总页数
-            first_page = await self._fetch_page(client, params, 1)
-            if not first_page:
-                return []
-            
-            total_pages = first_page.get("pageNum", 1)
-            all_results.extend(self._parse_results(first_page))
-            
-            # 获取剩余页面
-            for page_no in range(2, int(total_pages) + 1):
-                page_data = await self._fetch_page(client, params, page_no)
-                if page_data:
-                    all_results.extend(self._parse_results(page_data))
+        pages = [first_page] + await asyncio.gather(
+            *(fetch(page_no) for page_no in range(2, total_pages + 1))
+        )
         
+        if self.failed_pages:
+            logger.error(f"双色球第 {sorted(self.failed_pages)} 页重试后仍获取失败，结果不完整")
+        
+        # 抓取期间若有新一期开奖，后续页会整体后移一条，按期号去重
+        all_results = []
+        seen = set()
+        for page in pages:
+            for item in page[0] if page else []:
+                if item["period"] not in seen:
+                    seen.add(item["period"])
+                    all_results.append(item)
         return all_results
     
-    async def _fetch_page(
-        self, client: httpx.AsyncClient, params: dict, page_no: int
-    ) -> Dict[str, Any]:
-        """获取单页数据"""
-        try:
-            params["pageNo"] = str(page_no)
-            response = await client.get(
-                self.url, headers=self.headers, params=params
-            )
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            logger.error(f"获取双色球第 {page_no} 页数据失败: {e}")
-            return {}
-    
-    def _parse_results(self, json_data: dict) -> List[Dict[str, Any]]:
-        """解析响应数据"""
-        results = []
-        for item in json_data.get("result", []):
+    async def _fetch_page(self, params: dict, page_no: int) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """获取单页数据，返回 (解析后的记录, 总页数)，重试后仍失败时为 None
+
+        响应体边接收边解析，大 pageSize 时也不会整体载入内存（限速与连接、状态码重试由数据源客户端负责）。
+        客户端开始读取响应体后不再重试，因此响应格式异常（如接口繁忙时返回的 {"state":1,"message":...}，
+        不含 result 或 pageNum）由本方法按客户端的重试次数与退避重新获取整页。
+        """
+        max_retries = self.client.max_retries
+        for attempt in range(1, max_retries + 1):
             try:
-                red_balls = [int(n) for n in item["red"].split(",")]
-                results.append({
-                    "period": int(item["code"]),
-                    "date": item["date"],
-                    "weekday": item["week"],
-                    "red1": red_balls[0],
-                    "red2": red_balls[1],
-                    "red3": red_balls[2],
-                    "red4": red_balls[3],
-                    "red5": red_balls[4],
-                    "red6": red_balls[5],
-                    "blue": int(item["blue"]),
-                })
-            except (KeyError, ValueError, IndexError) as e:
-                logger.error(f"解析双色球数据失败: {e}")
-                continue
-        return results
+                return await self._read_page(params, page_no)
+            except MalformedPage as e:
+                if attempt == max_retries:
+                    logger.error(f"获取双色球第 {page_no} 页数据失败: {e}")
+                    break
+                backoff = self.client.retry_backoff * 2 ** (attempt - 1)
+                logger.warning(f"双色球第 {page_no} 页{e}, {backoff:.1f}s 后重试 ({attempt}/{max_retries})")
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+            except Exception as e:
+                logger.error(f"获取双色球第 {page_no} 页数据失败: {e}")
+                break
+        self.failed_pages.append(page_no)
+        return None
+
+    async def _read_page(self, params: dict, page_no: int) -> Tuple[List[Dict[str, Any]], int]:
+        """请求并解析单页；响应中没有 result 数组或 pageNum 时抛出 MalformedPage"""
+        parser = JSONArrayStream(("result",), [("pageNum",)])
+        rows = []
+        async with self.client.stream(
+            "GET", self.url, headers=self.headers, params={**params, "pageNo": str(page_no)}
+        ) as response:
+            async for item in stream_json_items(response, parser):
+                row = self._parse_item(item)
+                if row is not None:
+                    rows.append(row)
+        if not parser.found:
+            raise MalformedPage("响应格式异常（无 result）")
+        total_pages = parser.fields.get(("pageNum",))
+        if total_pages is None:
+            raise MalformedPage("响应格式异常（无 pageNum）")
+        return rows, int(total_pages)
+    
+    def _parse_item(self, item: dict) -> Optional[Dict[str, Any]]:
+        """解析单条开奖记录，格式异常时返回 None"""
+        try:
+            red_balls = [int(n) for n in item["red"].split(",")]
+            return {
+                "period": int(item["code"]),
+                "date": item["date"],
+                "weekday": item["week"],
+                "red1": red_balls[0],
+                "red2": red_balls[1],
+                "red3": red_balls[2],
+                "red4": red_balls[3],
+                "red5": red_balls[4],
+                "red6": red_balls[5],
+                "blue": int(item["blue"]),
+            }
+        except (KeyError, ValueError, IndexError) as e:
+            logger.error(f"解析双色球数据失败: {e}")
+            return None